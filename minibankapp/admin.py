@@ -1,10 +1,26 @@
 # -*- coding: utf-8 -*-
 
-from django.contrib import admin
+from django.contrib import (admin, messages)
 from .models import (CustomerModel, AccountModel, OperationModel, AccountTypeModel, ParameterModel)
+from .iban import IbanGeneratorClass
+
+
+class AccountAdmin(admin.ModelAdmin):
+    actions = ['generate_iban']
+
+    @admin.action(description='Generate missing IBAN numbers')
+    def generate_iban(self, request, queryset):
+        iban_generator = IbanGeneratorClass()
+        iban_generator.run(queryset)
+        self.message_user(
+                        request,
+                        f'{iban_generator.generated} IBAN(s) generated, {len(iban_generator.rejected)} rejected '
+                        f'({iban_generator.throughput} accounts/s).',
+                        messages.WARNING if iban_generator.rejected else messages.SUCCESS)
+
 
 admin.site.register(CustomerModel)
-admin.site.register(AccountModel)
+admin.site.register(AccountModel, AccountAdmin)
 admin.site.register(AccountTypeModel)
 admin.site.register(ParameterModel)
 admin.site.register(OperationModel)
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import shutil
+import datetime
+from pathlib import Path
+from time import perf_counter
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from .models import (OperationModel, OperationArchiveModel)
+from .archive import ArchiveChainClass
+from .snapshots import snapshot_date
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+""" Analytics export """
+class AnalyticsExportClass:
+
+    fields = [
+                'Id_operation',
+                'Type_operation',
+                'Value_operation',
+                'Balance_after_operation',
+                'Operation_date',
+                'Operation_employee',
+                'FK_Id_account',
+                'FK_Id_account__FK_Id_account_type',
+                'FK_Id_account__FK_Id_customer']
+
+    def __init__(self, directory=None, batch_size=50000, last_id_operation=None):
+        self.directory = Path(directory or getattr(settings, 'MINIBANK_ANALYTICS_DIR', Path(getattr(settings, 'BASE_DIR', '.')) / 'analytics'))
+        self.batch_size = batch_size
+        self.last_id_operation = last_id_operation
+        self.lag = getattr(settings, 'MINIBANK_ANALYTICS_LAG', 60)
+        self.exported = 0
+        self.files = []
+        self.duration = 0
+
+    def schema(self):
+        return pyarrow.schema([
+                            ('Id_operation', pyarrow.int64()),
+                            ('Type_operation', pyarrow.int8()),
+                            ('Value_operation', pyarrow.decimal128(12, 2)),
+                            ('Balance_after_operation', pyarrow.decimal128(12, 2)),
+                            ('Operation_date', pyarrow.timestamp('us', tz='UTC' if settings.USE_TZ else None)),
+                            ('Operation_employee', pyarrow.string()),
+                            ('Id_account', pyarrow.int64()),
+                            ('Id_account_type', pyarrow.string()),
+                            ('Id_customer', pyarrow.int64())])
+
+    # Names starting with _ or . are skipped by Parquet dataset readers
+    @property
+    def state_path(self):
+        return self.directory / '_state.json'
+
+    def temporary_path(self, path):
+        return path.with_name(f'.{path.name}')
+
+    def read_state(self):
+        try:
+            return json.loads(self.state_path.read_text())
+        except FileNotFoundError:
+            return {'last_id_operation': 0, 'exported': 0}
+
+    def write_state(self, state):
+        temporary_path = self.temporary_path(self.state_path)
+        temporary_path.write_text(json.dumps(state, indent=1))
+        os.replace(temporary_path, self.state_path)
+
+    def upper_bound(self):
+        # Postings take their id before they commit, operations younger than the lag may still be followed by a lower id
+        cutoff = timezone.now() - datetime.timedelta(seconds=self.lag)
+        for model in [OperationModel, OperationArchiveModel]:
+            last_id_operation = (model.objects
+                                    .filter(Operation_date__lt=cutoff)
+                                    .order_by('-Id_operation')
+                                    .values_list('Id_operation', flat=True)
+                                    .first())
+            if last_id_operation is not None:
+                return last_id_operation
+        return 0
+
+    def get_queryset(self, id_from, id_to):
+        # Archived operations first, both tables in id order with account type and customer of the account
+        return (ArchiveChainClass(OperationModel.objects.all(), OperationArchiveModel.objects.all())
+                                .filter(Id_operation__gt=id_from, Id_operation__lte=id_to)
+                                .order_by('Id_operation')
+                                .values_list(*self.fields))
+
+    def record_batches(self, rows, schema):
+        # Rows of a batch split by month of the operation, one record batch per month
+        periods = {}
+        for row in rows:
+            periods.setdefault(snapshot_date(row[4]).strftime('%Y-%m'), []).append(row)
+        for period, period_rows in periods.items():
+            columns = [pyarrow.array(column, type=field.type) for column, field in zip(zip(*period_rows), schema)]
+            yield period, pyarrow.RecordBatch.from_arrays(columns, schema=schema)
+
+    def write(self, id_from, id_to):
+        # Writers of a run stay open per month, files get their names once complete
+        schema = self.schema()
+        writers = {}
+        rows = []
+        try:
+            for row in self.get_queryset(id_from, id_to).iterator(chunk_size=self.batch_size):
+                rows.append(row)
+                if len(rows) < self.batch_size:
+                    continue
+                self.write_batch(writers, rows, schema, id_from)
+                rows = []
+            if rows:
+                self.write_batch(writers, rows, schema, id_from)
+        except Exception:
+            for writer, path in writers.values():
+                writer.close()
+                self.temporary_path(path).unlink(missing_ok=True)
+            raise
+        for writer, path in writers.values():
+            writer.close()
+            os.replace(self.temporary_path(path), path)
+            self.files.append(path)
+
+    def write_batch(self, writers, rows, schema, id_from):
+        for period, record_batch in self.record_batches(rows, schema):
+            if period not in writers:
+                # Same name when a failed run is repeated from the same state, its files are replaced
+                path = self.directory / f'month={period}' / f'part-{id_from + 1:012d}.parquet'
+                path.parent.mkdir(parents=True, exist_ok=True)
+                writers[period] = (pyarrow.parquet.ParquetWriter(self.temporary_path(path), schema, compression='zstd'), path)
+            writers[period][0].write_batch(record_batch)
+        self.exported += len(rows)
+
+    def reset(self):
+        # Full export starts from an empty directory
+        for path in self.directory.glob('month=*'):
+            shutil.rmtree(path)
+        self.state_path.unlink(missing_ok=True)
+
+    def run(self, full=False):
+        if pyarrow is None:
+            raise ImproperlyConfigured('Parquet export needs pyarrow, install it with pip install pyarrow.')
+        start_time = perf_counter()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lock_path = self.directory / '_export.lock'
+        try:
+            lock = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise RuntimeError(f'Another analytics export is running, remove {lock_path} if it has stopped.')
+        try:
+            if full:
+                self.reset()
+            state = self.read_state()
+            id_to = self.upper_bound() if self.last_id_operation is None else self.last_id_operation
+            if id_to > state['last_id_operation']:
+                self.write(state['last_id_operation'], id_to)
+                self.write_state({
+                                'last_id_operation': id_to,
+                                'exported': state['exported'] + self.exported,
+                                'updated': timezone.now().isoformat()})
+        finally:
+            os.close(lock)
+            lock_path.unlink()
+        self.duration = perf_counter() - start_time
+        return self.files
+
+    @property
+    def throughput(self):
+        if not self.duration:
+            return 0
+        return round(self.exported / self.duration, 2)
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+import json
+import base64
+import hashlib
+from django.conf import settings
+from django.contrib.auth import (authenticate, get_user_model)
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.http import (HttpResponse, JsonResponse, Http404)
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from .models import (CustomerModel, AccountModel)
+from .functions import (CustomerSearchMixin, KeysetPaginationMixin)
+from .decorators import ActivityMonitoringClass
+from .posting import (post_operation, BatchPostingClass)
+from .archive import (ArchiveChainClass, operation_history, last_operation_id)
+
+
+""" JSON API v1 """
+@method_decorator(csrf_exempt, name='dispatch')
+class ApiView(View):
+    # Session of the browser or HTTP Basic credentials of a downstream system
+    auth_cache_prefix = 'minibank:api:auth'
+
+    def basic_user(self, request):
+        header = request.headers.get('Authorization', '')
+        if not header.startswith('Basic '):
+            return None
+        # Password hashing is slow on purpose, checked credentials are trusted for MINIBANK_API_AUTH_TTL seconds
+        cache_key = f'{self.auth_cache_prefix}:{hashlib.sha256(header.encode()).hexdigest()}'
+        user_id = cache.get(cache_key)
+        if user_id is not None:
+            return get_user_model().objects.filter(pk=user_id, is_active=True).first()
+        try:
+            username, password = base64.b64decode(header[6:]).decode().split(':', 1)
+        except (ValueError, UnicodeDecodeError):
+            return None
+        user = authenticate(request, username=username, password=password)
+        if user is not None:
+            cache.set(cache_key, user.pk, timeout=getattr(settings, 'MINIBANK_API_AUTH_TTL', 60))
+        return user
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            # Cookies are sent by the browser on its own, the session keeps its CSRF protection
+            rejected = CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {})
+            if rejected is not None:
+                return self.error('CSRF verification failed.', status=403)
+        else:
+            user = self.basic_user(request)
+            if user is None:
+                response = self.error('Authentication credentials were not provided or are invalid.', status=401)
+                response['WWW-Authenticate'] = 'Basic realm="minibank"'
+                return response
+            request.user = user
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404 as error_message:
+            return self.error(str(error_message), status=404)
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        response = self.error(f'Method {request.method} not allowed.', status=405)
+        response['Allow'] = ', '.join(method.upper() for method in self._allowed_methods())
+        return response
+
+    def error(self, message, status=400):
+        return JsonResponse({'error': message}, status=status)
+
+    def get_etag(self):
+        # None: ETag is taken from the response body
+        return None
+
+    def respond(self, data):
+        # Known ETag answers 304 before the list is read, otherwise the body hash saves the transfer
+        etag = self.get_etag()
+        if etag is not None:
+            not_modified = get_conditional_response(self.request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+        content = json.dumps(data() if callable(data) else data, cls=DjangoJSONEncoder)
+        if etag is None:
+            etag = quote_etag(hashlib.md5(content.encode()).hexdigest())
+            not_modified = get_conditional_response(self.request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        return response
+
+
+class ApiListMixin(KeysetPaginationMixin):
+    fields = []
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get('limit', 50))
+        except ValueError:
+            return 50
+        return min(max(limit, 1), getattr(settings, 'MINIBANK_API_PAGE_LIMIT', 500))
+
+    def serialize(self, row):
+        if isinstance(row, dict):
+            return {field: row[field] for field in self.fields}
+        return {field: getattr(row, field) for field in self.fields}
+
+    def get_page(self, queryset):
+        limit = self.get_limit()
+        # Ranked search results come as a short list, they have no cursor
+        if not isinstance(queryset, (QuerySet, ArchiveChainClass)):
+            return {'results': [self.serialize(row) for row in queryset[:limit]], 'previous': None, 'next': None}
+        rows, number, cursor, backwards = self.keyset_slice(queryset, limit)
+        paginator, page, object_list, is_paginated = self.keyset_page(list(rows), None, limit, number, cursor, backwards)
+        return {
+                'results': [self.serialize(row) for row in object_list],
+                'previous': f'{self.request.path}?{self.page_query(cursor=page.previous_cursor)}' if page.has_previous() else None,
+                'next': f'{self.request.path}?{self.page_query(cursor=page.next_cursor)}' if page.has_next() else None}
+
+
+class CustomerApiView(ApiListMixin, CustomerSearchMixin, ApiView):
+    keyset_ordering = ['-Id_customer']
+    fields = [
+            'Id_customer', 'First_name', 'Last_name', 'Street', 'House', 'Apartment', 'Postal_code', 'City',
+            'Pesel', 'Birth_date', 'Birth_city', 'Identification', 'Created_date']
+
+    def get(self, request, *args, **kwargs):
+        # Same search as the customer list pages
+        if request.GET.get('criteria'):
+            queryset = self.get_queryset_customer('criteria')
+        else:
+            queryset = CustomerModel.objects.all()
+        if isinstance(queryset, QuerySet):
+            queryset = queryset.values(*self.fields)
+        return self.respond(lambda: self.get_page(queryset))
+
+
+class AccountApiView(ApiListMixin, ApiView):
+    keyset_ordering = ['-Id_account']
+    fields = ['Id_account', 'Number_IBAN', 'Balance', 'Debit', 'Free_balance', 'Percent', 'Created_date']
+
+    def serialize(self, row):
+        data = super().serialize(row)
+        data['Account_type'] = {
+                                'Id_account_type': row.FK_Id_account_type.Id_account_type,
+                                'Description': row.FK_Id_account_type.Description}
+        data['Customer'] = {
+                            'Id_customer': row.FK_Id_customer.Id_customer,
+                            'First_name': row.FK_Id_customer.First_name,
+                            'Last_name': row.FK_Id_customer.Last_name}
+        return data
+
+    def get(self, request, *args, **kwargs):
+        # One query with both relations joined, whatever the number of accounts
+        queryset = (AccountModel.objects
+                                .of_customer(self.kwargs['customer'])
+                                .with_relations()
+                                .only(
+                                    *self.fields,
+                                    'FK_Id_account_type__Id_account_type', 'FK_Id_account_type__Description',
+                                    'FK_Id_customer__Id_customer', 'FK_Id_customer__First_name', 'FK_Id_customer__Last_name'))
+        return self.respond(lambda: self.get_page(queryset))
+
+
+class OperationApiView(ApiListMixin, ApiView):
+    keyset_ordering = ['-Operation_date', '-Id_operation']
+    fields = ['Id_operation', 'Type_operation', 'Value_operation', 'Balance_after_operation', 'Operation_date', 'Operation_employee']
+
+    def get_etag(self):
+        # Operations are only appended, the newest id of the account changes with every posting
+        if self.request.method != 'GET':
+            return None
+        # Archival moves rows without changing the list, the newest id of both tables stays the same
+        last_id_operation = last_operation_id(self.kwargs['account'])
+        query = hashlib.md5(self.request.GET.urlencode().encode()).hexdigest()[:12]
+        return quote_etag(f'operations-{self.kwargs["account"]}-{last_id_operation}-{query}')
+
+    def get_operations(self):
+        if not AccountModel.objects.filter(pk=self.kwargs['account']).exists():
+            raise Http404('Account does not exist.')
+        return self.get_page(operation_history(self.kwargs['account'], archived=True).values(*self.fields))
+
+    def get(self, request, *args, **kwargs):
+        return self.respond(self.get_operations)
+
+    @method_decorator(ActivityMonitoringClass())
+    def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+            record = (self.kwargs['account'], data.get('Type_operation'), data.get('Value_operation'))
+        except (ValueError, AttributeError):
+            return self.error('Body should be a JSON object with Type_operation and Value_operation.')
+        # Same checks as a line of a batch file
+        batch_posting = BatchPostingClass(employee=request.user)
+        parsed = batch_posting.parse_line(1, record)
+        if parsed is None:
+            return self.error(batch_posting.results[-1][3])
+        if not AccountModel.objects.filter(pk=self.kwargs['account']).exists():
+            return self.error('Account does not exist.', status=404)
+        account, type_operation, value_operation = parsed
+        try:
+            operation = post_operation(account, type_operation, value_operation, request.user)
+        except ValidationError as error_message:
+            return self.error(error_message.messages[0], status=409)
+        return JsonResponse(
+                            {field: getattr(operation, field) for field in self.fields},
+                            encoder=DjangoJSONEncoder,
+                            status=201)
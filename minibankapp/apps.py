@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MinibankappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'minibankapp'
+
+    def ready(self):
+        from . import signals
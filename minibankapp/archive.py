@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+from time import perf_counter
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (F, Sum, Max, Min)
+from django.utils import timezone
+from .models import (OperationModel, OperationArchiveModel, LogModel, LogArchiveModel, ArchivePartitionModel, BalanceSnapshotModel)
+from .snapshots import (day_start, day_end, snapshot_date, compact_snapshots)
+
+
+def month_start(date):
+    return date.replace(day=1)
+
+
+def next_month(date):
+    return (month_start(date) + datetime.timedelta(days=32)).replace(day=1)
+
+
+# Boundary not read yet by the caller
+unknown_boundary = object()
+
+
+def archive_boundary():
+    # First day after the newest archived month, None while nothing has been archived.
+    # Read from the database on every call, a cached value would hide rows moved by another process
+    period = ArchivePartitionModel.objects.filter(Table_name='operation').aggregate(period=Max('Period'))['period']
+    if period is None:
+        return None
+    return next_month(datetime.date(int(period[:4]), int(period[5:]), 1))
+
+
+def operation_history(account, date_from=None, date_to=None, archived=False, boundary=unknown_boundary):
+    # Live operations of the period, archived ones too when the period starts before the archive boundary
+    live = OperationModel.objects.filter(FK_Id_account=account)
+    archive = OperationArchiveModel.objects.filter(FK_Id_account=account)
+    if date_from is not None:
+        live = live.filter(Operation_date__gte=day_start(date_from))
+        archive = archive.filter(Operation_date__gte=day_start(date_from))
+    if date_to is not None:
+        live = live.filter(Operation_date__lt=day_end(date_to))
+        archive = archive.filter(Operation_date__lt=day_end(date_to))
+    if boundary is unknown_boundary:
+        boundary = archive_boundary()
+    if boundary is None or not (archived or (date_from is not None and date_from < boundary)):
+        return live
+    # Month being archived has rows in both tables, the live table is read for old periods too
+    return ArchiveChainClass(live, archive)
+
+
+def last_operation_id(account):
+    # Newest operation of the account, archived accounts without recent postings keep their last id
+    for model in [OperationModel, OperationArchiveModel]:
+        last_id_operation = model.objects.filter(FK_Id_account=account).aggregate(last_id=Max('Id_operation'))['last_id']
+        if last_id_operation is not None:
+            return last_id_operation
+    return 0
+
+
+""" Read path over live and archived rows """
+class ArchiveChainClass:
+    # Archived rows are older than every live row (also while a month is moved): newest first reads the live table and continues in the archive
+
+    def __init__(self, live, archive, low=0, high=None):
+        self.live = live
+        self.archive = archive
+        self.low = low
+        self.high = high
+
+    @property
+    def model(self):
+        return self.live.model
+
+    def chain(self, live, archive):
+        return ArchiveChainClass(live, archive, self.low, self.high)
+
+    def filter(self, *args, **kwargs):
+        return self.chain(self.live.filter(*args, **kwargs), self.archive.filter(*args, **kwargs))
+
+    def order_by(self, *field_names):
+        return self.chain(self.live.order_by(*field_names), self.archive.order_by(*field_names))
+
+    def values(self, *fields):
+        return self.chain(self.live.values(*fields), self.archive.values(*fields))
+
+    def values_list(self, *fields, **kwargs):
+        return self.chain(self.live.values_list(*fields, **kwargs), self.archive.values_list(*fields, **kwargs))
+
+    def parts(self):
+        ordering = self.live.query.order_by
+        if ordering and not ordering[0].startswith('-'):
+            return self.archive, self.live
+        return self.live, self.archive
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self[key:key + 1])[0]
+        low = self.low + (key.start or 0)
+        high = self.high if key.stop is None else self.low + key.stop
+        if self.high is not None and high is not None:
+            high = min(high, self.high)
+        return ArchiveChainClass(self.live, self.archive, low, max(low, high) if high is not None else None)
+
+    def rest(self, first, counter):
+        # Rows of the second table following the counter rows read from the first one
+        offset = 0
+        if not counter and self.low:
+            offset = max(self.low - first.count(), 0)
+        if self.high is None:
+            return offset, None
+        return offset, offset + self.high - self.low - counter
+
+    def rows(self):
+        first, second = self.parts()
+        rows = list(first[self.low:self.high])
+        if self.high is not None and len(rows) == self.high - self.low:
+            return rows
+        offset, limit = self.rest(first, len(rows))
+        return rows + list(second[offset:limit])
+
+    def count(self):
+        first, second = self.parts()
+        counter = first[self.low:self.high].count()
+        if self.high is not None and counter == self.high - self.low:
+            return counter
+        offset, limit = self.rest(first, counter)
+        return counter + second[offset:limit].count()
+
+    def exists(self):
+        return self.live.exists() or self.archive.exists()
+
+    def iterator(self, chunk_size=None):
+        if self.low or self.high is not None:
+            yield from self.rows()
+            return
+        for part in self.parts():
+            yield from part.iterator(chunk_size=chunk_size)
+
+    def __iter__(self):
+        return iter(self.rows())
+
+    def __len__(self):
+        return len(self.rows())
+
+    async def acount(self):
+        return await sync_to_async(self.count)()
+
+    async def __aiter__(self):
+        for row in await sync_to_async(self.rows)():
+            yield row
+
+
+""" Archival of operations and logs """
+class ArchivalClass:
+
+    def __init__(self, days=None, log_days=None, chunk_size=5000, today=None):
+        self.days = getattr(settings, 'MINIBANK_ARCHIVE_DAYS', 730) if days is None else days
+        self.log_days = getattr(settings, 'MINIBANK_LOG_ARCHIVE_DAYS', 90) if log_days is None else log_days
+        self.chunk_size = chunk_size
+        self.today = today or timezone.localdate()
+        self.partitions = []
+        self.moved = 0
+        self.duration = 0
+
+    def cutoff(self, days):
+        # Whole months only, the live table starts with the month holding the horizon
+        return month_start(self.today - datetime.timedelta(days=days))
+
+    def periods(self, model, date_field, cutoff):
+        oldest = model.objects.aggregate(oldest=Min(date_field))['oldest']
+        if oldest is None:
+            return
+        period = month_start(snapshot_date(oldest))
+        while period < cutoff:
+            yield period
+            period = next_month(period)
+
+    def period_filter(self, date_field, period):
+        return {f'{date_field}__gte': day_start(period), f'{date_field}__lt': day_start(next_month(period))}
+
+    def move_chunk(self, model, archive_model, ids):
+        # Copy and delete in one transaction, a row is either live or archived
+        fields = [field.attname for field in model._meta.concrete_fields]
+        with transaction.atomic():
+            rows = list(model.objects.filter(pk__in=ids).values(*fields))
+            if rows:
+                archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+                model.objects.filter(pk__in=[row[model._meta.pk.attname] for row in rows]).delete()
+        return len(rows)
+
+    def archive_period(self, table_name, model, archive_model, date_field, period):
+        # Partition is recorded before its first row moves, readers chain into the archive from then on
+        partition, created = ArchivePartitionModel.objects.get_or_create(Table_name=table_name, Period=period.strftime('%Y-%m'))
+        # Oldest rows move first, at every commit archived rows are older than live ones
+        ids = list(model.objects
+                        .filter(**self.period_filter(date_field, period))
+                        .order_by(date_field, 'pk')
+                        .values_list('pk', flat=True))
+        counter = 0
+        for index in range(0, len(ids), self.chunk_size):
+            counter += self.move_chunk(model, archive_model, ids[index:index + self.chunk_size])
+        ArchivePartitionModel.objects.filter(pk=partition.pk).update(Counter=F('Counter') + counter, Archived_date=timezone.now())
+        self.partitions.append((table_name, period.strftime('%Y-%m'), counter))
+        self.moved += counter
+        return counter
+
+    def snapshots_complete(self, period):
+        # Snapshots of the month count every live operation, a month already partly archived was checked before its first move
+        if OperationArchiveModel.objects.filter(**self.period_filter('Operation_date', period)).exists():
+            return True
+        counter = OperationModel.objects.filter(**self.period_filter('Operation_date', period)).count()
+        snapshots = (BalanceSnapshotModel.objects
+                                        .filter(Snapshot_date__gte=period, Snapshot_date__lt=next_month(period))
+                                        .aggregate(counter=Sum('Operation_count')))
+        return counter == (snapshots['counter'] or 0)
+
+    def archive_operations(self):
+        for period in self.periods(OperationModel, 'Operation_date', self.cutoff(self.days)):
+            # Balances and period summaries of archived days are read from snapshots, they are completed before operations leave
+            if not self.snapshots_complete(period):
+                compact_snapshots(period, next_month(period) - datetime.timedelta(days=1))
+            self.archive_period('operation', OperationModel, OperationArchiveModel, 'Operation_date', period)
+
+    def archive_logs(self):
+        for period in self.periods(LogModel, 'Date_log', self.cutoff(self.log_days)):
+            self.archive_period('log', LogModel, LogArchiveModel, 'Date_log', period)
+
+    def run(self, logs=True):
+        start_time = perf_counter()
+        self.archive_operations()
+        if logs:
+            self.archive_logs()
+        self.duration = perf_counter() - start_time
+        return self.partitions
+
+    @property
+    def throughput(self):
+        if not self.duration:
+            return 0
+        return round(self.moved / self.duration, 2)
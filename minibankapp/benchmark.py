@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import importlib
+import itertools
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from time import perf_counter
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import (connection, connections)
+from django.db.models import Max
+from django.test import (Client, AsyncClient, override_settings)
+from django.test.utils import (setup_databases, teardown_databases)
+from django.urls import (reverse, clear_url_caches)
+from django.utils import timezone
+from .models import (CustomerModel, AccountModel, OperationModel, InterestRunModel)
+from .decorators import QueryCounterClass
+from .interest import (InterestCountingClass, current_period)
+from . import urls
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    # Benchmarks never touch the configured database, they run in a throwaway test database
+    old_config = setup_databases(verbosity=0, interactive=False, keepdb=keepdb, aliases={'default'})
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0, keepdb=keepdb)
+
+
+def percentile(values, percent):
+    if not values:
+        return 0
+    values = sorted(values)
+    index = min(int(round(percent / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+""" Teller workflows benchmark """
+class TellerBenchmarkClass:
+
+    def __init__(self, iterations=20, warmup=2, interest_iterations=3):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.interest_iterations = interest_iterations
+        self.results = {}
+
+    def setup(self):
+        # Superuser has the extended role, every route is reachable
+        user = get_user_model().objects.filter(username='benchmark').first()
+        if user is None:
+            user = get_user_model().objects.create_superuser(username='benchmark', password=None)
+        self.client = Client()
+        self.client.force_login(user)
+        # Funded accounts spread over the whole table, the same ones in every run
+        max_id = AccountModel.objects.aggregate(max_id=Max('Id_account'))['max_id'] or 0
+        accounts = list(AccountModel.objects
+                                    .filter(pk__in=range(1, max_id + 1, max(max_id // 200, 1)), Balance__gt=100)
+                                    .order_by('pk')
+                                    .values_list('Id_account', 'FK_Id_customer')[:50])
+        customers = list(CustomerModel.objects.filter(pk__in=[customer for account, customer in accounts]).values_list('Pesel', 'Identification', 'Last_name', 'City'))
+        if not accounts or not customers:
+            raise ValueError('Database should hold customers with funded accounts.')
+        self.accounts = accounts
+        self.criteria = [criteria for pesel, identification, last_name, city in customers for criteria in [pesel[:6], identification[:5], f'{last_name} {city}']]
+
+    def request(self, method, route, args=None, data=None, expected=(200,)):
+        response = getattr(self.client, method)(reverse(f'minibankapp:{route}', args=args), data or {})
+        # Streamed exports are read to the end, as a browser does
+        if response.streaming:
+            b''.join(response.streaming_content)
+        if response.status_code not in expected:
+            raise ValueError(f'{method.upper()} {route} returned {response.status_code}.')
+        return response
+
+    def customer_search(self, number):
+        return self.request('get', 'listcustomer', data={'criteria': self.criteria[number % len(self.criteria)]})
+
+    def account_list(self, number):
+        account, customer = self.accounts[number % len(self.accounts)]
+        return self.request('get', 'listaccount', args=[customer])
+
+    def new_operation(self, number):
+        account, customer = self.accounts[number % len(self.accounts)]
+        return self.request('post', 'newoperation', args=[customer, account], data={'Type_operation': 1 + number % 2, 'Value_operation': '10.00'}, expected=(302,))
+
+    def history_page(self, number):
+        account, customer = self.accounts[number % len(self.accounts)]
+        return self.request('get', 'historyoperation', args=[customer, account])
+
+    def history_export(self, number):
+        account, customer = self.accounts[number % len(self.accounts)]
+        return self.request('get', 'historyexport', args=[account], data={'format': 'csv' if number % 2 else 'xlsx'})
+
+    def iban_generation(self, number):
+        account, customer = self.accounts[number % len(self.accounts)]
+        return self.request('get', 'generate', args=[customer, account], expected=(302,))
+
+    def interest_run(self, number):
+        # The route queues the run of the current period, counting is the work of "manage.py run_interest"
+        self.request('post', 'interest')
+        run = InterestRunModel.objects.get(Period=current_period())
+        InterestCountingClass(employee='benchmark').run(run)
+        # Next iteration queues and counts the whole book again
+        run.delete()
+
+    def workflows(self):
+        return [
+                ('Customer search', self.customer_search, self.iterations),
+                ('Account list', self.account_list, self.iterations),
+                ('New operation', self.new_operation, self.iterations),
+                ('History page', self.history_page, self.iterations),
+                ('History export', self.history_export, self.iterations),
+                ('IBAN generation', self.iban_generation, self.iterations),
+                ('Interest run', self.interest_run, self.interest_iterations)]
+
+    def measure(self, workflow, iterations):
+        for number in range(self.warmup):
+            workflow(number)
+        durations = []
+        queries = []
+        for number in range(iterations):
+            query_counter = QueryCounterClass()
+            with connection.execute_wrapper(query_counter):
+                start_time = perf_counter()
+                workflow(number)
+                durations.append((perf_counter() - start_time) * 1000)
+            queries.append(query_counter.count)
+        # Memory is traced in a separate pass, tracing slows down every allocation
+        tracemalloc.start()
+        try:
+            workflow(iterations)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+                'iterations': iterations,
+                'p50_ms': round(percentile(durations, 50), 3),
+                'p90_ms': round(percentile(durations, 90), 3),
+                'p99_ms': round(percentile(durations, 99), 3),
+                'max_ms': round(max(durations), 3),
+                'queries': max(queries),
+                'peak_kb': round(peak / 1024, 1)}
+
+    def run(self, names=None):
+        self.setup()
+        # Hosts allowed in the configured settings rarely include the test client's one
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, workflow, iterations in self.workflows():
+                if names and name not in names:
+                    continue
+                self.results[name] = self.measure(workflow, iterations)
+        return self.results
+
+    def report(self):
+        return {
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'customers': CustomerModel.objects.count(),
+                'accounts': AccountModel.objects.count(),
+                'operations': OperationModel.objects.count(),
+                'workflows': self.results}
+
+
+def compare_results(results, baseline, tolerance=0.2):
+    # Returns (workflow, metric, baseline, current) for every metric beyond tolerance, more queries are always a regression
+    regressions = []
+    for name, result in results['workflows'].items():
+        base = baseline.get('workflows', {}).get(name)
+        if base is None:
+            continue
+        for metric in ['p50_ms', 'p90_ms', 'peak_kb']:
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append((name, metric, base[metric], result[metric]))
+        if result['queries'] > base['queries']:
+            regressions.append((name, 'queries', base['queries'], result['queries']))
+    return regressions
+
+
+def reload_urls():
+    # Resolvers of include() keep the patterns they read first, the root URLconf is loaded again too
+    importlib.reload(urls)
+    root_urlconf = importlib.import_module(settings.ROOT_URLCONF)
+    if root_urlconf is not urls:
+        importlib.reload(root_urlconf)
+    clear_url_caches()
+
+
+@contextmanager
+def async_views(enabled):
+    # URL patterns pick view classes on import, they are loaded again for the other mode
+    with override_settings(MINIBANK_ASYNC_VIEWS=enabled, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        reload_urls()
+        try:
+            yield
+        finally:
+            reload_urls()
+
+
+""" WSGI / ASGI load """
+class HandlerLoadClass:
+
+    def __init__(self, cookies, requests=200, concurrency=8):
+        self.cookies = cookies
+        self.requests = requests
+        self.concurrency = concurrency
+
+    def wsgi_worker(self, paths, durations):
+        # Thread per concurrent client, like a threaded WSGI server
+        client = Client()
+        client.cookies = self.cookies
+        try:
+            for path in iter(lambda: next(paths, None), None):
+                start_time = perf_counter()
+                response = client.get(path)
+                durations.append((perf_counter() - start_time) * 1000)
+                if response.status_code != 200:
+                    raise ValueError(f'GET {path} returned {response.status_code}.')
+        finally:
+            connections.close_all()
+
+    def wsgi(self, paths):
+        durations = []
+        paths = iter(itertools.islice(itertools.cycle(paths), self.requests))
+        start_time = perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for future in [executor.submit(self.wsgi_worker, paths, durations) for number in range(self.concurrency)]:
+                future.result()
+        return self.result(durations, perf_counter() - start_time)
+
+    async def asgi_worker(self, paths, durations):
+        # Task per concurrent client on one event loop, like an ASGI server
+        client = AsyncClient()
+        client.cookies = self.cookies
+        for path in paths:
+            start_time = perf_counter()
+            response = await client.get(path)
+            durations.append((perf_counter() - start_time) * 1000)
+            if response.status_code != 200:
+                raise ValueError(f'GET {path} returned {response.status_code}.')
+
+    async def asgi_load(self, paths, durations):
+        await asyncio.gather(*[self.asgi_worker(paths, durations) for number in range(self.concurrency)])
+
+    def asgi(self, paths):
+        durations = []
+        paths = iter(itertools.islice(itertools.cycle(paths), self.requests))
+        start_time = perf_counter()
+        asyncio.run(self.asgi_load(paths, durations))
+        result = self.result(durations, perf_counter() - start_time)
+        # Connections of the executor threads are not reused by the next run
+        connections.close_all()
+        return result
+
+    def result(self, durations, duration):
+        return {
+                'requests': len(durations),
+                'throughput': round(len(durations) / duration, 2),
+                'p50_ms': round(percentile(durations, 50), 3),
+                'p90_ms': round(percentile(durations, 90), 3)}
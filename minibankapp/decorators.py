@@ -1,14 +1,41 @@
 # -*- coding: utf-8 -*-
 
-from time import time
+from time import perf_counter_ns
 from functools import wraps
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
 from .models import LogModel
+from .logsink import write_log
+from .histogram import latency_recorder
+
+
+class QueryCounterClass:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+        self.slowest_duration = 0
+        self.slowest_sql = ''
+
+    def __call__(self, execute, sql, params, many, context):
+        start_time = perf_counter_ns()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter_ns() - start_time
+            self.count += 1
+            self.duration += duration
+            if duration > self.slowest_duration:
+                self.slowest_duration = duration
+                self.slowest_sql = sql
 
 
 class ActivityMonitoringClass:
 
-    def __init__(self, show_data=True):
+    def __init__(self, show_data=True, capture_queries=True):
         self.show_data = show_data
+        self.capture_queries = capture_queries
 
     def __call__(self, original_function):
 
@@ -18,24 +45,39 @@ class ActivityMonitoringClass:
             data_log = f'{args}{kwargs}'
             if not self.show_data:
                 data_log = 'Data restricted'
-            start_time = time()
+            start_date = timezone.now()
+            start_time = perf_counter_ns()
             action = original_function.__name__
             function = f'{request.__class__.__name__} - {request.get_full_path()}'
-            result = original_function(request, *args, **kwargs)
+            query_counter = QueryCounterClass()
+            if self.capture_queries:
+                # Execute wrapper works without DEBUG, statements of the view only
+                with connection.execute_wrapper(query_counter):
+                    result = original_function(request, *args, **kwargs)
+            else:
+                result = original_function(request, *args, **kwargs)
             if result.status_code in [200, 201, 301, 302]:
-                end_time = time()
-                duration = round(end_time - start_time, 6)
+                duration_ns = perf_counter_ns() - start_time
+                duration = round(duration_ns / 10 ** 9, 6)
                 status_log = 'Success'
+                # Every decorated view method is called "post", histograms are kept per route
+                route = request.resolver_match.url_name if request.resolver_match else None
+                latency_recorder.record(route or action, duration_ns)
             else:
                 duration = 0
                 status_log = 'Failed'
             new_log = LogModel()
+            new_log.Date_log = start_date
             new_log.Action_log = action
             new_log.Function_log = function
             new_log.Duration_log = duration
             new_log.Data_log = data_log[:250]
             new_log.User_log = user_log
             new_log.Status_log = status_log
-            new_log.save()
+            new_log.Queries_log = query_counter.count
+            new_log.Db_time_log = round(query_counter.duration / 10 ** 9, 6)
+            new_log.Slowest_query_log = query_counter.slowest_sql[:250]
+            new_log.Alert_log = query_counter.count > getattr(settings, 'MINIBANK_QUERY_THRESHOLD', 50)
+            write_log(new_log)
             return result    
         return wrapper
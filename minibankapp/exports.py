@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+import os
+import csv
+import shutil
+import datetime
+import zipfile
+import tempfile
+from pathlib import Path
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import (Border, Side, PatternFill, Font)
+from openpyxl.utils import get_column_letter
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .models import (OperationModel, ExportJobModel)
+from .archive import (operation_history, last_operation_id)
+from .analytics import AnalyticsExportClass
+
+
+""" Pseudo buffer for csv writer """
+class EchoBuffer:
+
+    def write(self, value):
+        return value
+
+
+""" History export """
+class HistoryExportClass:
+
+    fields = [
+                'Id_operation',
+                'Type_operation',
+                'Value_operation',
+                'Balance_after_operation',
+                'Operation_date']
+    headers = [
+                'Id operation',
+                'Typ of operation',
+                'Value operation',
+                'Balance after operation',
+                'Operation date']
+    type_choice = dict(OperationModel.type_choice)
+
+    def __init__(self, account, chunk_size=2000, sample_size=200, last_id_operation=None, date_from=None, date_to=None, archived=False):
+        self.account = account
+        self.chunk_size = chunk_size
+        self.sample_size = sample_size
+        self.last_id_operation = last_id_operation
+        self.date_from = date_from
+        self.date_to = date_to
+        self.archived = archived
+
+    def get_queryset(self):
+        # Range of days served by the account and date index, of the archive too for older periods
+        queryset = operation_history(self.account, self.date_from, self.date_to, archived=self.archived)
+        # Background export is a snapshot up to the operation known when the job was requested
+        if self.last_id_operation is not None:
+            queryset = queryset.filter(Id_operation__lte=self.last_id_operation)
+        return queryset.order_by('-Operation_date').values_list(*self.fields)
+
+    def format_row(self, row):
+        row = list(row)
+        # Operation type as label, date without timezone
+        row[1] = self.type_choice.get(row[1], row[1])
+        if type(row[4]) is datetime.datetime:
+            row[4] = row[4].replace(tzinfo=None).strftime('%d.%m.%Y %H:%M:%S')
+        return row
+
+    def iterate_rows(self):
+        # Server side chunks keep memory flat whatever the length of the history
+        for row in self.get_queryset().iterator(chunk_size=self.chunk_size):
+            yield self.format_row(row)
+
+    def column_widths(self):
+        # Widths estimated from headers and a sample of the newest rows instead of every cell
+        widths = [len(header) for header in self.headers]
+        for row in self.get_queryset()[:self.sample_size]:
+            for column_number, cell_value in enumerate(self.format_row(row)):
+                widths[column_number] = max(widths[column_number], len(str(cell_value)))
+        return [(width + 2) * 1.1 for width in widths]
+
+    def csv_stream(self):
+        writer = csv.writer(EchoBuffer(), delimiter=';')
+        yield writer.writerow(self.headers)
+        for row in self.iterate_rows():
+            yield writer.writerow(row)
+
+    def xlsx_file(self):
+        side = Side(style='dashed', color='FF000000')
+        border_around = Border(left=side, right=side, top=side, bottom=side)
+        workbook = Workbook(write_only=True)
+        workbook.iso_dates = True
+        worksheet = workbook.create_sheet('Operations')
+        for column_number, width in enumerate(self.column_widths(), 1):
+            worksheet.column_dimensions[get_column_letter(column_number)].width = width
+        # Column headers
+        header_cells = []
+        for column_title in self.headers:
+            cell = WriteOnlyCell(worksheet, value=column_title)
+            cell.font = Font(bold=True, italic=True)
+            cell.fill = PatternFill(fgColor='0000FFFF', fill_type='solid')
+            cell.border = border_around
+            header_cells.append(cell)
+        worksheet.append(header_cells)
+        # Cell data - one styled cell per column, every appended row is written out at once
+        row_cells = []
+        for field_name in self.fields:
+            cell = WriteOnlyCell(worksheet)
+            cell.border = border_around
+            if field_name in ['Value_operation', 'Balance_after_operation']:
+                cell.number_format = '#,##0.00'
+            row_cells.append(cell)
+        for row in self.iterate_rows():
+            for cell, cell_value in zip(row_cells, row):
+                cell.value = cell_value
+            worksheet.append(row_cells)
+        export_file = tempfile.TemporaryFile()
+        workbook.save(export_file)
+        export_file.seek(0)
+        return export_file
+
+
+""" Background export jobs """
+class ExportJobClass:
+
+    def __init__(self):
+        self.directory = Path(getattr(settings, 'MINIBANK_EXPORT_DIR', Path(getattr(settings, 'BASE_DIR', '.')) / 'exports'))
+        self.max_age = getattr(settings, 'MINIBANK_EXPORT_MAX_AGE', 7 * 24 * 3600)
+        self.max_size = getattr(settings, 'MINIBANK_EXPORT_MAX_SIZE', 1024 ** 3)
+        self.timeout = getattr(settings, 'MINIBANK_EXPORT_TIMEOUT', 3600)
+
+    def get_path(self, job):
+        return self.directory / job.File_name
+
+    def started_before(self):
+        return timezone.now() - datetime.timedelta(seconds=self.timeout)
+
+    def reusable(self, job):
+        # Running job past the timeout belongs to a stopped worker, finished one needs its file
+        if job is None or job.Status_job == 'Pending':
+            return job is not None
+        if job.Status_job == 'Running':
+            return job.Started_date is not None and job.Started_date >= self.started_before()
+        return self.get_path(job).exists()
+
+    def request_export(self, account, file_format, employee):
+        last_id_operation = last_operation_id(account)
+        # Artifact is reused while no operation has been posted on the account since
+        job = (ExportJobModel.objects
+                            .filter(FK_Id_account=account, Format_job=file_format, Last_id_operation=last_id_operation)
+                            .exclude(Status_job='Failed')
+                            .order_by('-pk')
+                            .first())
+        if self.reusable(job):
+            return job
+        return ExportJobModel.objects.create(
+                                            FK_Id_account_id=account,
+                                            Format_job=file_format,
+                                            Last_id_operation=last_id_operation,
+                                            Created_employee=employee)
+
+    def request_analytics_export(self, employee):
+        # Incremental export of all accounts up to the operation known now, a queued or finished one is reused
+        last_id_operation = AnalyticsExportClass().upper_bound()
+        job = (ExportJobModel.objects
+                            .filter(FK_Id_account__isnull=True, Format_job='parquet', Last_id_operation=last_id_operation)
+                            .exclude(Status_job='Failed')
+                            .order_by('-pk')
+                            .first())
+        if self.reusable(job):
+            return job
+        return ExportJobModel.objects.create(
+                                            Format_job='parquet',
+                                            Last_id_operation=last_id_operation,
+                                            Created_employee=employee)
+
+    def download_name(self, job):
+        if job.Format_job == 'parquet':
+            return 'Analytics_operations.zip'
+        return f'History_operations.{job.Format_job}'
+
+    def write_analytics(self, job, export_file):
+        # Partition files written by the run, the analytics directory keeps the whole dataset
+        analytics_export = AnalyticsExportClass(last_id_operation=job.Last_id_operation)
+        files = analytics_export.run()
+        # Operations up to the bound went out with an earlier run, an empty zip would pass for a finished export
+        if not files:
+            raise RuntimeError(f'Operations up to {job.Last_id_operation} already exported to {analytics_export.directory}.')
+        with zipfile.ZipFile(export_file, 'w', compression=zipfile.ZIP_STORED) as archive_file:
+            for path in files:
+                archive_file.write(path, path.relative_to(analytics_export.directory).as_posix())
+
+    def fail_stale_jobs(self):
+        # Jobs of workers stopped while running are not taken again, the next request queues a new job
+        return (ExportJobModel.objects
+                            .filter(Q(Started_date__lt=self.started_before()) | Q(Started_date__isnull=True), Status_job='Running')
+                            .update(Status_job='Failed', Error_job='Export not finished within timeout.', Finished_date=timezone.now()))
+
+    def claim_job(self):
+        self.fail_stale_jobs()
+        # Conditional update lets several workers share the queue without taking the same job
+        for job in ExportJobModel.objects.filter(Status_job='Pending').order_by('pk')[:10]:
+            started_date = timezone.now()
+            if ExportJobModel.objects.filter(pk=job.pk, Status_job='Pending').update(Status_job='Running', Started_date=started_date):
+                job.Status_job = 'Running'
+                job.Started_date = started_date
+                return job
+        return None
+
+    def run_job(self, job):
+        if job.Format_job == 'parquet':
+            job.File_name = f'analytics_{job.Last_id_operation}_{job.pk}.zip'
+        else:
+            # Whole history of the account, archived operations included
+            history_export = HistoryExportClass(account=job.FK_Id_account_id, last_id_operation=job.Last_id_operation, archived=True)
+            job.File_name = f'history_{job.FK_Id_account_id}_{job.Last_id_operation}_{job.pk}.{job.Format_job}'
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.get_path(job).with_suffix('.tmp')
+        try:
+            if job.Format_job == 'parquet':
+                self.write_analytics(job, temporary_path)
+            elif job.Format_job == 'csv':
+                with open(temporary_path, 'w', encoding='utf-8', newline='') as export_file:
+                    export_file.writelines(history_export.csv_stream())
+            else:
+                with open(temporary_path, 'wb') as export_file, history_export.xlsx_file() as xlsx_file:
+                    shutil.copyfileobj(xlsx_file, export_file)
+            os.replace(temporary_path, self.get_path(job))
+            job.File_size = self.get_path(job).stat().st_size
+            job.Status_job = 'Done'
+        except Exception as error_description:
+            temporary_path.unlink(missing_ok=True)
+            job.Status_job = 'Failed'
+            job.Error_job = str(error_description)[:250]
+        job.Finished_date = timezone.now()
+        job.save()
+        return job
+
+    def evict(self):
+        # Artifacts older than max age go first, then the oldest ones until the directory fits max size
+        evicted = 0
+        jobs = list(ExportJobModel.objects.filter(Status_job='Done').order_by('Finished_date'))
+        total_size = sum(job.File_size for job in jobs)
+        oldest_date = timezone.now() - datetime.timedelta(seconds=self.max_age)
+        for job in jobs:
+            if job.Finished_date >= oldest_date and total_size <= self.max_size:
+                break
+            self.get_path(job).unlink(missing_ok=True)
+            total_size -= job.File_size
+            job.delete()
+            evicted += 1
+        return evicted
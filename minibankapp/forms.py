@@ -150,3 +150,40 @@ class CreateOperationForm(forms.ModelForm):
                     'Operation_date',
                     'Operation_employee',
                     'FK_Id_account']
+
+
+class BatchOperationForm(forms.Form):
+
+    format_choice = [
+                    ('csv', 'CSV (account, type, value)'),
+                    ('json', 'JSON lines')]
+
+    File_operation = forms.FileField(
+                                label='File',
+                                widget=forms.ClearableFileInput(
+                                attrs={"class": "form_widget"}))
+    Format_file = forms.ChoiceField(
+                                label='Format',
+                                choices=format_choice,
+                                widget=forms.Select(
+                                attrs={"class": "form_widget"}))
+
+
+class HistoryPeriodForm(forms.Form):
+
+    Date_from = forms.DateField(
+                                required=False,
+                                label='From',
+                                widget=forms.DateInput(
+                                attrs={"class": "form_widget", "type": "date"}))
+    Date_to = forms.DateField(
+                                required=False,
+                                label='To',
+                                widget=forms.DateInput(
+                                attrs={"class": "form_widget", "type": "date"}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('Date_from') and cleaned_data.get('Date_to') and cleaned_data['Date_from'] > cleaned_data['Date_to']:
+            raise forms.ValidationError('Date from should not be later than date to.')
+        return cleaned_data
@@ -1,17 +1,274 @@
 # -*- coding: utf-8 -*-
 
-from django.views.generic import ListView
+import re
+import json
+import math
+import base64
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import (ValidationError, ImproperlyConfigured, PermissionDenied)
+from django.core.paginator import (Paginator, Page, InvalidPage)
+from django.http import Http404
+from django.shortcuts import render
+from django.views.generic import (View, ListView)
+from django.db.models import (Q, Exists, QuerySet)
 from .models import CustomerModel
+from .archive import ArchiveChainClass
+from .search import search_customers
+
+
+def prefix_range(field, prefix):
+    # Prefix as a range, any B-tree index serves it whatever LIKE flavour the backend uses
+    if not prefix or ord(prefix[-1]) >= 0x10FFFF:
+        return Q(**{f'{field}__startswith': prefix})
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix[:-1] + chr(ord(prefix[-1]) + 1)})
+
+
+class CustomerSearchMixin:
 
-class SelectCustomerListView(ListView):
-    
     def get_queryset_customer(self, criteria):
-        criterias = self.request.GET.get(criteria)
-        Pesel_results = CustomerModel.objects.filter(Pesel__startswith=criterias).order_by('-pk')
-        Identification_results = CustomerModel.objects.filter(Identification__istartswith=criterias).order_by('-pk')
-        if Pesel_results.exists():
-            return Pesel_results
-        elif Identification_results.exists():
-            return Identification_results
+        criterias = self.request.GET.get(criteria).strip()
+        # Anything else than a PESEL or Identification prefix (series letters and digits) is a fuzzy search on name and address
+        if not re.fullmatch(r'[0-9]+|[A-Za-z]{1,3}[0-9]+', criterias):
+            # Ranked list of at most 100 customers, paginated like a queryset
+            customer_ids = search_customers(criterias)
+            customers = CustomerModel.objects.in_bulk(customer_ids)
+            return [customers[customer_id] for customer_id in customer_ids if customer_id in customers]
+        # Identification is stored upper-cased (CustomerModel.save)
+        identification_match = prefix_range('Identification', criterias.upper())
+        if not criterias.isdigit():
+            # PESEL has digits only
+            return CustomerModel.objects.filter(identification_match).order_by('-pk')
+        # PESEL match wins over identification match, decided inside one query
+        pesel_match = prefix_range('Pesel', criterias)
+        return (CustomerModel.objects
+                            .filter(pesel_match | (identification_match & ~Exists(CustomerModel.objects.filter(pesel_match))))
+                            .order_by('-pk'))
+
+
+class SelectCustomerListView(CustomerSearchMixin, ListView):
+    pass
+
+
+""" Keyset pagination """
+class KeysetPaginatorClass:
+
+    def __init__(self, count, per_page, exact=True):
+        self.count = count
+        self.per_page = per_page
+        self.exact = exact
+
+    @property
+    def num_pages(self):
+        # Estimated count is shown as lower bound, no count at all as unknown number of pages
+        if self.count is None:
+            return None
+        num_pages = max(math.ceil(self.count / self.per_page), 1)
+        return num_pages if self.exact else f'{num_pages}+'
+
+
+class KeysetPageClass:
+
+    def __init__(self, object_list, number, paginator, previous_cursor=None, next_cursor=None):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self.previous_cursor = previous_cursor
+        self.next_cursor = next_cursor
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+class KeysetPaginationMixin:
+    # Ordering fields of the view, the last one has to be unique
+    keyset_ordering = ['-pk']
+
+    def encode_cursor(self, row, number, direction):
+        # Rows are model instances or dictionaries of values()
+        values = [row[field_name.lstrip('-')] if isinstance(row, dict) else getattr(row, field_name.lstrip('-')) for field_name in self.keyset_ordering]
+        # Dates with microseconds, a rounded value would skip or repeat rows
+        cursor = json.dumps({'v': values, 'n': number, 'd': direction}, default=lambda value: value.isoformat())
+        return base64.urlsafe_b64encode(cursor.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, queryset, cursor):
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            values = []
+            for field_name, value in zip(self.keyset_ordering, cursor['v'], strict=True):
+                field_name = field_name.lstrip('-')
+                field = queryset.model._meta.pk if field_name == 'pk' else queryset.model._meta.get_field(field_name)
+                values.append(field.to_python(value))
+            return values, int(cursor['n']), cursor['d']
+        except (ValueError, TypeError, KeyError, ValidationError):
+            raise Http404('Invalid cursor.')
+
+    def seek(self, values, backwards):
+        # Rows after the cursor in (reversed) ordering: (a < x) or (a = x and b < y) ...
+        condition = Q()
+        for number, field_name in enumerate(self.keyset_ordering):
+            descending = field_name.startswith('-') != backwards
+            lookup = f'{field_name.lstrip("-")}__{"lt" if descending else "gt"}'
+            equal = {field.lstrip('-'): value for field, value in zip(self.keyset_ordering[:number], values)}
+            condition |= Q(**equal, **{lookup: values[number]})
+        return condition
+
+    def count_limit(self):
+        # Count stops at MINIBANK_PAGINATION_COUNT_LIMIT rows, 0 switches it off
+        return getattr(settings, 'MINIBANK_PAGINATION_COUNT_LIMIT', 10000)
+
+    def count_rows(self, queryset, page_size):
+        limit = self.count_limit()
+        if not limit:
+            return KeysetPaginatorClass(None, page_size)
+        count = queryset.order_by()[:limit].count()
+        return KeysetPaginatorClass(count, page_size, exact=count < limit)
+
+    def keyset_slice(self, queryset, page_size):
+        # Rows of the requested page plus one telling whether another page follows
+        cursor = self.request.GET.get('cursor')
+        number, backwards = 1, False
+        if cursor:
+            values, number, direction = self.decode_cursor(queryset, cursor)
+            backwards = direction == 'p'
+            queryset = queryset.filter(self.seek(values, backwards))
+        ordering = self.keyset_ordering
+        if backwards:
+            ordering = [field_name[1:] if field_name.startswith('-') else f'-{field_name}' for field_name in ordering]
+        return queryset.order_by(*ordering)[:page_size + 1], number, cursor, backwards
+
+    def keyset_page(self, rows, paginator, page_size, number, cursor, backwards):
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+        page = KeysetPageClass(rows, number, paginator)
+        if rows and (more if backwards else cursor):
+            page.previous_cursor = self.encode_cursor(rows[0], number - 1, 'p')
+        if rows and (cursor if backwards else more):
+            page.next_cursor = self.encode_cursor(rows[-1], number + 1, 'n')
+        return (page.paginator, page, page.object_list, page.has_other_pages())
+
+    def paginate_queryset(self, queryset, page_size):
+        # Ranked search results are short, they keep page numbers
+        if not isinstance(queryset, (QuerySet, ArchiveChainClass)) or self.request.GET.get('criteria'):
+            return super().paginate_queryset(queryset, page_size)
+        paginator = self.count_rows(queryset, page_size)
+        rows, number, cursor, backwards = self.keyset_slice(queryset, page_size)
+        return self.keyset_page(list(rows), paginator, page_size, number, cursor, backwards)
+
+    def page_query(self, **parameters):
+        query = self.request.GET.copy()
+        query.pop('page', None)
+        query.pop('cursor', None)
+        query.update(parameters)
+        return query.urlencode()
+
+    def page_links(self, context):
+        page = context.get('page_obj')
+        if isinstance(page, KeysetPageClass):
+            context['previous_query'] = self.page_query(cursor=page.previous_cursor) if page.has_previous() else ''
+            context['next_query'] = self.page_query(cursor=page.next_cursor) if page.has_next() else ''
+        elif page is not None:
+            context['previous_query'] = self.page_query(page=page.previous_page_number()) if page.has_previous() else ''
+            context['next_query'] = self.page_query(page=page.next_page_number()) if page.has_next() else ''
+        return context
+
+    def get_context_data(self, **kwargs):
+        return self.page_links(super().get_context_data(**kwargs))
+
+
+""" Async views """
+class AsyncLoginRequiredMixin:
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Lazy request.user would query the database from the event loop
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        # Templates check perms.minibankapp.extended_role, the permission cache is filled before rendering
+        if not user.is_superuser:
+            await sync_to_async(user.get_all_permissions)()
+        # Same check as PermissionRequiredMixin of the sync views, a signed-in user without the permission gets 403
+        permission_required = getattr(self, 'permission_required', None)
+        if permission_required and not await sync_to_async(user.has_perm)(permission_required):
+            raise PermissionDenied
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncListView(AsyncLoginRequiredMixin, View):
+    # Rows are read with the async ORM, the template renders loaded objects only
+    template_name = None
+    paginate_by = None
+
+    def get_queryset(self):
+        raise ImproperlyConfigured(f'{self.__class__.__name__} is missing get_queryset().')
+
+    async def aget_queryset(self):
+        return self.get_queryset()
+
+    async def apaginate_queryset(self, queryset, page_size):
+        paginator = Paginator(queryset, page_size)
+        # Count read asynchronously, the paginator keeps it as its cached property
+        paginator.count = await queryset.acount() if isinstance(queryset, QuerySet) else len(queryset)
+        try:
+            number = paginator.validate_number(self.request.GET.get('page') or 1)
+        except InvalidPage as error_message:
+            raise Http404(str(error_message))
+        bottom = (number - 1) * page_size
+        rows = queryset[bottom:bottom + page_size]
+        page = Page([row async for row in rows] if isinstance(rows, QuerySet) else rows, number, paginator)
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    async def get_context_data(self, **kwargs):
+        queryset = await self.aget_queryset()
+        context = {'view': self, 'paginator': None, 'page_obj': None, 'is_paginated': False}
+        if self.paginate_by:
+            paginator, page, object_list, is_paginated = await self.apaginate_queryset(queryset, self.paginate_by)
+            context.update(paginator=paginator, page_obj=page, is_paginated=is_paginated)
         else:
-            return CustomerModel.objects.none()
+            object_list = [row async for row in queryset] if isinstance(queryset, QuerySet) else list(queryset)
+        context['object_list'] = object_list
+        context.update(kwargs)
+        return context
+
+    async def get(self, request, *args, **kwargs):
+        return render(request, self.template_name, await self.get_context_data())
+
+
+class AsyncKeysetPaginationMixin(KeysetPaginationMixin):
+
+    async def acount_rows(self, queryset, page_size):
+        limit = self.count_limit()
+        if not limit:
+            return KeysetPaginatorClass(None, page_size)
+        count = await queryset.order_by()[:limit].acount()
+        return KeysetPaginatorClass(count, page_size, exact=count < limit)
+
+    async def apaginate_queryset(self, queryset, page_size):
+        if not isinstance(queryset, (QuerySet, ArchiveChainClass)) or self.request.GET.get('criteria'):
+            return await super().apaginate_queryset(queryset, page_size)
+        paginator = await self.acount_rows(queryset, page_size)
+        rows, number, cursor, backwards = self.keyset_slice(queryset, page_size)
+        return self.keyset_page([row async for row in rows], paginator, page_size, number, cursor, backwards)
+
+    async def get_context_data(self, **kwargs):
+        # Sync get_context_data of KeysetPaginationMixin is skipped, the async view builds the context
+        return self.page_links(await super(KeysetPaginationMixin, self).get_context_data(**kwargs))
+
+
+class AsyncSelectCustomerListView(CustomerSearchMixin, AsyncListView):
+
+    async def aget_queryset(self):
+        if self.request.GET.get('criteria'):
+            # Fuzzy search runs several statements in sync code
+            return await sync_to_async(self.get_queryset_customer)('criteria')
+        return CustomerModel.objects.filter().order_by('-pk')
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import json
+import atexit
+import logging
+import datetime
+import threading
+from time import monotonic
+from django.conf import settings
+from django.utils import timezone
+from .models import LogRollupModel
+
+
+logger = logging.getLogger(__name__)
+
+""" Latency histogram """
+class LatencyHistogramClass:
+
+    # 32 sub-buckets per power of two, relative error of a bucket below ~3%
+    sub_bucket_bits = 5
+
+    def __init__(self, buckets=None, count=0, total=0, maximum=0):
+        self.buckets = buckets or {}
+        self.count = count
+        self.total = total
+        self.maximum = maximum
+
+    @classmethod
+    def bucket_index(cls, value):
+        shift = value.bit_length() - cls.sub_bucket_bits - 1
+        if shift <= 0:
+            return value
+        return (shift << cls.sub_bucket_bits) + (value >> shift)
+
+    @classmethod
+    def bucket_value(cls, index):
+        # Middle of the range covered by the bucket
+        if index < 2 << cls.sub_bucket_bits:
+            return index
+        shift = (index >> cls.sub_bucket_bits) - 1
+        mantissa = index - (shift << cls.sub_bucket_bits)
+        return (mantissa << shift) + (1 << shift) // 2
+
+    def record(self, value):
+        index = self.bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, percent):
+        if not self.count:
+            return 0
+        rank = max(percent / 100 * self.count, 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.bucket_value(index), self.maximum)
+        return self.maximum
+
+    def dumps(self):
+        return json.dumps(self.buckets)
+
+    @classmethod
+    def loads(cls, buckets, count, total, maximum):
+        return cls({int(index): value for index, value in json.loads(buckets).items()}, count, total, maximum)
+
+
+""" Per action and minute histograms persisted as rollups """
+class LatencyRecorderClass:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.minute = None
+        self.last_persist = monotonic()
+        atexit.register(self.persist)
+
+    def record(self, action, duration_ns):
+        minute = timezone.now().replace(second=0, microsecond=0)
+        with self.lock:
+            histogram = self.histograms.setdefault((action, minute), LatencyHistogramClass())
+            histogram.record(duration_ns // 1000)
+            due = self.minute != minute or monotonic() - self.last_persist >= getattr(settings, 'MINIBANK_ROLLUP_INTERVAL', 60)
+            self.minute = minute
+        if due:
+            self.persist()
+
+    def pending(self, date_from):
+        # Copies of histograms not persisted yet, a quiet action is shown before its next request
+        with self.lock:
+            histograms = [(action, LatencyHistogramClass(dict(histogram.buckets), histogram.count, histogram.total, histogram.maximum))
+                          for (action, minute), histogram in self.histograms.items() if minute >= date_from]
+        return histograms
+
+    def persist(self):
+        # Every call writes the delta since the previous one, rows of one minute are merged when read
+        with self.lock:
+            histograms, self.histograms = self.histograms, {}
+            self.last_persist = monotonic()
+        if not histograms:
+            return
+        try:
+            LogRollupModel.objects.bulk_create([
+                                                LogRollupModel(
+                                                            Action_rollup=action,
+                                                            Minute_rollup=minute,
+                                                            Count_rollup=histogram.count,
+                                                            Sum_rollup=histogram.total,
+                                                            Max_rollup=histogram.maximum,
+                                                            Buckets_rollup=histogram.dumps())
+                                                for (action, minute), histogram in histograms.items()])
+        except Exception:
+            # Also runs at exit, when the database may be gone, the rollups are lost instead of failing the request or the shutdown
+            logger.exception('Latency rollups of %s minutes not saved.', len(histograms))
+
+
+latency_recorder = LatencyRecorderClass()
+
+
+def latency_statistics(minutes, recorder=latency_recorder):
+    # Percentiles (in seconds) and throughput per action computed from rollups of the last minutes and histograms of the recorder
+    date_from = timezone.now().replace(second=0, microsecond=0) - datetime.timedelta(minutes=minutes - 1)
+    histograms = {}
+    rows = (LogRollupModel.objects
+                        .filter(Minute_rollup__gte=date_from)
+                        .values_list('Action_rollup', 'Buckets_rollup', 'Count_rollup', 'Sum_rollup', 'Max_rollup'))
+    for action, buckets, count, total, maximum in rows.iterator():
+        histogram = histograms.setdefault(action, LatencyHistogramClass())
+        histogram.merge(LatencyHistogramClass.loads(buckets, count, total, maximum))
+    for action, pending_histogram in recorder.pending(date_from):
+        histograms.setdefault(action, LatencyHistogramClass()).merge(pending_histogram)
+    statistics = []
+    for action, histogram in sorted(histograms.items()):
+        statistics.append({
+                            'action': action,
+                            'count': histogram.count,
+                            'p50': histogram.percentile(50) / 10 ** 6,
+                            'p90': histogram.percentile(90) / 10 ** 6,
+                            'p99': histogram.percentile(99) / 10 ** 6,
+                            'max': histogram.maximum / 10 ** 6,
+                            'throughput': round(histogram.count / minutes, 2)})
+    return statistics
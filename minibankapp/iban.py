@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+from time import perf_counter
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .models import AccountModel
+from .reference import reference_data
+from .validators import validator_number_iban
+
+
+def build_iban(account, customer, subaccount):
+    parameter = reference_data.parameter()
+    customer = str(customer)
+    account = str(account)
+    prefix_zero = ''
+    while len(customer) + len(account) + len(prefix_zero) < 12:
+        prefix_zero = prefix_zero + '0'
+    return parameter['Country_code'] + parameter['Bank_number'] + subaccount + account + prefix_zero + customer
+
+
+""" Bulk IBAN generation """
+class IbanGeneratorClass:
+
+    def __init__(self, chunk_size=2000):
+        self.chunk_size = chunk_size
+        self.generated = 0
+        self.rejected = []
+        self.duration = 0
+
+    def get_queryset(self, queryset=None):
+        if queryset is None:
+            queryset = AccountModel.objects.all()
+        return (queryset
+                            .filter(Number_IBAN='')
+                            .only('Id_account', 'FK_Id_customer', 'FK_Id_account_type')
+                            .order_by('Id_account'))
+
+    def generate_chunk(self, accounts):
+        updated = []
+        for account in accounts:
+            account.Number_IBAN = build_iban(
+                                            account.Id_account,
+                                            account.FK_Id_customer_id,
+                                            reference_data.account_type(account.FK_Id_account_type_id)['Subaccount'])
+            try:
+                validator_number_iban(account.Number_IBAN)
+            except ValidationError as error_message:
+                self.rejected.append((account.Id_account, error_message.messages[0]))
+                continue
+            updated.append(account)
+        with transaction.atomic():
+            AccountModel.objects.bulk_update(updated, ['Number_IBAN'])
+        self.generated += len(updated)
+
+    def run(self, queryset=None):
+        # Accounts are read in primary key chunks, an updated account leaves the filter but not the position
+        start_time = perf_counter()
+        queryset = self.get_queryset(queryset)
+        last_id_account = 0
+        while True:
+            accounts = list(queryset.filter(Id_account__gt=last_id_account)[:self.chunk_size])
+            if not accounts:
+                break
+            self.generate_chunk(accounts)
+            last_id_account = accounts[-1].Id_account
+        self.duration = perf_counter() - start_time
+        return self.generated
+
+    @property
+    def throughput(self):
+        if not self.duration:
+            return 0
+        return round((self.generated + len(self.rejected)) / self.duration, 2)
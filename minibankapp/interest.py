@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import django
+from django.apps import apps
+from django.db import (transaction, connection, connections)
+from django.db.models import (Max, Sum)
+from django.utils import timezone
+from .models import (AccountModel, OperationModel, InterestRunModel, InterestPartitionModel)
+from .snapshots import apply_operations
+
+
+def current_period():
+    return timezone.localdate().strftime('%Y-%m')
+
+
+def get_process_context():
+    # Forked workers inherit the configured (also test) database settings
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context('spawn')
+
+
+def init_worker():
+    if not apps.ready:
+        django.setup()
+    # Every worker opens its own connection instead of reusing the parent's socket
+    connections.close_all()
+
+
+def count_partition(partition_pk, employee, batch_size):
+    interest_counting = InterestCountingClass(employee=employee, batch_size=batch_size)
+    return interest_counting.run_partition(partition_pk)
+
+
+""" Bulk interest counting """
+class InterestCountingClass:
+
+    def __init__(self, employee, batch_size=2000):
+        self.employee = str(employee)
+        self.batch_size = batch_size
+        self.counter = 0
+        self.duration = 0
+
+    def get_queryset(self):
+        return (AccountModel.objects
+                            .filter(Balance__gt=0, Percent__gt=0)
+                            .only('Id_account', 'Balance', 'Debit', 'Percent')
+                            .order_by('Id_account'))
+
+    def count_batch(self, accounts):
+        operations = []
+        for instance in accounts:
+            interest = round(instance.Balance * (instance.Percent / 100), 2)
+            instance.Balance = instance.Balance + interest
+            instance.Free_balance = instance.Balance + instance.Debit
+            operations.append(OperationModel(
+                                            Type_operation = 3,
+                                            Value_operation = interest,
+                                            Balance_after_operation = instance.Balance,
+                                            Operation_employee = self.employee,
+                                            FK_Id_account = instance))
+        # One UPDATE ... CASE for balances and one multi-row INSERT for operations
+        AccountModel.objects.bulk_update(accounts, ['Balance', 'Free_balance'])
+        OperationModel.objects.bulk_create(operations)
+        apply_operations(operations)
+        return len(accounts)
+
+    def count_chunk(self, partition_pk):
+        # Chunk and checkpoint are committed together, so a chunk is either fully applied or not at all
+        with transaction.atomic():
+            partition = InterestPartitionModel.objects.select_for_update().get(pk=partition_pk)
+            if partition.Status_partition == 'Done':
+                return None
+            # Accounts of the batch are locked in primary key order, postings of tellers wait instead of being overwritten
+            queryset = self.get_queryset().select_for_update().filter(Id_account__gt=partition.Last_id_account)
+            if partition.Range_to is not None:
+                queryset = queryset.filter(Id_account__lte=partition.Range_to)
+            batch = list(queryset[:self.batch_size])
+            if batch:
+                counter = self.count_batch(batch)
+                partition.Last_id_account = batch[-1].Id_account
+                partition.Counter = partition.Counter + counter
+                partition.Status_partition = 'Running'
+            else:
+                counter = None
+                partition.Status_partition = 'Done'
+            partition.save()
+            return counter
+
+    def run_partition(self, partition_pk):
+        counter = 0
+        while True:
+            chunk_counter = self.count_chunk(partition_pk)
+            if chunk_counter is None:
+                break
+            counter += chunk_counter
+        return counter
+
+    def create_partitions(self, run, workers):
+        # Ranges are fixed when the run starts, a resumed run keeps them whatever the worker count
+        with transaction.atomic():
+            InterestRunModel.objects.select_for_update().get(pk=run.pk)
+            if not InterestPartitionModel.objects.filter(FK_Id_run=run).exists():
+                max_id = AccountModel.objects.aggregate(max_id=Max('Id_account'))['max_id'] or 0
+                step = max(max_id // workers, 1)
+                partitions = []
+                for number in range(workers):
+                    range_from = number * step
+                    range_to = None if number == workers - 1 else range_from + step
+                    partitions.append(InterestPartitionModel(
+                                                            Range_from = range_from,
+                                                            Range_to = range_to,
+                                                            Last_id_account = range_from,
+                                                            FK_Id_run = run))
+                InterestPartitionModel.objects.bulk_create(partitions)
+        return list(InterestPartitionModel.objects.filter(FK_Id_run=run).order_by('Range_from'))
+
+    def supports_parallel(self):
+        # Backends without row locks (SQLite) allow a single writer, their partitions are counted one by one
+        return connection.features.has_select_for_update
+
+    def run(self, run, workers=1):
+        start_time = perf_counter()
+        InterestRunModel.objects.filter(pk=run.pk).update(Status_run='Running')
+        partitions = [partition.pk for partition in self.create_partitions(run, workers) if partition.Status_partition != 'Done']
+        if workers > 1 and len(partitions) > 1 and self.supports_parallel():
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_process_context(), initializer=init_worker) as executor:
+                futures = [executor.submit(count_partition, partition_pk, self.employee, self.batch_size) for partition_pk in partitions]
+                # Merging per worker counters
+                self.counter += sum(future.result() for future in futures)
+        else:
+            for partition_pk in partitions:
+                self.counter += self.run_partition(partition_pk)
+        self.duration = perf_counter() - start_time
+        run.Counter = InterestPartitionModel.objects.filter(FK_Id_run=run).aggregate(counter=Sum('Counter'))['counter'] or 0
+        run.Status_run = 'Done'
+        run.Finished_date = timezone.now()
+        run.save()
+        return run
+
+    @property
+    def throughput(self):
+        if not self.duration:
+            return 0
+        return round(self.counter / self.duration, 2)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from time import perf_counter
+from django.db import (transaction, connection, connections)
+from django.db.models import (Sum, Max, Min)
+from .models import (AccountModel, OperationModel, OperationArchiveModel)
+from .interest import (get_process_context, init_worker)
+
+
+def check_range(range_from, range_to, chunk_size, apply):
+    return LedgerCheckClass(chunk_size=chunk_size, apply=apply).check_range(range_from, range_to)
+
+
+""" Ledger consistency check """
+class LedgerCheckClass:
+
+    def __init__(self, chunk_size=5000, apply=False):
+        self.chunk_size = chunk_size
+        self.apply = apply
+        self.checked = 0
+        self.drifts = []
+        self.repaired = 0
+        self.duration = 0
+
+    def operation_sums(self, account_filter):
+        # One grouped pass over the operations of the chunk in the live table and the archive, SQLite sums are rounded back to cents
+        sums = {}
+        for model in [OperationModel, OperationArchiveModel]:
+            rows = (model.objects
+                        .filter(**account_filter)
+                        .values('FK_Id_account')
+                        .annotate(total=Sum('Value_operation'), last_id_operation=Max('Id_operation'))
+                        .order_by())
+            for row in rows:
+                total, last_id_operation, last_model = sums.get(row['FK_Id_account'], (Decimal('0.00'), 0, None))
+                if row['last_id_operation'] > last_id_operation:
+                    last_id_operation, last_model = row['last_id_operation'], model
+                sums[row['FK_Id_account']] = (total + Decimal(row['total']).quantize(Decimal('0.01')), last_id_operation, last_model)
+        last_balances = {}
+        for model in [OperationModel, OperationArchiveModel]:
+            last_ids = [last_id_operation for total, last_id_operation, last_model in sums.values() if last_model is model]
+            if last_ids:
+                last_balances.update(model.objects.filter(pk__in=last_ids).values_list('FK_Id_account', 'Balance_after_operation'))
+        return {account_id: (total, last_balances.get(account_id)) for account_id, (total, last_id_operation, last_model) in sums.items()}
+
+    def find_drifts(self, accounts, sums):
+        # (account, kind, stored value, expected value)
+        drifts = []
+        for account_id, balance, debit, free_balance in accounts:
+            total, last_balance = sums.get(account_id, (Decimal('0.00'), None))
+            if last_balance is not None and last_balance != total:
+                drifts.append((account_id, 'Operations', last_balance, total))
+            if balance != total:
+                drifts.append((account_id, 'Balance', balance, total))
+            if free_balance != total + debit:
+                drifts.append((account_id, 'Free_balance', free_balance, total + debit))
+        return drifts
+
+    def recheck(self, account_ids):
+        # Accounts are locked and summed again, postings between the unlocked reads are not reported as drift
+        with transaction.atomic():
+            accounts = list(AccountModel.objects
+                                        .select_for_update()
+                                        .only('Id_account', 'Balance', 'Debit', 'Free_balance')
+                                        .filter(pk__in=account_ids)
+                                        .order_by('pk'))
+            sums = self.operation_sums({'FK_Id_account__in': account_ids})
+            drifts = self.find_drifts([(account.pk, account.Balance, account.Debit, account.Free_balance) for account in accounts], sums)
+            # Drift of the operation log itself is reported only
+            repairable = {account_id for account_id, kind, stored, expected in drifts if kind != 'Operations'}
+            accounts = [account for account in accounts if account.pk in repairable]
+            if self.apply and accounts:
+                for account in accounts:
+                    account.Balance = sums.get(account.pk, (Decimal('0.00'), None))[0]
+                    account.Free_balance = account.Balance + account.Debit
+                AccountModel.objects.bulk_update(accounts, ['Balance', 'Free_balance'])
+                self.repaired += len(accounts)
+        return drifts
+
+    def check_chunk(self, range_from, range_to):
+        # Unlocked pass over the chunk, accounts which look drifted are confirmed under lock
+        accounts = list(AccountModel.objects
+                                    .filter(Id_account__gte=range_from, Id_account__lt=range_to)
+                                    .values_list('Id_account', 'Balance', 'Debit', 'Free_balance'))
+        sums = self.operation_sums({'FK_Id_account__gte': range_from, 'FK_Id_account__lt': range_to})
+        drifted = sorted({account_id for account_id, kind, stored, expected in self.find_drifts(accounts, sums)})
+        self.checked += len(accounts)
+        if drifted:
+            self.drifts.extend(self.recheck(drifted))
+
+    def check_range(self, range_from, range_to):
+        for chunk_from in range(range_from, range_to, self.chunk_size):
+            self.check_chunk(chunk_from, min(chunk_from + self.chunk_size, range_to))
+        return self.checked, self.drifts, self.repaired
+
+    def run(self, workers=1):
+        start_time = perf_counter()
+        limits = AccountModel.objects.aggregate(min_id=Min('Id_account'), max_id=Max('Id_account'))
+        if limits['min_id'] is not None:
+            range_from, range_to = limits['min_id'], limits['max_id'] + 1
+            # Backends without row locks allow a single writer, repairs run in one process there
+            if workers > 1 and (not self.apply or connection.features.has_select_for_update):
+                step = max(self.chunk_size, (range_to - range_from) // (workers * 4) + 1)
+                ranges = [(number, min(number + step, range_to)) for number in range(range_from, range_to, step)]
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=workers, mp_context=get_process_context(), initializer=init_worker) as executor:
+                    futures = [executor.submit(check_range, range_start, range_end, self.chunk_size, self.apply) for range_start, range_end in ranges]
+                    for future in futures:
+                        checked, drifts, repaired = future.result()
+                        self.checked += checked
+                        self.drifts.extend(drifts)
+                        self.repaired += repaired
+            else:
+                self.check_range(range_from, range_to)
+        self.duration = perf_counter() - start_time
+        return self.drifts
+
+    @property
+    def throughput(self):
+        if not self.duration:
+            return 0
+        return round(self.checked / self.duration, 2)
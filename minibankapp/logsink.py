@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import os
+import queue
+import atexit
+import logging
+import threading
+from time import monotonic
+from django.conf import settings
+from django.db import (connection, close_old_connections)
+from .models import LogModel
+
+
+logger = logging.getLogger(__name__)
+
+
+""" Buffered sink for activity logs """
+class LogBufferClass:
+
+    overflow_choice = ['block', 'drop', 'sync']
+
+    def __init__(self, batch_size=100, flush_interval=500, queue_size=10000, overflow='block'):
+        if overflow not in self.overflow_choice:
+            raise ValueError(f'Overflow policy should be one of {self.overflow_choice}.')
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval / 1000
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.dropped = 0
+        self.reported = 0
+        self.lock = threading.Lock()
+        self.pid = None
+        self.thread = None
+        self.records = None
+        self.stop_event = None
+        atexit.register(self.stop)
+
+    def start(self):
+        # Started lazily, also again in a forked worker which does not inherit the thread
+        with self.lock:
+            if self.is_running():
+                return
+            self.pid = os.getpid()
+            self.records = queue.Queue(maxsize=self.queue_size)
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(target=self.run, name='minibank-log-buffer', daemon=True)
+            self.thread.start()
+
+    def is_running(self):
+        return self.thread is not None and self.pid == os.getpid() and self.thread.is_alive()
+
+    def write(self, record):
+        if not self.is_running():
+            self.start()
+        if self.overflow == 'block':
+            self.records.put(record)
+            return
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            if self.overflow == 'sync':
+                record.save()
+            else:
+                self.dropped += 1
+
+    def take_batch(self):
+        batch = []
+        deadline = monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.records.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def save_batch(self, batch):
+        if not batch:
+            return
+        try:
+            LogModel.objects.bulk_create(batch)
+        except Exception:
+            logger.exception('%s activity log record(s) could not be saved.', len(batch))
+
+    def report_dropped(self):
+        # Records dropped since the previous report, the total stays in dropped
+        dropped = self.dropped
+        if dropped > self.reported:
+            logger.warning('%s activity log record(s) dropped, the queue of %s records was full.', dropped - self.reported, self.queue_size)
+            self.reported = dropped
+
+    def run(self):
+        while not self.stop_event.is_set():
+            batch = self.take_batch()
+            # Connection of the thread only, flush of the stopping process may run inside a transaction
+            if batch:
+                close_old_connections()
+            self.save_batch(batch)
+            self.report_dropped()
+        connection.close()
+
+    def flush(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.records.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) == self.batch_size:
+                self.save_batch(batch)
+                batch = []
+        self.save_batch(batch)
+        self.report_dropped()
+
+    def stop(self):
+        if self.thread is None or self.pid != os.getpid():
+            return
+        self.stop_event.set()
+        self.thread.join()
+        # Records left after the last batch of the thread
+        self.flush()
+
+
+log_buffer = None
+log_buffer_lock = threading.Lock()
+
+
+def get_log_buffer():
+    global log_buffer
+    with log_buffer_lock:
+        if log_buffer is None:
+            log_buffer = LogBufferClass(
+                                    batch_size=getattr(settings, 'MINIBANK_LOG_BATCH_SIZE', 100),
+                                    flush_interval=getattr(settings, 'MINIBANK_LOG_FLUSH_MS', 500),
+                                    queue_size=getattr(settings, 'MINIBANK_LOG_QUEUE_SIZE', 10000),
+                                    overflow=getattr(settings, 'MINIBANK_LOG_OVERFLOW', 'block'))
+    return log_buffer
+
+
+def write_log(record):
+    # Synchronous save unless MINIBANK_LOG_BUFFERED is switched on
+    if getattr(settings, 'MINIBANK_LOG_BUFFERED', False):
+        get_log_buffer().write(record)
+    else:
+        record.save()
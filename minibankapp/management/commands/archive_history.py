@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import (BaseCommand, CommandError)
+from minibankapp.archive import ArchivalClass
+
+
+class Command(BaseCommand):
+    help = 'Moves operations and logs older than the horizon into the archive tables, one month at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Operations horizon in days, by default MINIBANK_ARCHIVE_DAYS (730).')
+        parser.add_argument('--log-days', type=int, help='Logs horizon in days, by default MINIBANK_LOG_ARCHIVE_DAYS (90).')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows moved per transaction.')
+        parser.add_argument('--skip-logs', action='store_true', help='Archive operations only.')
+
+    def handle(self, *args, **options):
+        if any(options[name] is not None and options[name] < 0 for name in ['days', 'log_days']):
+            raise CommandError('Horizon should not be negative.')
+        if options['chunk_size'] < 1:
+            raise CommandError('Chunk size should be positive.')
+        archival = ArchivalClass(days=options['days'], log_days=options['log_days'], chunk_size=options['chunk_size'])
+        partitions = archival.run(logs=not options['skip_logs'])
+        for table_name, period, counter in partitions:
+            self.stdout.write(f'{table_name.capitalize():<12} {period} {counter:>12}')
+        self.stdout.write(f'{archival.moved} row(s) archived in {archival.duration:.2f} s ({archival.throughput} rows/s).')
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import (BaseCommand, CommandError)
+from django.test import Client
+from django.urls import reverse
+from minibankapp.models import (CustomerModel, AccountModel)
+from minibankapp.benchmark import (benchmark_database, async_views, HandlerLoadClass)
+from minibankapp.seed import BankSeederClass
+
+
+class Command(BaseCommand):
+    help = 'Compares concurrent throughput of the read routes served by the WSGI handler (sync views) and the ASGI handler (async views) on a seeded test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=5000, help='Number of seeded customers.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per route, mode and concurrency.')
+        parser.add_argument('--concurrency', default='1,8,32', help='Comma separated numbers of concurrent clients.')
+        parser.add_argument('--logs', type=int, default=20000, help='Number of seeded activity logs.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the seeded test database between benchmarks.')
+
+    def routes(self):
+        accounts = list(AccountModel.objects.filter(Balance__gt=0).order_by('pk').values_list('Id_account', 'FK_Id_customer')[:20])
+        customers = list(CustomerModel.objects.filter(pk__in=[customer for account, customer in accounts]).values_list('Pesel', 'Last_name', 'City'))
+        return [
+                ('Customer search', [f'{reverse("minibankapp:listcustomer")}?criteria={pesel[:6]}' for pesel, last_name, city in customers]
+                                    + [f'{reverse("minibankapp:listcustomer")}?criteria={last_name} {city}' for pesel, last_name, city in customers]),
+                ('Account list', [reverse('minibankapp:listaccount', args=[customer]) for account, customer in accounts]),
+                ('History page', [reverse('minibankapp:historyoperation', args=[customer, account]) for account, customer in accounts]),
+                ('Monitoring', [reverse('minibankapp:monitoring')])]
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('Concurrency should be a comma separated list of numbers.')
+        with benchmark_database(keepdb=options['keepdb']):
+            if not CustomerModel.objects.exists():
+                BankSeederClass(customers=options['customers'], logs=options['logs']).run()
+            user = get_user_model().objects.filter(username='benchmark').first()
+            if user is None:
+                user = get_user_model().objects.create_superuser(username='benchmark', password=None)
+            client = Client()
+            client.force_login(user)
+            self.stdout.write(f'{"Route":<16} {"Clients":>8} {"WSGI req/s":>11} {"p90 [ms]":>9} {"ASGI req/s":>11} {"p90 [ms]":>9} {"Ratio":>6}')
+            for name, paths in self.routes():
+                for concurrency in levels:
+                    handler_load = HandlerLoadClass(client.cookies, requests=options['requests'], concurrency=concurrency)
+                    try:
+                        with async_views(False):
+                            wsgi = handler_load.wsgi(paths)
+                        with async_views(True):
+                            asgi = handler_load.asgi(paths)
+                    except ValueError as error_message:
+                        raise CommandError(str(error_message))
+                    self.stdout.write(
+                                    f'{name:<16} {concurrency:>8} {wsgi["throughput"]:>11} {wsgi["p90_ms"]:>9.2f} '
+                                    f'{asgi["throughput"]:>11} {asgi["p90_ms"]:>9.2f} {asgi["throughput"] / wsgi["throughput"]:>6.2f}')
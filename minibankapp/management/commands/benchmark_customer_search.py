@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import random
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.test import RequestFactory
+from minibankapp.models import CustomerModel
+from minibankapp.functions import SelectCustomerListView
+from minibankapp.benchmark import (benchmark_database, percentile)
+from minibankapp.seed import BankSeederClass
+
+
+class Command(BaseCommand):
+    help = 'Measures customer search latency per prefix length on a generated customer table in the test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=2000000, help='Number of generated customers.')
+        parser.add_argument('--searches', type=int, default=50, help='Searches measured per prefix length.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between benchmarks.')
+
+    def search(self, criteria):
+        # Same work as a search page: queryset of SelectCustomerListView, count and first page of 10
+        view = SelectCustomerListView()
+        view.request = RequestFactory().get('/', {'criteria': criteria})
+        page = Paginator(view.get_queryset_customer('criteria'), 10).page(1)
+        return list(page.object_list)
+
+    def handle(self, *args, **options):
+        generator = random.Random(2)
+        with benchmark_database(keepdb=options['keepdb']):
+            if not CustomerModel.objects.exists():
+                BankSeederClass(customers=options['customers'], accounts=0).run()
+            self.stdout.write(f'{CustomerModel.objects.count()} customer(s) in table.')
+            samples = list(CustomerModel.objects.order_by('?').values_list('Pesel', 'Identification', 'Last_name', 'City')[:options['searches']])
+            self.stdout.write(f'{"Field":<15} {"Prefix":>6} {"p50 [ms]":>10} {"p90 [ms]":>10} {"max [ms]":>10}')
+            for field_number, field_name, length in [(0, 'PESEL', 11), (1, 'Identification', 9)]:
+                for prefix_length in range(1, length + 1):
+                    durations = []
+                    for sample in samples:
+                        criteria = sample[field_number][:prefix_length]
+                        if field_number == 1 and generator.random() < 0.5:
+                            criteria = criteria.lower()
+                        start_time = perf_counter()
+                        self.search(criteria)
+                        durations.append((perf_counter() - start_time) * 1000)
+                    self.stdout.write(
+                                    f'{field_name:<15} {prefix_length:>6} {percentile(durations, 50):>10.2f} '
+                                    f'{percentile(durations, 90):>10.2f} {max(durations):>10.2f}')
+            # Fuzzy search as typed at the counter: surname, surname with city, misspelled surname with city
+            criteria_formats = [
+                                ('Surname', lambda sample: sample[2]),
+                                ('Surname city', lambda sample: f'{sample[2]} {sample[3]}'),
+                                ('Typo city', lambda sample: f'{sample[2][:3]}{sample[2][4:]} {sample[3]}')]
+            for label, criteria_format in criteria_formats:
+                durations = []
+                for sample in samples:
+                    start_time = perf_counter()
+                    self.search(criteria_format(sample))
+                    durations.append((perf_counter() - start_time) * 1000)
+                self.stdout.write(
+                                f'{label:<15} {"-":>6} {percentile(durations, 50):>10.2f} '
+                                f'{percentile(durations, 90):>10.2f} {max(durations):>10.2f}')
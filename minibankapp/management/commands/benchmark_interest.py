@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import os
+from django.core.management.base import (BaseCommand, CommandError)
+from django.db import connection
+from minibankapp.models import InterestRunModel
+from minibankapp.interest import InterestCountingClass
+from minibankapp.benchmark import benchmark_database
+from minibankapp.seed import BankSeederClass
+
+
+class Command(BaseCommand):
+    help = 'Measures how the interest run scales from 1 to N worker processes on a generated dataset in the test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=100000, help='Number of generated accounts.')
+        parser.add_argument('--workers', type=int, default=1, help=f'Highest number of workers measured (this machine has {os.cpu_count()} CPU).')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Accounts committed per chunk.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between benchmarks.')
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']):
+            if options['workers'] > 1 and not connection.features.has_select_for_update:
+                raise CommandError('Database backend allows a single writer, parallel interest counting cannot be measured.')
+            # A few operations per account, so most accounts have a positive balance to credit
+            BankSeederClass(
+                            customers=max(options['accounts'] // 2, 1),
+                            accounts=options['accounts'],
+                            operations=options['accounts'] * 3).run(search_index=False)
+            self.stdout.write(f'{options["accounts"]} account(s) generated.')
+            self.stdout.write(f'{"Workers":>8} {"Accounts":>10} {"Seconds":>10} {"Accounts/s":>12} {"Speedup":>8}')
+            base_duration = None
+            for workers in range(1, options['workers'] + 1):
+                # Every measurement credits the whole book again in its own period
+                run = InterestRunModel.objects.create(Period=f'2000-{workers:02d}', Created_employee='benchmark')
+                interest_counting = InterestCountingClass(employee='benchmark', batch_size=options['batch_size'])
+                interest_counting.run(run, workers=workers)
+                base_duration = base_duration or interest_counting.duration
+                self.stdout.write(
+                                f'{workers:>8} {interest_counting.counter:>10} {interest_counting.duration:>10.3f} '
+                                f'{interest_counting.throughput:>12} {base_duration / interest_counting.duration:>8.2f}')
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import json
+import datetime
+from django.core.management.base import (BaseCommand, CommandError)
+from minibankapp.models import CustomerModel
+from minibankapp.benchmark import (benchmark_database, TellerBenchmarkClass, compare_results)
+from minibankapp.seed import BankSeederClass
+
+
+class Command(BaseCommand):
+    help = 'Drives the teller workflows through the URL routes on a seeded test database, reports latency, queries and peak memory and compares them with a baseline.'
+
+    # Fixed timeline, a baseline and a later run see the same dataset
+    seed_end_date = datetime.date(2024, 12, 31)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=10000, help='Number of seeded customers.')
+        parser.add_argument('--accounts', type=int, help='Number of seeded accounts, by default 2 per customer.')
+        parser.add_argument('--operations', type=int, help='Number of seeded operations, by default 10 per account.')
+        parser.add_argument('--iterations', type=int, default=20, help='Measured requests per workflow.')
+        parser.add_argument('--warmup', type=int, default=2, help='Requests per workflow before measuring.')
+        parser.add_argument('--interest-iterations', type=int, default=3, help='Measured interest runs, each one credits the whole book.')
+        parser.add_argument('--workflow', action='append', help='Measure only the named workflow, can be repeated.')
+        parser.add_argument('--output', help='JSON file the results are saved to.')
+        parser.add_argument('--baseline', help='JSON file of an earlier run the results are compared with.')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown and memory growth against the baseline (0.2 = 20%%).')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the seeded test database between benchmarks.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as error_message:
+                raise CommandError(f'Baseline cannot be read: {error_message}')
+        with benchmark_database(keepdb=options['keepdb']):
+            if not CustomerModel.objects.exists():
+                BankSeederClass(
+                                customers=options['customers'],
+                                accounts=options['accounts'],
+                                operations=options['operations'],
+                                end_date=self.seed_end_date).run()
+            teller_benchmark = TellerBenchmarkClass(
+                                                    iterations=options['iterations'],
+                                                    warmup=options['warmup'],
+                                                    interest_iterations=options['interest_iterations'])
+            try:
+                teller_benchmark.run(options['workflow'])
+            except ValueError as error_message:
+                raise CommandError(str(error_message))
+            results = teller_benchmark.report()
+        self.stdout.write(f'{results["customers"]} customer(s), {results["accounts"]} account(s), {results["operations"]} operation(s) on {results["database"]}.')
+        self.stdout.write(f'{"Workflow":<17} {"p50 [ms]":>10} {"p90 [ms]":>10} {"p99 [ms]":>10} {"max [ms]":>10} {"Queries":>8} {"Peak [kB]":>10}')
+        for name, result in results['workflows'].items():
+            self.stdout.write(
+                            f'{name:<17} {result["p50_ms"]:>10.2f} {result["p90_ms"]:>10.2f} {result["p99_ms"]:>10.2f} '
+                            f'{result["max_ms"]:>10.2f} {result["queries"]:>8} {result["peak_kb"]:>10.1f}')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(results, output_file, indent=4)
+            self.stdout.write(f'Results saved to {options["output"]}.')
+        if baseline is not None:
+            regressions = compare_results(results, baseline, tolerance=options['tolerance'])
+            for name, metric, base, current in regressions:
+                self.stdout.write(self.style.ERROR(f'{name:<17} {metric:<8} {base} -> {current}'))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regression(s) against baseline {options["baseline"]}.')
+            self.stdout.write(self.style.SUCCESS(f'No regression against baseline {options["baseline"]}.'))
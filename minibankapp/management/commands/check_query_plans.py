@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import re
+from django.core.management.base import (BaseCommand, CommandError)
+from django.db import connection
+from minibankapp.models import (AccountModel, OperationModel, OperationArchiveModel, LogModel)
+from minibankapp.interest import InterestCountingClass
+from minibankapp.exports import HistoryExportClass
+from minibankapp.benchmark import benchmark_database
+from minibankapp.seed import BankSeederClass
+
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN for the hot access paths on a seeded test database and fails when a plan falls back to a full scan or sort.'
+
+    # Plan fragments meaning a full scan of a table or a sort of the whole result
+    full_scan_patterns = {
+                        'sqlite': [r'\bSCAN \w+\s*$', r'USE TEMP B-TREE FOR ORDER BY'],
+                        'mysql': [r'"access_type": "ALL"', r'"using_filesort": true'],
+                        'postgresql': [r'Seq Scan', r'^\s*(->\s*)?Sort\b']}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=100000, help='Number of generated accounts.')
+        parser.add_argument('--operations', type=int, default=1000000, help='Number of generated operations.')
+        parser.add_argument('--logs', type=int, default=200000, help='Number of generated activity logs.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between checks.')
+
+    def access_paths(self):
+        # Same querysets as the views, with a first page where the view paginates
+        account_id = OperationModel.objects.values_list('FK_Id_account', flat=True).first()
+        customer_id = AccountModel.objects.values_list('FK_Id_customer', flat=True).first()
+        return [
+                ('History of account', OperationModel.objects.filter(FK_Id_account=account_id).order_by('-Operation_date', '-pk')[:11]),
+                ('Archived history', OperationArchiveModel.objects.filter(FK_Id_account=account_id).order_by('-Operation_date', '-pk')[:11]),
+                ('History export', HistoryExportClass(account=account_id).get_queryset()),
+                ('Accounts of customer', AccountModel.objects.filter(FK_Id_customer=customer_id).order_by('-pk')),
+                ('Interest batch', InterestCountingClass(employee='check').get_queryset().filter(Id_account__gt=0)[:2000]),
+                ('Activity monitoring', LogModel.objects.all().order_by('-Date_log', '-pk')[:11])]
+
+    def explain(self, queryset):
+        if connection.vendor == 'mysql':
+            return queryset.explain(format='JSON')
+        return queryset.explain()
+
+    def analyze(self):
+        # Fresh statistics, otherwise the planner judges the seeded tables as empty
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                for model in [AccountModel, OperationModel, OperationArchiveModel, LogModel]:
+                    cursor.execute(f'ANALYZE TABLE {connection.ops.quote_name(model._meta.db_table)}')
+                    cursor.fetchall()
+            else:
+                cursor.execute('ANALYZE')
+
+    def handle(self, *args, **options):
+        patterns = self.full_scan_patterns.get(connection.vendor)
+        if patterns is None:
+            raise CommandError(f'Query plans of {connection.vendor} backend are not supported.')
+        with benchmark_database(keepdb=options['keepdb']):
+            if not AccountModel.objects.exists():
+                BankSeederClass(
+                                customers=max(options['accounts'] // 2, 1),
+                                accounts=options['accounts'],
+                                operations=options['operations'],
+                                logs=options['logs']).run(search_index=False)
+                self.analyze()
+            regressions = []
+            for name, queryset in self.access_paths():
+                plan = self.explain(queryset)
+                full_scan = any(re.search(pattern, plan, re.MULTILINE) for pattern in patterns)
+                if full_scan:
+                    regressions.append(name)
+                self.stdout.write(f'{name:<25} {"FULL SCAN" if full_scan else "OK"}')
+                if full_scan or options['verbosity'] > 1:
+                    self.stdout.write(plan)
+        if regressions:
+            raise CommandError(f'Full scan in {len(regressions)} access path(s): {", ".join(regressions)}.')
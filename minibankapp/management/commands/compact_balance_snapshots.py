@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+from time import perf_counter
+from django.core.management.base import (BaseCommand, CommandError)
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from minibankapp.snapshots import compact_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Recomputes daily balance snapshots from operations, by default for yesterday (nightly run).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day recomputed (YYYY-MM-DD), used to backfill older operations.')
+        parser.add_argument('--days', type=int, default=1, help='Number of days before today recomputed when --since is not given.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Accounts aggregated per query.')
+
+    def handle(self, *args, **options):
+        date_to = timezone.localdate()
+        if options['since']:
+            date_from = parse_date(options['since'])
+            if date_from is None:
+                raise CommandError('Date should have YYYY-MM-DD format.')
+        else:
+            date_from = date_to - datetime.timedelta(days=options['days'])
+        start_time = perf_counter()
+        counter = compact_snapshots(date_from, date_to, chunk_size=options['chunk_size'])
+        self.stdout.write(f'{counter} snapshot(s) from {date_from} to {date_to} recomputed in {perf_counter() - start_time:.2f} s.')
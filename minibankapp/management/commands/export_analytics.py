@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import (BaseCommand, CommandError)
+from minibankapp.analytics import AnalyticsExportClass
+
+
+class Command(BaseCommand):
+    help = 'Writes operations with account type and customer to monthly Parquet partitions (needs pyarrow). Each run adds the operations since the last exported one.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', help='Output directory, by default MINIBANK_ANALYTICS_DIR.')
+        parser.add_argument('--batch-size', type=int, default=50000, help='Rows per record batch.')
+        parser.add_argument('--full', action='store_true', help='Remove exported partitions and export every operation again.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size should be positive.')
+        analytics_export = AnalyticsExportClass(directory=options['directory'], batch_size=options['batch_size'])
+        try:
+            files = analytics_export.run(full=options['full'])
+        except (ImproperlyConfigured, RuntimeError) as error_message:
+            raise CommandError(str(error_message))
+        for path in files:
+            self.stdout.write(str(path.relative_to(analytics_export.directory)))
+        state = analytics_export.read_state()
+        self.stdout.write(
+                        f'{analytics_export.exported} operation(s) exported to {len(files)} file(s) in {analytics_export.duration:.2f} s '
+                        f'({analytics_export.throughput} rows/s), last exported operation {state["last_id_operation"]}.')
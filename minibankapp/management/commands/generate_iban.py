@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import BaseCommand
+from minibankapp.iban import IbanGeneratorClass
+
+
+class Command(BaseCommand):
+    help = 'Generates IBAN numbers for all accounts without one.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Accounts read and updated per chunk.')
+
+    def handle(self, *args, **options):
+        iban_generator = IbanGeneratorClass(chunk_size=options['chunk_size'])
+        iban_generator.run()
+        for id_account, message in iban_generator.rejected:
+            self.stderr.write(f'Account {id_account}: {message}')
+        self.stdout.write(
+                        f'{iban_generator.generated} IBAN(s) generated, {len(iban_generator.rejected)} rejected '
+                        f'in {iban_generator.duration:.2f} s ({iban_generator.throughput} accounts/s).')
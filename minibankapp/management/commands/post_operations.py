@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import (BaseCommand, CommandError)
+from minibankapp.posting import BatchPostingClass
+
+
+class Command(BaseCommand):
+    help = 'Posts deposits and withdrawals from a CSV (account,type,value) or JSON lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path to the operation file.')
+        parser.add_argument('--format', choices=['csv', 'json'], help='File format, by default taken from the file extension.')
+        parser.add_argument('--employee', default='system', help='Employee recorded for the operations.')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Accounts locked and posted per transaction.')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or ('json' if options['file'].endswith(('.json', '.jsonl')) else 'csv')
+        batch_posting = BatchPostingClass(employee=options['employee'], chunk_size=options['chunk_size'])
+        try:
+            with open(options['file'], encoding='utf-8-sig') as stream:
+                results = batch_posting.run(stream, file_format)
+        except OSError as error_description:
+            raise CommandError(error_description)
+        for line_number, account, status, message in results:
+            if status == 'Rejected' or options['verbosity'] > 1:
+                self.stdout.write(f'{line_number};{account};{status};{message}')
+        self.stdout.write(self.style.SUCCESS(
+                            f'{batch_posting.accepted} line(s) accepted, {batch_posting.rejected} line(s) rejected '
+                            f'({batch_posting.throughput} line(s)/s).'))
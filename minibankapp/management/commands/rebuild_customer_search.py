@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from minibankapp.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the trigram index of customer search from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Index rows inserted per statement.')
+
+    def handle(self, *args, **options):
+        start_time = perf_counter()
+        counter = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(f'{counter} trigram(s) indexed in {perf_counter() - start_time:.2f} s.')
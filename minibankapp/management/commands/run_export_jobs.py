@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from time import sleep
+from django.core.management.base import BaseCommand
+from minibankapp.exports import ExportJobClass
+
+
+class Command(BaseCommand):
+    help = 'Runs queued history export jobs and evicts old export files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Stop when the queue is empty.')
+        parser.add_argument('--interval', type=float, default=2, help='Seconds between polls of an empty queue.')
+
+    def handle(self, *args, **options):
+        export_job = ExportJobClass()
+        while True:
+            job = export_job.claim_job()
+            if job is not None:
+                job = export_job.run_job(job)
+                target = f'account {job.FK_Id_account_id}' if job.FK_Id_account_id else 'analytics'
+                self.stdout.write(f'Job {job.pk} for {target}: {job.Status_job} {job.File_name} {job.Error_job}'.rstrip())
+                continue
+            evicted = export_job.evict()
+            if evicted:
+                self.stdout.write(f'{evicted} export file(s) evicted.')
+            if options['once']:
+                break
+            sleep(options['interval'])
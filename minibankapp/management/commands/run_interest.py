@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import re
+from django.core.management.base import (BaseCommand, CommandError)
+from minibankapp.models import InterestRunModel
+from minibankapp.interest import (InterestCountingClass, current_period)
+
+
+class Command(BaseCommand):
+    help = 'Counts interest in checkpointed chunks. Without --period all queued or interrupted runs are processed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', help='Interest period YYYY-MM, the run is created when missing.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Accounts committed per chunk.')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes, each one counts its own account id range.')
+        parser.add_argument('--employee', default='system', help='Employee recorded for a newly created run.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('Number of workers should be at least 1.')
+        if options['period']:
+            if not re.match('^[0-9]{4}-[0-9]{2}$', options['period']):
+                raise CommandError('Period should have format YYYY-MM.')
+            run, created = InterestRunModel.objects.get_or_create(
+                                                                Period=options['period'],
+                                                                defaults={'Created_employee': options['employee']})
+            runs = [run]
+        else:
+            runs = list(InterestRunModel.objects.exclude(Status_run='Done').order_by('Period'))
+            if not runs:
+                self.stdout.write(f'No queued interest run (current period {current_period()}).')
+        for run in runs:
+            if run.Status_run == 'Done':
+                self.stdout.write(f'Interest for period {run.Period} has already been counted for {run.Counter} account(s).')
+                continue
+            if run.Status_run == 'Running':
+                self.stdout.write(f'Resuming period {run.Period} from its checkpoints.')
+            interest_counting = InterestCountingClass(employee=run.Created_employee, batch_size=options['batch_size'])
+            if options['workers'] > 1 and not interest_counting.supports_parallel():
+                self.stdout.write(self.style.WARNING('Database backend allows a single writer, partitions are counted sequentially.'))
+            run = interest_counting.run(run, workers=options['workers'])
+            self.stdout.write(self.style.SUCCESS(
+                                f'Interest for {run.Counter} account(s) has been recounted for period {run.Period} '
+                                f'({interest_counting.counter} in this run, {interest_counting.throughput} account(s)/s).'))
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import (BaseCommand, CommandError)
+from django.utils.dateparse import parse_date
+from minibankapp.models import CustomerModel
+from minibankapp.seed import BankSeederClass
+
+
+class Command(BaseCommand):
+    help = 'Fills the database with a synthetic bank: customers, account types, accounts, years of operations, snapshots and logs. Same seed gives the same data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=1000, help='Number of generated customers.')
+        parser.add_argument('--accounts', type=int, help='Number of generated accounts, by default 2 per customer.')
+        parser.add_argument('--operations', type=int, help='Number of generated operations, by default 10 per account.')
+        parser.add_argument('--logs', type=int, default=0, help='Number of generated activity logs.')
+        parser.add_argument('--years', type=int, default=3, help='Years of history before the end date.')
+        parser.add_argument('--seed', type=int, default=1, help='Seed of the random generator.')
+        parser.add_argument('--end-date', help='Last day of history (YYYY-MM-DD), by default today. Fix it to reproduce a dataset on another day.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per statement.')
+        parser.add_argument('--append', action='store_true', help='Add to a database which already holds customers.')
+        parser.add_argument('--skip-search-index', action='store_true', help='Do not rebuild the customer search index.')
+
+    def handle(self, *args, **options):
+        end_date = None
+        if options['end_date']:
+            end_date = parse_date(options['end_date'])
+            if end_date is None:
+                raise CommandError('Date should have YYYY-MM-DD format.')
+        if CustomerModel.objects.exists() and not options['append']:
+            raise CommandError('Database already holds customers, run flush first or pass --append.')
+        if options['accounts'] and not options['customers']:
+            raise CommandError('Accounts need at least one customer.')
+        seeder = BankSeederClass(
+                                customers=options['customers'],
+                                accounts=options['accounts'],
+                                operations=options['operations'],
+                                logs=options['logs'],
+                                years=options['years'],
+                                seed=options['seed'],
+                                end_date=end_date,
+                                batch_size=options['batch_size'])
+        counters = seeder.run(search_index=not options['skip_search_index'])
+        for name, counter in counters.items():
+            self.stdout.write(f'{name.capitalize():<12} {counter:>12}')
+        self.stdout.write(f'Seeded in {seeder.duration:.2f} s ({seeder.throughput} rows/s).')
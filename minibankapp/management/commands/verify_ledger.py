@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+import os
+from django.core.management.base import (BaseCommand, CommandError)
+from minibankapp.ledger import LedgerCheckClass
+
+
+class Command(BaseCommand):
+    help = 'Verifies account balances against the sums of their operations, repairs drift with --apply.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help=f'Worker processes (this machine has {os.cpu_count()} CPU).')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Accounts checked per grouped query.')
+        parser.add_argument('--apply', action='store_true', help='Repair Balance and Free_balance, without it the run is a dry run.')
+        parser.add_argument('--report', type=int, default=50, help='Number of drift lines printed.')
+
+    def handle(self, *args, **options):
+        ledger_check = LedgerCheckClass(chunk_size=options['chunk_size'], apply=options['apply'])
+        drifts = ledger_check.run(workers=options['workers'])
+        for account_id, kind, stored, expected in sorted(drifts)[:options['report']]:
+            self.stdout.write(f'Account {account_id}: {kind} {stored} expected {expected} (difference {expected - stored})')
+        if len(drifts) > options['report']:
+            self.stdout.write(f'... {len(drifts) - options["report"]} more drift(s).')
+        accounts = len({account_id for account_id, kind, stored, expected in drifts})
+        self.stdout.write(
+                        f'{ledger_check.checked} account(s) checked in {ledger_check.duration:.2f} s ({ledger_check.throughput} accounts/s), '
+                        f'{len(drifts)} drift(s) on {accounts} account(s), {ledger_check.repaired} account(s) repaired.')
+        if drifts and not options['apply']:
+            raise CommandError('Ledger drift found, run with --apply to repair balances.')
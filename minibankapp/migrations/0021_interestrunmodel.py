@@ -0,0 +1,27 @@
+# Generated by Django 5.0.3 on 2026-10-18 08:40
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0020_rename_action_log_logmodel_action_log_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterestRunModel',
+            fields=[
+                ('Id_run', models.AutoField(primary_key=True, serialize=False, verbose_name='Id run')),
+                ('Period', models.CharField(max_length=7, unique=True, validators=[django.core.validators.RegexValidator(regex='^[0-9]{4}-[0-9]{2}$')], verbose_name='Period')),
+                ('Status_run', models.CharField(choices=[('Pending', 'Pending'), ('Running', 'Running'), ('Done', 'Done')], default='Pending', max_length=10, verbose_name='Status')),
+                ('Last_id_account', models.IntegerField(default=0, verbose_name='Last id account')),
+                ('Counter', models.IntegerField(default=0, verbose_name='Counter')),
+                ('Created_date', models.DateTimeField(auto_now_add=True, verbose_name='Created date')),
+                ('Finished_date', models.DateTimeField(blank=True, null=True, verbose_name='Finished date')),
+                ('Created_employee', models.CharField(max_length=50, verbose_name='Employee')),
+            ],
+        ),
+    ]
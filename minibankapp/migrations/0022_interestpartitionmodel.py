@@ -0,0 +1,48 @@
+# Generated by Django 5.0.3 on 2026-10-18 08:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_checkpoints(apps, schema_editor):
+    # Unfinished runs continue in a single partition from their last checkpoint
+    InterestRunModel = apps.get_model('minibankapp', 'InterestRunModel')
+    InterestPartitionModel = apps.get_model('minibankapp', 'InterestPartitionModel')
+    for run in InterestRunModel.objects.exclude(Status_run='Done'):
+        InterestPartitionModel.objects.create(
+                                            Range_from=0,
+                                            Last_id_account=run.Last_id_account,
+                                            Counter=run.Counter,
+                                            Status_partition=run.Status_run,
+                                            FK_Id_run=run)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0021_interestrunmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterestPartitionModel',
+            fields=[
+                ('Id_partition', models.AutoField(primary_key=True, serialize=False, verbose_name='Id partition')),
+                ('Range_from', models.IntegerField(verbose_name='Range from')),
+                ('Range_to', models.IntegerField(blank=True, null=True, verbose_name='Range to')),
+                ('Last_id_account', models.IntegerField(verbose_name='Last id account')),
+                ('Counter', models.IntegerField(default=0, verbose_name='Counter')),
+                ('Status_partition', models.CharField(choices=[('Pending', 'Pending'), ('Running', 'Running'), ('Done', 'Done')], default='Pending', max_length=10, verbose_name='Status')),
+                ('FK_Id_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='minibankapp.interestrunmodel')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='interestpartitionmodel',
+            constraint=models.UniqueConstraint(fields=('FK_Id_run', 'Range_from'), name='unique_interest_partition'),
+        ),
+        migrations.RunPython(move_checkpoints, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='interestrunmodel',
+            name='Last_id_account',
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.3 on 2026-10-18 08:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0022_interestpartitionmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJobModel',
+            fields=[
+                ('Id_job', models.AutoField(primary_key=True, serialize=False, verbose_name='Id job')),
+                ('Format_job', models.CharField(choices=[('xlsx', 'XLSX'), ('csv', 'CSV')], default='xlsx', max_length=10, verbose_name='Format')),
+                ('Status_job', models.CharField(choices=[('Pending', 'Pending'), ('Running', 'Running'), ('Done', 'Done'), ('Failed', 'Failed')], default='Pending', max_length=10, verbose_name='Status')),
+                ('Last_id_operation', models.IntegerField(default=0, verbose_name='Last id operation')),
+                ('File_name', models.CharField(blank=True, max_length=255, verbose_name='File name')),
+                ('File_size', models.BigIntegerField(default=0, verbose_name='File size')),
+                ('Error_job', models.CharField(blank=True, max_length=250, verbose_name='Error')),
+                ('Created_date', models.DateTimeField(auto_now_add=True, verbose_name='Created date')),
+                ('Finished_date', models.DateTimeField(blank=True, null=True, verbose_name='Finished date')),
+                ('Created_employee', models.CharField(max_length=50, verbose_name='Employee')),
+                ('FK_Id_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='minibankapp.accountmodel')),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-18 08:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0023_exportjobmodel'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logmodel',
+            name='Date_log',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
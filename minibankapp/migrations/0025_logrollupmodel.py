@@ -0,0 +1,25 @@
+# Generated by Django 5.0.3 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0024_alter_logmodel_date_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogRollupModel',
+            fields=[
+                ('Id_rollup', models.AutoField(primary_key=True, serialize=False)),
+                ('Action_rollup', models.CharField(max_length=50)),
+                ('Minute_rollup', models.DateTimeField(db_index=True)),
+                ('Count_rollup', models.IntegerField()),
+                ('Sum_rollup', models.BigIntegerField()),
+                ('Max_rollup', models.BigIntegerField()),
+                ('Buckets_rollup', models.TextField()),
+            ],
+        ),
+    ]
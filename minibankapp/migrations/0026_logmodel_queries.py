@@ -0,0 +1,33 @@
+# Generated by Django 5.0.3 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0025_logrollupmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logmodel',
+            name='Alert_log',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='logmodel',
+            name='Db_time_log',
+            field=models.DecimalField(decimal_places=6, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='logmodel',
+            name='Queries_log',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='logmodel',
+            name='Slowest_query_log',
+            field=models.CharField(blank=True, max_length=250),
+        ),
+    ]
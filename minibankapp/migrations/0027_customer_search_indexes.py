@@ -0,0 +1,21 @@
+# Generated by Django 5.0.3 on 2026-10-18 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0026_logmodel_queries'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customermodel',
+            index=models.Index(fields=['Pesel'], name='customer_pesel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customermodel',
+            index=models.Index(fields=['Identification'], name='customer_identification_idx'),
+        ),
+    ]
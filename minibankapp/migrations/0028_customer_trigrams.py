@@ -0,0 +1,40 @@
+# Generated by Django 5.0.3 on 2026-10-18 08:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_index(apps, schema_editor):
+    # Existing customers are found by name and address right after the deploy
+    from minibankapp.search import rebuild_index
+    rebuild_index(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0027_customer_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrigramStatModel',
+            fields=[
+                ('Trigram', models.CharField(max_length=3, primary_key=True, serialize=False)),
+                ('Count_trigram', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CustomerTrigramModel',
+            fields=[
+                ('Id_trigram', models.BigAutoField(primary_key=True, serialize=False)),
+                ('Trigram', models.CharField(max_length=3)),
+                ('FK_Id_customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='minibankapp.customermodel')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='customertrigrammodel',
+            constraint=models.UniqueConstraint(fields=('Trigram', 'FK_Id_customer'), name='unique_customer_trigram'),
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0028_customer_trigrams'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accountmodel',
+            index=models.Index(fields=['FK_Id_customer', '-Id_account'], name='account_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accountmodel',
+            index=models.Index(condition=models.Q(('Balance__gt', 0), ('Percent__gt', 0)), fields=['Id_account'], name='account_interest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logmodel',
+            index=models.Index(fields=['-Date_log', '-Id_log'], name='log_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operationmodel',
+            index=models.Index(fields=['FK_Id_account', '-Operation_date', '-Id_operation'], name='operation_account_date_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0029_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshotModel',
+            fields=[
+                ('Id_snapshot', models.BigAutoField(primary_key=True, serialize=False)),
+                ('Snapshot_date', models.DateField(verbose_name='Snapshot date')),
+                ('Closing_balance', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Closing balance')),
+                ('Debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Debit total')),
+                ('Credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Credit total')),
+                ('Operation_count', models.IntegerField(default=0, verbose_name='Operation count')),
+                ('FK_Id_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='minibankapp.accountmodel')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='balancesnapshotmodel',
+            constraint=models.UniqueConstraint(fields=('FK_Id_account', 'Snapshot_date'), name='unique_balance_snapshot'),
+        ),
+    ]
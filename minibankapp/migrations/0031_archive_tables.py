@@ -0,0 +1,70 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:50
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0030_balancesnapshotmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivePartitionModel',
+            fields=[
+                ('Id_partition', models.AutoField(primary_key=True, serialize=False, verbose_name='Id partition')),
+                ('Table_name', models.CharField(choices=[('operation', 'Operations'), ('log', 'Logs')], max_length=20, verbose_name='Table')),
+                ('Period', models.CharField(max_length=7, validators=[django.core.validators.RegexValidator(regex='^[0-9]{4}-[0-9]{2}$')], verbose_name='Period')),
+                ('Counter', models.IntegerField(default=0, verbose_name='Counter')),
+                ('Archived_date', models.DateTimeField(auto_now=True, verbose_name='Archived date')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LogArchiveModel',
+            fields=[
+                ('Id_log', models.IntegerField(primary_key=True, serialize=False)),
+                ('Date_log', models.DateTimeField()),
+                ('Action_log', models.CharField(max_length=50)),
+                ('Function_log', models.CharField(max_length=50)),
+                ('Duration_log', models.DecimalField(decimal_places=6, max_digits=12)),
+                ('Data_log', models.CharField(blank=True, max_length=250)),
+                ('User_log', models.CharField(max_length=50)),
+                ('Status_log', models.CharField(max_length=20)),
+                ('Queries_log', models.IntegerField(default=0)),
+                ('Db_time_log', models.DecimalField(decimal_places=6, default=0, max_digits=12)),
+                ('Slowest_query_log', models.CharField(blank=True, max_length=250)),
+                ('Alert_log', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OperationArchiveModel',
+            fields=[
+                ('Id_operation', models.IntegerField(primary_key=True, serialize=False, verbose_name='Id operation')),
+                ('Type_operation', models.IntegerField(choices=[('', '--------'), (1, 'Deposit'), (2, 'Withdrawal'), (3, 'Interest')], verbose_name='Type operation')),
+                ('Value_operation', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Value operation')),
+                ('Balance_after_operation', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Balance after operation')),
+                ('Operation_date', models.DateTimeField(verbose_name='Operation date')),
+                ('Operation_employee', models.CharField(max_length=50, verbose_name='Employee')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='archivepartitionmodel',
+            constraint=models.UniqueConstraint(fields=('Table_name', 'Period'), name='unique_archive_partition'),
+        ),
+        migrations.AddIndex(
+            model_name='logarchivemodel',
+            index=models.Index(fields=['-Date_log', '-Id_log'], name='log_archive_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='operationarchivemodel',
+            name='FK_Id_account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='minibankapp.accountmodel'),
+        ),
+        migrations.AddIndex(
+            model_name='operationarchivemodel',
+            index=models.Index(fields=['FK_Id_account', '-Operation_date', '-Id_operation'], name='archive_account_date_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0031_archive_tables'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjobmodel',
+            name='FK_Id_account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='minibankapp.accountmodel'),
+        ),
+        migrations.AlterField(
+            model_name='exportjobmodel',
+            name='Format_job',
+            field=models.CharField(choices=[('xlsx', 'XLSX'), ('csv', 'CSV'), ('parquet', 'Parquet')], default='xlsx', max_length=10, verbose_name='Format'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.3 on 2026-10-18 14:10
+
+from django.db import migrations
+from django.db.models import (Sum, Count, Max, Case, When, F, Value, DecimalField)
+from django.db.models.functions import TruncDate
+
+
+def backfill_snapshots(apps, schema_editor):
+    # Days of live operations posted before snapshots existed, the day of the deploy is recomputed as a whole
+    AccountModel = apps.get_model('minibankapp', 'AccountModel')
+    OperationModel = apps.get_model('minibankapp', 'OperationModel')
+    BalanceSnapshotModel = apps.get_model('minibankapp', 'BalanceSnapshotModel')
+    decimal_field = DecimalField(max_digits=14, decimal_places=2)
+    last_id_account = 0
+    while True:
+        account_ids = list(AccountModel.objects
+                                        .filter(Id_account__gt=last_id_account)
+                                        .order_by('Id_account')
+                                        .values_list('Id_account', flat=True)[:1000])
+        if not account_ids:
+            break
+        last_id_account = account_ids[-1]
+        days = list(OperationModel.objects
+                                .filter(FK_Id_account__in=account_ids)
+                                .annotate(day=TruncDate('Operation_date'))
+                                .values('FK_Id_account', 'day')
+                                .annotate(
+                                        last_id_operation=Max('Id_operation'),
+                                        debit=Sum(Case(When(Value_operation__lt=0, then=-F('Value_operation')), default=Value(0), output_field=decimal_field)),
+                                        credit=Sum(Case(When(Value_operation__gt=0, then=F('Value_operation')), default=Value(0), output_field=decimal_field)),
+                                        count=Count('pk'))
+                                .order_by())
+        if not days:
+            continue
+        closing = dict(OperationModel.objects
+                                    .filter(pk__in=[day['last_id_operation'] for day in days])
+                                    .values_list('Id_operation', 'Balance_after_operation'))
+        snapshots = BalanceSnapshotModel.objects.filter(FK_Id_account__in=account_ids)
+        snapshots = {(snapshot.FK_Id_account_id, snapshot.Snapshot_date): snapshot for snapshot in snapshots}
+        updated = []
+        created = []
+        for day in days:
+            snapshot = snapshots.get((day['FK_Id_account'], day['day']))
+            if snapshot is None:
+                snapshot = BalanceSnapshotModel(FK_Id_account_id=day['FK_Id_account'], Snapshot_date=day['day'])
+                created.append(snapshot)
+            else:
+                updated.append(snapshot)
+            snapshot.Closing_balance = closing[day['last_id_operation']]
+            snapshot.Debit_total = day['debit']
+            snapshot.Credit_total = day['credit']
+            snapshot.Operation_count = day['count']
+        BalanceSnapshotModel.objects.bulk_update(updated, ['Closing_balance', 'Debit_total', 'Credit_total', 'Operation_count'])
+        BalanceSnapshotModel.objects.bulk_create(created)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0032_exportjob_analytics'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minibankapp', '0033_backfill_balance_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjobmodel',
+            name='Started_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Started date'),
+        ),
+    ]
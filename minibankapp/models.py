@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from django.db import models
+from django.utils import timezone
 from django.core.validators import (RegexValidator, MinValueValidator)
 from .validators import (validator_free_balance, validator_number_iban)
 
@@ -57,6 +58,28 @@ class CustomerModel(models.Model):
         self.Identification = self.Identification.upper()
         super().save(*args, **kwargs)
 
+    class Meta:
+        indexes = [
+                    models.Index(fields=['Pesel'], name='customer_pesel_idx'),
+                    models.Index(fields=['Identification'], name='customer_identification_idx')]
+
+
+""" Account QuerySet """
+class AccountQuerySet(models.QuerySet):
+
+    # Columns shown by the account list pages, the account type is shown by its key stored in the row
+    list_fields = ['Id_account', 'Number_IBAN', 'Balance', 'Debit', 'Free_balance', 'Percent', 'Created_date', 'Created_employee', 'FK_Id_account_type']
+
+    def of_customer(self, customer):
+        return self.filter(FK_Id_customer=customer).order_by('-pk')
+
+    def for_list(self):
+        return self.only(*self.list_fields)
+
+    def with_relations(self):
+        # Account type and customer joined in the same query
+        return self.select_related('FK_Id_account_type', 'FK_Id_customer')
+
 
 """ Account Model """
 class AccountModel(models.Model):
@@ -102,6 +125,20 @@ class AccountModel(models.Model):
     FK_Id_account_type = models.ForeignKey('minibankapp.AccountTypeModel', on_delete=models.PROTECT)
     FK_Id_customer = models.ForeignKey('minibankapp.CustomerModel', on_delete=models.PROTECT)
 
+    objects = AccountQuerySet.as_manager()
+
+    @classmethod
+    def check(cls, **kwargs):
+        # MySQL builds account_interest_idx without its condition, which is intended (required_db_features would skip the table)
+        return [error for error in super().check(**kwargs) if error.id != 'models.W037']
+
+    class Meta:
+        indexes = [
+                    # Account lists of a customer
+                    models.Index(fields=['FK_Id_customer', '-Id_account'], name='account_customer_idx'),
+                    # Accounts credited by interest, backends without partial indexes skip it
+                    models.Index(fields=['Id_account'], condition=models.Q(Balance__gt=0, Percent__gt=0), name='account_interest_idx')]
+
 
 """ AccountType Model """
 class AccountTypeModel(models.Model):
@@ -184,6 +221,11 @@ class OperationModel(models.Model):
     
     FK_Id_account = models.ForeignKey('minibankapp.AccountModel', on_delete=models.PROTECT)
 
+    class Meta:
+        indexes = [
+                    # History of an account, newest first
+                    models.Index(fields=['FK_Id_account', '-Operation_date', '-Id_operation'], name='operation_account_date_idx')]
+
 
 """ Log Model """
 class LogModel(models.Model):
@@ -191,7 +233,272 @@ class LogModel(models.Model):
     Id_log = models.AutoField(
                                 primary_key=True)
     Date_log = models.DateTimeField(
-                                auto_now_add=True)
+                                default=timezone.now)
+    Action_log = models.CharField(
+                                max_length=50)
+    Function_log = models.CharField(
+                                max_length=50)
+    Duration_log = models.DecimalField(
+                                max_digits=12,
+                                decimal_places=6)
+    Data_log = models.CharField(
+                                max_length=250,
+                                blank=True)
+    User_log = models.CharField(
+                                max_length=50)
+    Status_log = models.CharField(
+                                max_length=20)
+    Queries_log = models.IntegerField(
+                                default=0)
+    Db_time_log = models.DecimalField(
+                                max_digits=12,
+                                decimal_places=6,
+                                default=0)
+    Slowest_query_log = models.CharField(
+                                max_length=250,
+                                blank=True)
+    Alert_log = models.BooleanField(
+                                default=False)
+
+    class Meta:
+        indexes = [
+                    models.Index(fields=['-Date_log', '-Id_log'], name='log_date_idx')]
+
+
+""" Interest run Model """
+class InterestRunModel(models.Model):
+
+    status_choice = [
+                    ('Pending', 'Pending'),
+                    ('Running', 'Running'),
+                    ('Done', 'Done')]
+
+    Id_run = models.AutoField(
+                                primary_key=True,
+                                verbose_name='Id run')
+    Period = models.CharField(
+                                max_length=7,
+                                unique=True,
+                                validators=[RegexValidator(regex='^[0-9]{4}-[0-9]{2}$')],
+                                verbose_name='Period')
+    Status_run = models.CharField(
+                                max_length=10,
+                                choices=status_choice,
+                                default='Pending',
+                                verbose_name='Status')
+    Counter = models.IntegerField(
+                                default=0,
+                                verbose_name='Counter')
+    Created_date = models.DateTimeField(
+                                auto_now_add=True,
+                                verbose_name='Created date')
+    Finished_date = models.DateTimeField(
+                                null=True,
+                                blank=True,
+                                verbose_name='Finished date')
+    Created_employee = models.CharField(
+                                max_length=50,
+                                verbose_name='Employee')
+
+
+""" Interest partition Model """
+class InterestPartitionModel(models.Model):
+
+    Id_partition = models.AutoField(
+                                primary_key=True,
+                                verbose_name='Id partition')
+    Range_from = models.IntegerField(
+                                verbose_name='Range from')
+    Range_to = models.IntegerField(
+                                null=True,
+                                blank=True,
+                                verbose_name='Range to')
+    Last_id_account = models.IntegerField(
+                                verbose_name='Last id account')
+    Counter = models.IntegerField(
+                                default=0,
+                                verbose_name='Counter')
+    Status_partition = models.CharField(
+                                max_length=10,
+                                choices=InterestRunModel.status_choice,
+                                default='Pending',
+                                verbose_name='Status')
+
+    FK_Id_run = models.ForeignKey('minibankapp.InterestRunModel', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+                        models.UniqueConstraint(fields=['FK_Id_run', 'Range_from'], name='unique_interest_partition')]
+
+
+""" Export job Model """
+class ExportJobModel(models.Model):
+
+    format_choice = [
+                    ('xlsx', 'XLSX'),
+                    ('csv', 'CSV'),
+                    ('parquet', 'Parquet')]
+    status_choice = [
+                    ('Pending', 'Pending'),
+                    ('Running', 'Running'),
+                    ('Done', 'Done'),
+                    ('Failed', 'Failed')]
+
+    Id_job = models.AutoField(
+                                primary_key=True,
+                                verbose_name='Id job')
+    Format_job = models.CharField(
+                                max_length=10,
+                                choices=format_choice,
+                                default='xlsx',
+                                verbose_name='Format')
+    Status_job = models.CharField(
+                                max_length=10,
+                                choices=status_choice,
+                                default='Pending',
+                                verbose_name='Status')
+    Last_id_operation = models.IntegerField(
+                                default=0,
+                                verbose_name='Last id operation')
+    File_name = models.CharField(
+                                max_length=255,
+                                blank=True,
+                                verbose_name='File name')
+    File_size = models.BigIntegerField(
+                                default=0,
+                                verbose_name='File size')
+    Error_job = models.CharField(
+                                max_length=250,
+                                blank=True,
+                                verbose_name='Error')
+    Created_date = models.DateTimeField(
+                                auto_now_add=True,
+                                verbose_name='Created date')
+    Started_date = models.DateTimeField(
+                                null=True,
+                                blank=True,
+                                verbose_name='Started date')
+    Finished_date = models.DateTimeField(
+                                null=True,
+                                blank=True,
+                                verbose_name='Finished date')
+    Created_employee = models.CharField(
+                                max_length=50,
+                                verbose_name='Employee')
+
+    # Analytics export of all accounts has no account
+    FK_Id_account = models.ForeignKey('minibankapp.AccountModel', on_delete=models.CASCADE, null=True, blank=True)
+
+
+""" Log rollup Model """
+class LogRollupModel(models.Model):
+
+    Id_rollup = models.AutoField(
+                                primary_key=True)
+    Action_rollup = models.CharField(
+                                max_length=50)
+    Minute_rollup = models.DateTimeField(
+                                db_index=True)
+    Count_rollup = models.IntegerField()
+    Sum_rollup = models.BigIntegerField()
+    Max_rollup = models.BigIntegerField()
+    Buckets_rollup = models.TextField()
+
+
+""" Customer trigram Model """
+class CustomerTrigramModel(models.Model):
+
+    Id_trigram = models.BigAutoField(
+                                primary_key=True)
+    Trigram = models.CharField(
+                                max_length=3)
+
+    FK_Id_customer = models.ForeignKey('minibankapp.CustomerModel', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+                        models.UniqueConstraint(fields=['Trigram', 'FK_Id_customer'], name='unique_customer_trigram')]
+
+
+""" Trigram statistic Model """
+class TrigramStatModel(models.Model):
+
+    Trigram = models.CharField(
+                                max_length=3,
+                                primary_key=True)
+    Count_trigram = models.IntegerField(
+                                default=0)
+
+
+""" Balance snapshot Model """
+class BalanceSnapshotModel(models.Model):
+
+    Id_snapshot = models.BigAutoField(
+                                primary_key=True)
+    Snapshot_date = models.DateField(
+                                verbose_name='Snapshot date')
+    Closing_balance = models.DecimalField(
+                                max_digits=12,
+                                decimal_places=2,
+                                verbose_name='Closing balance')
+    Debit_total = models.DecimalField(
+                                max_digits=14,
+                                decimal_places=2,
+                                default=0,
+                                verbose_name='Debit total')
+    Credit_total = models.DecimalField(
+                                max_digits=14,
+                                decimal_places=2,
+                                default=0,
+                                verbose_name='Credit total')
+    Operation_count = models.IntegerField(
+                                default=0,
+                                verbose_name='Operation count')
+
+    FK_Id_account = models.ForeignKey('minibankapp.AccountModel', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+                        models.UniqueConstraint(fields=['FK_Id_account', 'Snapshot_date'], name='unique_balance_snapshot')]
+
+
+""" Operation archive Model """
+class OperationArchiveModel(models.Model):
+
+    Id_operation = models.IntegerField(
+                                primary_key=True,
+                                verbose_name='Id operation')
+    Type_operation = models.IntegerField(
+                                choices=OperationModel.type_choice,
+                                verbose_name='Type operation')
+    Value_operation = models.DecimalField(
+                                max_digits=12,
+                                decimal_places=2,
+                                default=0,
+                                verbose_name='Value operation')
+    Balance_after_operation = models.DecimalField(
+                                max_digits=12,
+                                decimal_places=2,
+                                verbose_name='Balance after operation')
+    Operation_date = models.DateTimeField(
+                                verbose_name='Operation date')
+    Operation_employee = models.CharField(
+                                max_length=50,
+                                verbose_name='Employee')
+
+    FK_Id_account = models.ForeignKey('minibankapp.AccountModel', on_delete=models.PROTECT)
+
+    class Meta:
+        indexes = [
+                    models.Index(fields=['FK_Id_account', '-Operation_date', '-Id_operation'], name='archive_account_date_idx')]
+
+
+""" Log archive Model """
+class LogArchiveModel(models.Model):
+
+    Id_log = models.IntegerField(
+                                primary_key=True)
+    Date_log = models.DateTimeField()
     Action_log = models.CharField(
                                 max_length=50)
     Function_log = models.CharField(
@@ -206,3 +513,48 @@ class LogModel(models.Model):
                                 max_length=50)
     Status_log = models.CharField(
                                 max_length=20)
+    Queries_log = models.IntegerField(
+                                default=0)
+    Db_time_log = models.DecimalField(
+                                max_digits=12,
+                                decimal_places=6,
+                                default=0)
+    Slowest_query_log = models.CharField(
+                                max_length=250,
+                                blank=True)
+    Alert_log = models.BooleanField(
+                                default=False)
+
+    class Meta:
+        indexes = [
+                    models.Index(fields=['-Date_log', '-Id_log'], name='log_archive_date_idx')]
+
+
+""" Archive partition Model """
+class ArchivePartitionModel(models.Model):
+
+    table_choice = [
+                    ('operation', 'Operations'),
+                    ('log', 'Logs')]
+
+    Id_partition = models.AutoField(
+                                primary_key=True,
+                                verbose_name='Id partition')
+    Table_name = models.CharField(
+                                max_length=20,
+                                choices=table_choice,
+                                verbose_name='Table')
+    Period = models.CharField(
+                                max_length=7,
+                                validators=[RegexValidator(regex='^[0-9]{4}-[0-9]{2}$')],
+                                verbose_name='Period')
+    Counter = models.IntegerField(
+                                default=0,
+                                verbose_name='Counter')
+    Archived_date = models.DateTimeField(
+                                auto_now=True,
+                                verbose_name='Archived date')
+
+    class Meta:
+        constraints = [
+                        models.UniqueConstraint(fields=['Table_name', 'Period'], name='unique_archive_partition')]
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import json
+from decimal import (Decimal, InvalidOperation)
+from time import perf_counter
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import (F, Q)
+from .models import (AccountModel, OperationModel)
+from .validators import validator_free_balance
+from .snapshots import apply_operations
+
+
+# Balance columns hold 12 digits with 2 decimal places
+balance_limit = 10 ** 10
+
+
+""" Posting of single operation """
+def post_operation(account_id, type_operation, value_operation, employee):
+    # Operation type
+    if type_operation == 2:
+        value_operation = value_operation * (-1)
+    with transaction.atomic():
+        # Conditional UPDATE locks the account row, checks free balance and column range and applies the delta in one statement
+        in_range = Q(Balance__lt=balance_limit - value_operation, Free_balance__lt=balance_limit - value_operation)
+        updated = (AccountModel.objects
+                                .filter(in_range, pk=account_id, Free_balance__gte=-value_operation)
+                                .update(
+                                        Balance=F('Balance') + value_operation,
+                                        Free_balance=F('Free_balance') + value_operation))
+        if not updated:
+            if AccountModel.objects.filter(~in_range, pk=account_id).exists():
+                raise ValidationError({'Balance': ['Balance after operation out of range.']})
+            raise ValidationError({'Free_balance': ['Value operation / Debit out of free balance limit.']})
+        # Row stays locked until commit, so the balance read back belongs to this operation
+        balance_after_operation = AccountModel.objects.values_list('Balance', flat=True).get(pk=account_id)
+        operation = OperationModel(
+                                    Type_operation = type_operation,
+                                    Value_operation = value_operation,
+                                    Balance_after_operation = balance_after_operation,
+                                    Operation_employee = str(employee),
+                                    FK_Id_account_id = account_id)
+        operation.full_clean(exclude=['FK_Id_account'])
+        operation.save()
+        apply_operations([operation])
+    return operation
+
+
+""" Batch posting """
+class BatchPostingClass:
+
+    type_choice = {1: 'Deposit', 2: 'Withdrawal'}
+    balance_limit = balance_limit
+
+    def __init__(self, employee, chunk_size=500):
+        self.employee = str(employee)
+        self.chunk_size = chunk_size
+        self.results = []
+        self.accepted = 0
+        self.rejected = 0
+        self.duration = 0
+
+    def reject(self, line_number, account, message):
+        self.results.append((line_number, account, 'Rejected', message))
+        self.rejected += 1
+
+    def parse_line(self, line_number, record):
+        # Returns (account, type, value) or None for rejected line
+        try:
+            account, type_operation, value_operation = record
+            account = int(account)
+            type_operation = int(type_operation)
+            value_operation = Decimal(str(value_operation).strip())
+        except (TypeError, ValueError, InvalidOperation):
+            self.reject(line_number, '', 'Line should contain account, type and value.')
+            return None
+        if type_operation not in self.type_choice:
+            self.reject(line_number, account, 'Type operation should be 1 (Deposit) or 2 (Withdrawal).')
+        elif not value_operation.is_finite() or value_operation <= 0 or value_operation != round(value_operation, 2):
+            self.reject(line_number, account, 'Value operation should be positive with at most 2 decimal places.')
+        elif value_operation >= 10 ** 10:
+            self.reject(line_number, account, 'Value operation out of range.')
+        else:
+            return (account, type_operation, value_operation)
+        return None
+
+    def read(self, stream, file_format='csv'):
+        # Yields (line number, record) from CSV rows or JSON lines
+        first_row = True
+        for line_number, line in enumerate(stream, 1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8-sig')
+            line = line.strip().lstrip('\ufeff')
+            if not line:
+                continue
+            if file_format == 'json':
+                try:
+                    data = json.loads(line)
+                    yield line_number, (data.get('account'), data.get('type'), data.get('value'))
+                except (ValueError, AttributeError):
+                    yield line_number, None
+            else:
+                row = next(csv.reader([line], delimiter=';' if ';' in line else ','))
+                # Header is the first row without an account number, wherever the file starts
+                if first_row:
+                    first_row = False
+                    if row and not row[0].strip().isdigit():
+                        continue
+                yield line_number, row
+
+    def post_chunk(self, groups):
+        operations = []
+        with transaction.atomic():
+            # Every account of the chunk is locked once, in primary key order to avoid deadlocks
+            accounts = AccountModel.objects.select_for_update().only('Balance', 'Free_balance').filter(pk__in=groups.keys()).order_by('pk')
+            accounts = {account.pk: account for account in accounts}
+            updated = {}
+            for account_id, lines in groups.items():
+                account = accounts.get(account_id)
+                for line_number, type_operation, value_operation in lines:
+                    if account is None:
+                        self.reject(line_number, account_id, 'Account does not exist.')
+                        continue
+                    if type_operation == 2:
+                        value_operation = value_operation * (-1)
+                    try:
+                        validator_free_balance(account.Free_balance + value_operation)
+                    except ValidationError as error_message:
+                        self.reject(line_number, account_id, error_message.messages[0])
+                        continue
+                    # Balances have to fit their columns, a line over the limit is rejected instead of the whole chunk
+                    if max(abs(account.Balance + value_operation), abs(account.Free_balance + value_operation)) >= self.balance_limit:
+                        self.reject(line_number, account_id, 'Balance after operation out of range.')
+                        continue
+                    account.Balance = account.Balance + value_operation
+                    account.Free_balance = account.Free_balance + value_operation
+                    operations.append(OperationModel(
+                                                    Type_operation = type_operation,
+                                                    Value_operation = value_operation,
+                                                    Balance_after_operation = account.Balance,
+                                                    Operation_employee = self.employee,
+                                                    FK_Id_account_id = account_id))
+                    self.results.append((line_number, account_id, 'Accepted', self.type_choice[type_operation]))
+                    self.accepted += 1
+                    updated[account_id] = account
+            AccountModel.objects.bulk_update(updated.values(), ['Balance', 'Free_balance'])
+            OperationModel.objects.bulk_create(operations)
+            apply_operations(operations)
+
+    def run(self, stream, file_format='csv'):
+        start_time = perf_counter()
+        groups = {}
+        for line_number, record in self.read(stream, file_format):
+            line = self.parse_line(line_number, record)
+            if line is None:
+                continue
+            account, type_operation, value_operation = line
+            # Deltas of an account are applied in file order
+            groups.setdefault(account, []).append((line_number, type_operation, value_operation))
+        account_ids = list(groups)
+        for number in range(0, len(account_ids), self.chunk_size):
+            self.post_chunk({account_id: groups[account_id] for account_id in account_ids[number:number + self.chunk_size]})
+        self.results.sort()
+        self.duration = perf_counter() - start_time
+        return self.results
+
+    @property
+    def throughput(self):
+        if not self.duration:
+            return 0
+        return round((self.accepted + self.rejected) / self.duration, 2)
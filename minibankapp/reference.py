@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import uuid
+import threading
+from time import monotonic
+from django.conf import settings
+from django.core.cache import cache
+from .models import (ParameterModel, AccountTypeModel)
+
+
+""" Reference data cache """
+class ReferenceDataClass:
+
+    version_key = 'minibank:reference:version'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.data = None
+        self.checked = 0
+
+    def load(self):
+        parameter = ParameterModel.objects.values('Country_code', 'Bank_number').first()
+        account_types = {
+                        account_type['Id_account_type']: account_type
+                        for account_type in AccountTypeModel.objects.values('Id_account_type', 'Subaccount', 'Percent')}
+        return {'parameter': parameter, 'account_types': account_types}
+
+    def get_data(self):
+        # Process copy is trusted for MINIBANK_REFERENCE_TTL seconds, then the shared version is checked
+        with self.lock:
+            if self.data is not None and monotonic() - self.checked < getattr(settings, 'MINIBANK_REFERENCE_TTL', 5):
+                return self.data
+        version = cache.get(self.version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            cache.add(self.version_key, version, timeout=None)
+            version = cache.get(self.version_key, version)
+        with self.lock:
+            if self.data is not None and self.version == version:
+                self.checked = monotonic()
+                return self.data
+        # Data of other versions is never read again, random version keys can not meet stale entries
+        data = cache.get(f'{self.version_key}:{version}')
+        if data is None:
+            data = self.load()
+            cache.set(f'{self.version_key}:{version}', data, timeout=None)
+        with self.lock:
+            self.version = version
+            self.data = data
+            self.checked = monotonic()
+        return data
+
+    def invalidate(self):
+        cache.set(self.version_key, uuid.uuid4().hex, timeout=None)
+        with self.lock:
+            self.data = None
+
+    def parameter(self):
+        parameter = self.get_data()['parameter']
+        if parameter is None:
+            raise ParameterModel.DoesNotExist('ParameterModel matching query does not exist.')
+        return parameter
+
+    def account_type(self, id_account_type):
+        account_types = self.get_data()['account_types']
+        if id_account_type not in account_types:
+            # Account type added since the cached version was loaded, read once more from the database
+            self.invalidate()
+            account_types = self.get_data()['account_types']
+        try:
+            return account_types[id_account_type]
+        except KeyError:
+            raise AccountTypeModel.DoesNotExist('AccountTypeModel matching query does not exist.')
+
+    def account_types(self):
+        return self.get_data()['account_types']
+
+
+reference_data = ReferenceDataClass()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+import re
+import unicodedata
+from collections import Counter
+from django.db import transaction
+from django.db.models import (Count, F)
+from . import models
+from .models import (CustomerModel, CustomerTrigramModel, TrigramStatModel)
+
+
+search_fields = ['First_name', 'Last_name', 'City', 'Street', 'Postal_code']
+
+
+def normalize(text):
+    # Lower case without diacritics, 'ł' has no decomposition
+    text = unicodedata.normalize('NFKD', str(text).lower().replace('ł', 'l'))
+    return ''.join(character for character in text if not unicodedata.combining(character))
+
+
+def word_trigrams(text):
+    # Every word padded with '_' (never part of a word), so beginnings and ends of words weigh more
+    result = []
+    for word in re.findall(r'[a-z0-9]+', normalize(text)):
+        word = f'__{word}_'
+        result.append({word[number:number + 3] for number in range(len(word) - 2)})
+    return result
+
+
+def trigrams(text):
+    return set().union(*word_trigrams(text))
+
+
+def customer_trigrams(customer):
+    return trigrams(' '.join(str(getattr(customer, field_name)) for field_name in search_fields))
+
+
+def change_statistics(counter, sign):
+    for trigram, count in counter.items():
+        updated = TrigramStatModel.objects.filter(pk=trigram).update(Count_trigram=F('Count_trigram') + sign * count)
+        if not updated and sign > 0:
+            # Row inserted by a concurrent index in between is found by get_or_create (IntegrityError), the count is added to it
+            statistic, created = TrigramStatModel.objects.get_or_create(Trigram=trigram, defaults={'Count_trigram': count})
+            if not created:
+                TrigramStatModel.objects.filter(pk=trigram).update(Count_trigram=F('Count_trigram') + count)
+
+
+def index_customer(customer):
+    # Only changed trigrams are written, an edit of a customer touches few rows
+    with transaction.atomic():
+        old_trigrams = set(CustomerTrigramModel.objects.filter(FK_Id_customer=customer.pk).values_list('Trigram', flat=True))
+        new_trigrams = customer_trigrams(customer)
+        CustomerTrigramModel.objects.filter(FK_Id_customer=customer.pk, Trigram__in=old_trigrams - new_trigrams).delete()
+        CustomerTrigramModel.objects.bulk_create([
+                                                CustomerTrigramModel(Trigram=trigram, FK_Id_customer_id=customer.pk)
+                                                for trigram in new_trigrams - old_trigrams])
+        change_statistics(Counter(old_trigrams - new_trigrams), -1)
+        change_statistics(Counter(new_trigrams - old_trigrams), 1)
+
+
+def unindex_customer(customer):
+    # Index rows themselves go with the customer (CASCADE)
+    old_trigrams = CustomerTrigramModel.objects.filter(FK_Id_customer=customer.pk).values_list('Trigram', flat=True)
+    change_statistics(Counter(old_trigrams), -1)
+
+
+def rebuild_index(batch_size=5000, apps=None):
+    # Customers created by bulk_create (benchmarks, imports) bypass the signals, migrations pass their historical models
+    if apps is not None:
+        CustomerModel = apps.get_model('minibankapp', 'CustomerModel')
+        CustomerTrigramModel = apps.get_model('minibankapp', 'CustomerTrigramModel')
+        TrigramStatModel = apps.get_model('minibankapp', 'TrigramStatModel')
+    else:
+        CustomerModel, CustomerTrigramModel, TrigramStatModel = models.CustomerModel, models.CustomerTrigramModel, models.TrigramStatModel
+    statistics = Counter()
+    with transaction.atomic():
+        CustomerTrigramModel.objects.all().delete()
+        TrigramStatModel.objects.all().delete()
+        customers = CustomerModel.objects.only('pk', *search_fields).order_by('pk')
+        rows = []
+        for customer in customers.iterator(chunk_size=batch_size):
+            customer_set = customer_trigrams(customer)
+            statistics.update(customer_set)
+            rows.extend(CustomerTrigramModel(Trigram=trigram, FK_Id_customer_id=customer.pk) for trigram in customer_set)
+            if len(rows) >= batch_size:
+                CustomerTrigramModel.objects.bulk_create(rows)
+                rows = []
+        CustomerTrigramModel.objects.bulk_create(rows)
+        TrigramStatModel.objects.bulk_create(
+                                            [TrigramStatModel(Trigram=trigram, Count_trigram=count) for trigram, count in statistics.items()],
+                                            batch_size=batch_size)
+    return sum(statistics.values())
+
+
+def search_customers(text, limit=100, max_postings=2000):
+    # Returns ids of customers ranked by share of query trigrams they contain
+    words = word_trigrams(text)
+    query_trigrams = set().union(*words)
+    if not query_trigrams:
+        return []
+    statistics = dict(TrigramStatModel.objects.filter(pk__in=query_trigrams, Count_trigram__gt=0).values_list('Trigram', 'Count_trigram'))
+    # Candidates come from the rarest trigram of every word and further rare trigrams while the postings fit max postings,
+    # so the cost of a lookup stays bounded
+    selected = {min(word & statistics.keys(), key=statistics.get) for word in words if word & statistics.keys()}
+    postings = sum(statistics[trigram] for trigram in selected)
+    for trigram in sorted(statistics.keys() - selected, key=statistics.get):
+        if postings + statistics[trigram] > max_postings:
+            break
+        selected.add(trigram)
+        postings += statistics[trigram]
+    if not selected:
+        return []
+    # Very common trigrams contribute their newest postings only, every query reads a range of the unique index
+    hits = Counter()
+    for trigram in selected:
+        hits.update(CustomerTrigramModel.objects
+                                        .filter(Trigram=trigram)
+                                        .order_by('-FK_Id_customer')
+                                        .values_list('FK_Id_customer', flat=True)[:max_postings // len(selected)])
+    candidates = sorted(hits, key=lambda customer_id: (-hits[customer_id], -customer_id))[:limit * 2]
+    # Final rank on all query trigrams, probed through the unique index for the candidates only
+    ranking = (CustomerTrigramModel.objects
+                                .filter(FK_Id_customer__in=candidates, Trigram__in=query_trigrams)
+                                .values('FK_Id_customer')
+                                .annotate(hits=Count('pk'))
+                                .filter(hits__gte=max(len(query_trigrams) * 0.3, 1))
+                                .order_by('-hits', '-FK_Id_customer')
+                                .values_list('FK_Id_customer', flat=True)[:limit])
+    return list(ranking)
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import datetime
+from contextlib import contextmanager
+from decimal import Decimal
+from time import perf_counter
+from django.core.management.color import no_style
+from django.db import (transaction, connection)
+from .models import (CustomerModel, AccountModel, AccountTypeModel, ParameterModel, OperationModel, LogModel, BalanceSnapshotModel)
+from .iban import build_iban
+from .reference import reference_data
+from .search import rebuild_index
+from .snapshots import (snapshot_date, day_start)
+
+
+female_names = ['Anna', 'Maria', 'Katarzyna', 'Małgorzata', 'Agnieszka', 'Barbara', 'Ewa', 'Krystyna', 'Magdalena', 'Joanna', 'Zofia', 'Monika']
+male_names = ['Piotr', 'Krzysztof', 'Andrzej', 'Tomasz', 'Paweł', 'Michał', 'Jan', 'Marcin', 'Stanisław', 'Jakub', 'Adam', 'Marek']
+last_names = ['Nowak', 'Kowalski', 'Wiśniewski', 'Wójcik', 'Kowalczyk', 'Kamiński', 'Lewandowski', 'Zieliński', 'Szymański', 'Woźniak',
+                'Dąbrowski', 'Kozłowski', 'Jankowski', 'Mazur', 'Kwiatkowski', 'Krawczyk', 'Piotrowski', 'Grabowski', 'Nowakowski', 'Pawłowski']
+cities = ['Warszawa', 'Kraków', 'Łódź', 'Wrocław', 'Poznań', 'Gdańsk', 'Szczecin', 'Bydgoszcz', 'Lublin', 'Białystok', 'Katowice', 'Gdynia']
+streets = ['Lipowa', 'Polna', 'Leśna', 'Słoneczna', 'Krótka', 'Szkolna', 'Ogrodowa', 'Długa', 'Kościuszki', 'Mickiewicza']
+account_types = [
+                ('P-01', 'Personal account', '000001', Decimal('0.50')),
+                ('S-01', 'Savings account', '000002', Decimal('2.50')),
+                ('B-01', 'Business account', '000003', Decimal('0.10'))]
+log_paths = ['/customer/view/', '/account/view/', '/history/operation/', '/operation/create/', '/monitoring/']
+
+
+def scatter(number, capacity, seed):
+    # Bijection of 0 .. capacity - 1, unique values without a set of used ones
+    multiplier = 2654435761
+    while math.gcd(multiplier, capacity) != 1:
+        multiplier += 2
+    return (number * multiplier + seed) % capacity
+
+
+def pesel_number(birth_date, serial):
+    # Century is carried by the month, 2000-2099 adds 20
+    month = birth_date.month + (20 if birth_date.year >= 2000 else 0)
+    digits = f'{birth_date.year % 100:02d}{month:02d}{birth_date.day:02d}{serial:04d}'
+    checksum = sum(int(digit) * weight for digit, weight in zip(digits, [1, 3, 7, 9, 1, 3, 7, 9, 1, 3]))
+    return digits + str((10 - checksum % 10) % 10)
+
+
+def identification_number(number):
+    # ID card: three letters of series, check digit, five digits
+    letters = ''
+    for position in range(3):
+        letters = chr(ord('A') + number // 100000 // 26 ** position % 26) + letters
+    digits = f'{number % 100000:05d}'
+    values = [ord(letter) - 55 for letter in letters] + [int(digit) for digit in digits]
+    check = sum(value * weight for value, weight in zip(values, [7, 3, 1, 7, 3, 1, 7, 3])) % 10
+    return f'{letters}{check}{digits}'
+
+
+@contextmanager
+def backdated(*fields):
+    # bulk_create fills auto_now_add fields with the current time, generated history keeps its own dates
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+""" Synthetic bank """
+class BankSeederClass:
+
+    birth_from = datetime.date(1940, 1, 1)
+    birth_to = datetime.date(2005, 12, 31)
+
+    def __init__(self, customers=1000, accounts=None, operations=None, logs=0, years=3, seed=1, end_date=None, batch_size=5000):
+        self.customers = customers
+        self.accounts = customers * 2 if accounts is None else accounts
+        self.operations = self.accounts * 10 if operations is None else operations
+        self.logs = logs
+        self.years = years
+        self.seed = seed
+        self.end_date = end_date or datetime.date.today()
+        self.batch_size = batch_size
+        self.generator = random.Random(seed)
+        self.counters = {'customers': 0, 'accounts': 0, 'operations': 0, 'snapshots': 0, 'logs': 0}
+        self.buffers = {'customers': [], 'accounts': [], 'operations': [], 'snapshots': []}
+        self.duration = 0
+
+    def flush(self):
+        # Parents before children, foreign keys are checked immediately on MySQL
+        with transaction.atomic():
+            for name, model in [('customers', CustomerModel), ('accounts', AccountModel), ('operations', OperationModel), ('snapshots', BalanceSnapshotModel)]:
+                model.objects.bulk_create(self.buffers[name], batch_size=self.batch_size)
+                self.counters[name] += len(self.buffers[name])
+                self.buffers[name] = []
+
+    def append(self, name, instance):
+        self.buffers[name].append(instance)
+        if len(self.buffers[name]) >= self.batch_size:
+            self.flush()
+
+    def reference(self):
+        for id_account_type, description, subaccount, percent in account_types:
+            AccountTypeModel.objects.get_or_create(
+                                                    Id_account_type=id_account_type,
+                                                    defaults={'Description': description, 'Subaccount': subaccount, 'Percent': percent})
+        if not ParameterModel.objects.exists():
+            ParameterModel.objects.create(Country_code='PL', Bank_number='10101010')
+        # Signals refresh the cache on commit, generated IBANs need the data now
+        reference_data.invalidate()
+        return [reference_data.account_type(id_account_type) for id_account_type, description, subaccount, percent in account_types]
+
+    def first_id(self, model):
+        # Explicit keys: accounts, IBANs and operations are linked without reading the rows back
+        last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+        return (last or 0) + 1
+
+    def share(self, remaining, left):
+        # Exact totals: every owner draws around the mean of what is left, the last one takes the rest
+        if left == 1:
+            return remaining
+        value = self.generator.random() * 2 * remaining / left
+        return min(remaining, int(value) + (1 if self.generator.random() < value - int(value) else 0))
+
+    def customer(self, number, id_customer, created_date):
+        generator = self.generator
+        birth_days = (self.birth_to - self.birth_from).days + 1
+        position = scatter(number, birth_days * 10000, self.seed)
+        birth_date = self.birth_from + datetime.timedelta(days=position % birth_days)
+        serial = position // birth_days
+        # Even serial for women, surnames in -ski/-cki take female form
+        last_name = generator.choice(last_names)
+        if generator.random() < 0.2:
+            last_name = f'{last_name}-{generator.choice(last_names)}'
+        if serial % 2 == 0:
+            first_name = generator.choice(female_names)
+            last_name = '-'.join(part[:-1] + 'a' if part.endswith('ki') else part for part in last_name.split('-'))
+        else:
+            first_name = generator.choice(male_names)
+        return CustomerModel(
+                            Id_customer=id_customer,
+                            First_name=first_name,
+                            Last_name=last_name,
+                            Street=generator.choice(streets),
+                            House=str(generator.randint(1, 200)),
+                            Apartment=str(generator.randint(1, 80)) if generator.random() < 0.6 else '',
+                            Postal_code=f'{generator.randint(0, 99):02d}-{generator.randint(0, 999):03d}',
+                            City=generator.choice(cities),
+                            Pesel=pesel_number(birth_date, serial),
+                            Birth_date=birth_date,
+                            Birth_city=generator.choice(cities),
+                            Identification=identification_number(scatter(number, 26 ** 3 * 100000, self.seed)),
+                            Created_date=created_date,
+                            Created_employee='seed')
+
+    def history(self, account, opened, count):
+        # Operations of one account in date order, balance never leaves the debit limit
+        generator = self.generator
+        operations = []
+        snapshots = []
+        seconds = max(int((day_start(self.end_date) - opened).total_seconds()), 1)
+        dates = sorted(opened + datetime.timedelta(seconds=generator.randint(0, seconds - 1)) for number in range(count))
+        balance = Decimal('0.00')
+        day = None
+        for operation_date in dates:
+            type_operation = generator.choices([1, 2, 3], weights=[55, 40, 5])[0]
+            value_operation = Decimal('0.00')
+            if type_operation == 3 and account.Percent > 0:
+                value_operation = (balance * account.Percent / 1200).quantize(Decimal('0.01'))
+            elif type_operation == 2 and balance + account.Debit >= 1:
+                value_operation = -min(Decimal(generator.randint(100, 200000)) / 100, balance + account.Debit)
+            # Interest below a cent or withdrawal without funds becomes a deposit
+            if value_operation == 0 or type_operation == 3 and value_operation < 0:
+                type_operation = 1
+                value_operation = Decimal(generator.randint(100, 500000)) / 100
+            balance = balance + value_operation
+            operations.append(OperationModel(
+                                                    Type_operation=type_operation,
+                                                    Value_operation=value_operation,
+                                                    Balance_after_operation=balance,
+                                                    Operation_date=operation_date,
+                                                    Operation_employee='seed',
+                                                    FK_Id_account_id=account.Id_account))
+            date = snapshot_date(operation_date)
+            if day is None or day.Snapshot_date != date:
+                if day is not None:
+                    snapshots.append(day)
+                day = BalanceSnapshotModel(
+                                        Snapshot_date=date,
+                                        Closing_balance=0,
+                                        Debit_total=Decimal('0.00'),
+                                        Credit_total=Decimal('0.00'),
+                                        Operation_count=0,
+                                        FK_Id_account_id=account.Id_account)
+            day.Closing_balance = balance
+            if value_operation < 0:
+                day.Debit_total = day.Debit_total - value_operation
+            else:
+                day.Credit_total = day.Credit_total + value_operation
+            day.Operation_count = day.Operation_count + 1
+        if day is not None:
+            snapshots.append(day)
+        return balance, operations, snapshots
+
+    def generate_logs(self, start):
+        generator = self.generator
+        seconds = int((day_start(self.end_date) - start).total_seconds())
+        # Logs are written in date order, like the monitoring decorator does
+        step = seconds / max(self.logs, 1)
+        logs = []
+        for number in range(self.logs):
+            duration = Decimal(generator.randint(2000, 400000)) / 1000000
+            logs.append(LogModel(
+                                Date_log=start + datetime.timedelta(seconds=number * step + generator.random() * step),
+                                Action_log=generator.choice(['get', 'post']),
+                                Function_log=f'WSGIRequest - {generator.choice(log_paths)}',
+                                Duration_log=duration,
+                                User_log='seed',
+                                Status_log='Success',
+                                Queries_log=generator.randint(2, 20),
+                                Db_time_log=(duration / 2).quantize(Decimal('0.000001'))))
+            if len(logs) == self.batch_size:
+                LogModel.objects.bulk_create(logs)
+                logs = []
+        LogModel.objects.bulk_create(logs)
+        self.counters['logs'] = self.logs
+
+    def reset_sequences(self):
+        # Rows were inserted with explicit keys, PostgreSQL sequences must continue after them
+        statements = connection.ops.sequence_reset_sql(no_style(), [CustomerModel, AccountModel])
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+    def run(self, search_index=True):
+        start_time = perf_counter()
+        generator = self.generator
+        types = self.reference()
+        start = day_start(self.end_date - datetime.timedelta(days=365 * self.years))
+        span = int((day_start(self.end_date) - start).total_seconds())
+        id_customer = self.first_id(CustomerModel)
+        id_account = self.first_id(AccountModel)
+        remaining_accounts = self.accounts
+        remaining_operations = self.operations
+        with backdated(CustomerModel._meta.get_field('Created_date'), AccountModel._meta.get_field('Created_date'), OperationModel._meta.get_field('Operation_date')):
+            for number in range(self.customers):
+                # Customers join in date order, the last ones keep a day of history
+                created_date = start + datetime.timedelta(seconds=int(span * number / max(self.customers, 1)))
+                self.append('customers', self.customer(number, id_customer, created_date))
+                account_count = self.share(remaining_accounts, self.customers - number)
+                remaining_accounts = remaining_accounts - account_count
+                for account_number in range(account_count):
+                    account_type = generator.choice(types)
+                    opened = created_date + datetime.timedelta(seconds=generator.randint(0, max(int((day_start(self.end_date) - created_date).total_seconds()) // 4, 1)))
+                    operation_count = self.share(remaining_operations, remaining_accounts + account_count - account_number)
+                    remaining_operations = remaining_operations - operation_count
+                    account = AccountModel(
+                                            Id_account=id_account,
+                                            Number_IBAN=build_iban(id_account, id_customer, account_type['Subaccount']),
+                                            Debit=Decimal(generator.choice([0, 0, 0, 500, 1000, 5000])),
+                                            Percent=account_type['Percent'],
+                                            Created_date=opened,
+                                            Created_employee='seed',
+                                            FK_Id_account_type_id=account_type['Id_account_type'],
+                                            FK_Id_customer_id=id_customer)
+                    account.Balance, operations, snapshots = self.history(account, opened, operation_count)
+                    account.Free_balance = account.Balance + account.Debit
+                    # Account is buffered before its operations, a flush never writes orphans
+                    self.append('accounts', account)
+                    for operation in operations:
+                        self.append('operations', operation)
+                    for snapshot in snapshots:
+                        self.append('snapshots', snapshot)
+                    id_account += 1
+                id_customer += 1
+            self.flush()
+        self.reset_sequences()
+        if self.logs:
+            self.generate_logs(start)
+        # Customers created by bulk_create bypass the search signals
+        if search_index and self.customers:
+            rebuild_index(batch_size=self.batch_size)
+        self.duration = perf_counter() - start_time
+        return self.counters
+
+    @property
+    def throughput(self):
+        if not self.duration:
+            return 0
+        return round(sum(self.counters.values()) / self.duration, 2)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from django.db import transaction
+from django.db.models.signals import (post_save, post_delete, pre_delete)
+from django.dispatch import receiver
+from .models import (CustomerModel, ParameterModel, AccountTypeModel)
+from .search import (index_customer, unindex_customer)
+from .reference import reference_data
+
+
+@receiver(post_save, sender=CustomerModel)
+def customer_saved(sender, instance, raw=False, **kwargs):
+    # Fixtures are loaded raw, their index is built by rebuild_customer_search
+    if not raw:
+        index_customer(instance)
+
+
+@receiver(pre_delete, sender=CustomerModel)
+def customer_deleted(sender, instance, **kwargs):
+    unindex_customer(instance)
+
+
+@receiver([post_save, post_delete], sender=ParameterModel)
+@receiver([post_save, post_delete], sender=AccountTypeModel)
+def reference_data_changed(sender, **kwargs):
+    # After commit, a worker reloading in between would cache the old rows under the new version
+    transaction.on_commit(reference_data.invalidate)
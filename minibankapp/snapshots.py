@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (Sum, Count, Max, Case, When, F, Value, DecimalField)
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import (AccountModel, OperationModel, BalanceSnapshotModel)
+
+
+def snapshot_date(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def day_start(date):
+    value = datetime.datetime.combine(date, datetime.time.min)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def day_end(date):
+    # Exclusive bound, start of the next day
+    return day_start(date + datetime.timedelta(days=1))
+
+
+def operation_totals():
+    # Withdrawals are stored negative, both totals are positive
+    decimal_field = DecimalField(max_digits=14, decimal_places=2)
+    return {
+            'debit': Sum(Case(When(Value_operation__lt=0, then=-F('Value_operation')), default=Value(0), output_field=decimal_field)),
+            'credit': Sum(Case(When(Value_operation__gt=0, then=F('Value_operation')), default=Value(0), output_field=decimal_field)),
+            'count': Count('pk')}
+
+
+def apply_operations(operations):
+    # Called in the transaction which posted the operations, the locked accounts serialize updates of their snapshots
+    days = {}
+    for operation in operations:
+        day = days.setdefault(
+                            (operation.FK_Id_account_id, snapshot_date(operation.Operation_date)),
+                            {'debit': Decimal(0), 'credit': Decimal(0), 'count': 0, 'closing': None})
+        if operation.Value_operation < 0:
+            day['debit'] = day['debit'] - operation.Value_operation
+        else:
+            day['credit'] = day['credit'] + operation.Value_operation
+        day['count'] = day['count'] + 1
+        day['closing'] = operation.Balance_after_operation
+    if not days:
+        return
+    if len(days) == 1:
+        # Single posting: one conditional UPDATE, INSERT only for the first operation of the day
+        (account_id, date), day = next(iter(days.items()))
+        updated = (BalanceSnapshotModel.objects
+                                        .filter(FK_Id_account=account_id, Snapshot_date=date)
+                                        .update(
+                                                Closing_balance=day['closing'],
+                                                Debit_total=F('Debit_total') + day['debit'],
+                                                Credit_total=F('Credit_total') + day['credit'],
+                                                Operation_count=F('Operation_count') + day['count']))
+        if not updated:
+            BalanceSnapshotModel.objects.create(
+                                                Snapshot_date=date,
+                                                Closing_balance=day['closing'],
+                                                Debit_total=day['debit'],
+                                                Credit_total=day['credit'],
+                                                Operation_count=day['count'],
+                                                FK_Id_account_id=account_id)
+        return
+    snapshots = (BalanceSnapshotModel.objects
+                                    .filter(
+                                            FK_Id_account__in={account_id for account_id, date in days},
+                                            Snapshot_date__in={date for account_id, date in days}))
+    snapshots = {(snapshot.FK_Id_account_id, snapshot.Snapshot_date): snapshot for snapshot in snapshots}
+    updated = []
+    created = []
+    for (account_id, date), day in days.items():
+        snapshot = snapshots.get((account_id, date))
+        if snapshot is None:
+            created.append(BalanceSnapshotModel(
+                                                Snapshot_date=date,
+                                                Closing_balance=day['closing'],
+                                                Debit_total=day['debit'],
+                                                Credit_total=day['credit'],
+                                                Operation_count=day['count'],
+                                                FK_Id_account_id=account_id))
+            continue
+        snapshot.Closing_balance = day['closing']
+        snapshot.Debit_total = snapshot.Debit_total + day['debit']
+        snapshot.Credit_total = snapshot.Credit_total + day['credit']
+        snapshot.Operation_count = snapshot.Operation_count + day['count']
+        updated.append(snapshot)
+    BalanceSnapshotModel.objects.bulk_update(updated, ['Closing_balance', 'Debit_total', 'Credit_total', 'Operation_count'])
+    BalanceSnapshotModel.objects.bulk_create(created)
+
+
+def compact_snapshots(date_from, date_to, chunk_size=1000):
+    # Snapshots of the days are recomputed from operations, this also fills days of operations posted before snapshots existed
+    counter = 0
+    last_id_account = 0
+    while True:
+        with transaction.atomic():
+            # Accounts of the chunk are locked before operations are read, postings wait until their snapshots are written
+            account_ids = list(AccountModel.objects
+                                            .select_for_update()
+                                            .filter(Id_account__gt=last_id_account)
+                                            .order_by('Id_account')
+                                            .values_list('Id_account', flat=True)[:chunk_size])
+            if not account_ids:
+                break
+            last_id_account = account_ids[-1]
+            days = list(OperationModel.objects
+                                    .filter(FK_Id_account__in=account_ids, Operation_date__gte=day_start(date_from), Operation_date__lt=day_end(date_to))
+                                    .annotate(day=TruncDate('Operation_date'))
+                                    .values('FK_Id_account', 'day')
+                                    .annotate(last_id_operation=Max('Id_operation'), **operation_totals())
+                                    .order_by())
+            if not days:
+                continue
+            closing = dict(OperationModel.objects
+                                        .filter(pk__in=[day['last_id_operation'] for day in days])
+                                        .values_list('Id_operation', 'Balance_after_operation'))
+            snapshots = (BalanceSnapshotModel.objects
+                                            .filter(FK_Id_account__in=account_ids, Snapshot_date__gte=date_from, Snapshot_date__lte=date_to))
+            snapshots = {(snapshot.FK_Id_account_id, snapshot.Snapshot_date): snapshot for snapshot in snapshots}
+            updated = []
+            created = []
+            for day in days:
+                snapshot = snapshots.get((day['FK_Id_account'], day['day']))
+                if snapshot is None:
+                    snapshot = BalanceSnapshotModel(FK_Id_account_id=day['FK_Id_account'], Snapshot_date=day['day'])
+                    created.append(snapshot)
+                else:
+                    updated.append(snapshot)
+                snapshot.Closing_balance = closing[day['last_id_operation']]
+                snapshot.Debit_total = day['debit']
+                snapshot.Credit_total = day['credit']
+                snapshot.Operation_count = day['count']
+            BalanceSnapshotModel.objects.bulk_update(updated, ['Closing_balance', 'Debit_total', 'Credit_total', 'Operation_count'])
+            BalanceSnapshotModel.objects.bulk_create(created)
+        counter += len(days)
+    return counter
+
+
+def balance_as_of(account_id, date):
+    # Closing balance of the day: newest snapshot up to the day plus operations after it (none while snapshots are up to date)
+    snapshot = (BalanceSnapshotModel.objects
+                                    .filter(FK_Id_account=account_id, Snapshot_date__lte=date)
+                                    .order_by('-Snapshot_date')
+                                    .values_list('Snapshot_date', 'Closing_balance')
+                                    .first())
+    tail = OperationModel.objects.filter(FK_Id_account=account_id, Operation_date__lt=day_end(date))
+    if snapshot is not None:
+        tail = tail.filter(Operation_date__gte=day_end(snapshot[0]))
+    balance = tail.order_by('-Operation_date', '-pk').values_list('Balance_after_operation', flat=True).first()
+    if balance is not None:
+        return balance
+    return snapshot[1] if snapshot is not None else Decimal('0.00')
+
+
+def period_summary(account_id, date_from, date_to):
+    # Totals of days with snapshot plus operations of the days after the newest snapshot
+    summary = (BalanceSnapshotModel.objects
+                                    .filter(FK_Id_account=account_id, Snapshot_date__gte=date_from, Snapshot_date__lte=date_to)
+                                    .aggregate(
+                                                debit=Sum('Debit_total'),
+                                                credit=Sum('Credit_total'),
+                                                count=Sum('Operation_count'),
+                                                last_date=Max('Snapshot_date')))
+    tail_start = day_start(date_from) if summary['last_date'] is None else day_end(summary['last_date'])
+    tail = (OperationModel.objects
+                        .filter(FK_Id_account=account_id, Operation_date__gte=tail_start, Operation_date__lt=day_end(date_to))
+                        .aggregate(**operation_totals()))
+    return {
+            'opening': balance_as_of(account_id, date_from - datetime.timedelta(days=1)),
+            'closing': balance_as_of(account_id, date_to),
+            'debit': ((summary['debit'] or Decimal(0)) + (tail['debit'] or Decimal(0))).quantize(Decimal('0.01')),
+            'credit': ((summary['credit'] or Decimal(0)) + (tail['credit'] or Decimal(0))).quantize(Decimal('0.01')),
+            'count': (summary['count'] or 0) + tail['count']}
@@ -1,3 +1,945 @@
-from django.test import TestCase
+import re
+import json
+import base64
+import datetime
+import tempfile
+from importlib import import_module
+from io import (BytesIO, StringIO)
+from pathlib import Path
+from decimal import Decimal
+from threading import Thread
+from openpyxl import load_workbook
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.exceptions import ValidationError
+from django.core.management import (call_command, CommandError)
+from django.db import (connection, connections, transaction)
+from unittest import skipIf
+from django.core.cache import cache
+from django.test import (TestCase, TransactionTestCase, Client, RequestFactory, skipUnlessDBFeature)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .models import (CustomerModel, AccountModel, AccountTypeModel, OperationModel, OperationArchiveModel, BalanceSnapshotModel,
+                    InterestRunModel, InterestPartitionModel, ArchivePartitionModel, ExportJobModel, TrigramStatModel,
+                    LogModel, ParameterModel)
+from .posting import (post_operation, BatchPostingClass)
+from .interest import InterestCountingClass
+from .snapshots import (balance_as_of, snapshot_date, day_start, compact_snapshots, period_summary)
+from .archive import (ArchivalClass, operation_history)
+from .reference import reference_data
+from .search import (change_statistics, rebuild_index, search_customers)
+from .ledger import LedgerCheckClass
+from .logsink import LogBufferClass
+from .decorators import QueryCounterClass
+from .functions import SelectCustomerListView
+from .histogram import (LatencyHistogramClass, LatencyRecorderClass, latency_statistics)
+from .exports import (HistoryExportClass, ExportJobClass)
+from .analytics import (AnalyticsExportClass, pyarrow)
+from .seed import BankSeederClass
+from .iban import IbanGeneratorClass
+from .benchmark import (TellerBenchmarkClass, compare_results, async_views)
+from .management.commands.check_query_plans import Command as CheckQueryPlansCommand
 
-# Create your tests here.
+
+def create_customer(pesel='90010112345', identification='ABC123456'):
+    return CustomerModel.objects.create(
+                                        First_name='Jan',
+                                        Last_name='Kowalski',
+                                        Street='Polna',
+                                        House='1',
+                                        Postal_code='00-001',
+                                        City='Warszawa',
+                                        Pesel=pesel,
+                                        Birth_date='1990-01-01',
+                                        Birth_city='Warszawa',
+                                        Identification=identification,
+                                        Created_employee='test')
+
+
+def create_account(balance=0, debit=0):
+    account_type, created = AccountTypeModel.objects.get_or_create(
+                                                                Id_account_type='T-01',
+                                                                defaults={'Description': 'Test', 'Subaccount': '000001'})
+    customer = create_customer()
+    return AccountModel.objects.create(
+                                        Balance=Decimal(balance),
+                                        Debit=Decimal(debit),
+                                        Free_balance=Decimal(balance) + Decimal(debit),
+                                        Created_employee='test',
+                                        FK_Id_account_type=account_type,
+                                        FK_Id_customer=customer)
+
+
+class PostOperationTest(TestCase):
+
+    def setUp(self):
+        self.account = create_account(balance=100, debit=50)
+
+    def test_posting_queries(self):
+        # First operation of the day inserts the daily snapshot, next ones update it
+        for expected in [5, 4]:
+            with CaptureQueriesContext(connection) as context:
+                post_operation(self.account.pk, 1, Decimal('10.00'), 'test')
+            statements = [query['sql'] for query in context.captured_queries if 'SAVEPOINT' not in query['sql']]
+            self.assertEqual(len(statements), expected)
+
+    def test_daily_snapshot(self):
+        post_operation(self.account.pk, 1, Decimal('10.00'), 'test')
+        operation = post_operation(self.account.pk, 2, Decimal('25.50'), 'test')
+        snapshot = BalanceSnapshotModel.objects.get(FK_Id_account=self.account)
+        self.assertEqual(snapshot.Closing_balance, Decimal('84.50'))
+        self.assertEqual(snapshot.Credit_total, Decimal('10.00'))
+        self.assertEqual(snapshot.Debit_total, Decimal('25.50'))
+        self.assertEqual(snapshot.Operation_count, 2)
+        self.assertEqual(balance_as_of(self.account.pk, snapshot_date(operation.Operation_date)), Decimal('84.50'))
+
+    def test_snapshot_backfill(self):
+        # Operation of a day before snapshots existed, the day of the deploy has a partial snapshot
+        post_operation(self.account.pk, 1, Decimal('10.00'), 'test')
+        operation = post_operation(self.account.pk, 2, Decimal('25.50'), 'test')
+        OperationModel.objects.filter(pk=operation.pk - 1).update(Operation_date=day_start(datetime.date(2024, 1, 10)))
+        BalanceSnapshotModel.objects.all().delete()
+        BalanceSnapshotModel.objects.create(FK_Id_account=self.account, Snapshot_date=snapshot_date(operation.Operation_date), Closing_balance=0)
+        import_module('minibankapp.migrations.0033_backfill_balance_snapshots').backfill_snapshots(apps, None)
+        summary = period_summary(self.account.pk, datetime.date(2024, 1, 1), datetime.date(2024, 1, 31))
+        self.assertEqual((summary['closing'], summary['credit'], summary['count']), (Decimal('110.00'), Decimal('10.00'), 1))
+        summary = period_summary(self.account.pk, datetime.date(2024, 1, 1), snapshot_date(operation.Operation_date))
+        self.assertEqual((summary['closing'], summary['debit'], summary['count']), (Decimal('84.50'), Decimal('25.50'), 2))
+        # Compaction gives the same snapshots
+        snapshots = list(BalanceSnapshotModel.objects.order_by('Snapshot_date').values_list('Snapshot_date', 'Closing_balance', 'Operation_count'))
+        compact_snapshots(datetime.date(2024, 1, 1), snapshot_date(operation.Operation_date))
+        self.assertEqual(list(BalanceSnapshotModel.objects.order_by('Snapshot_date').values_list('Snapshot_date', 'Closing_balance', 'Operation_count')), snapshots)
+
+    def test_withdrawal(self):
+        operation = post_operation(self.account.pk, 2, Decimal('30.00'), 'test')
+        self.account.refresh_from_db()
+        self.assertEqual(operation.Value_operation, Decimal('-30.00'))
+        self.assertEqual(operation.Balance_after_operation, Decimal('70.00'))
+        self.assertEqual(self.account.Balance, Decimal('70.00'))
+        self.assertEqual(self.account.Free_balance, Decimal('120.00'))
+
+    def test_withdrawal_out_of_free_balance(self):
+        with self.assertRaises(ValidationError):
+            post_operation(self.account.pk, 2, Decimal('150.01'), 'test')
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.Balance, Decimal('100.00'))
+        self.assertFalse(OperationModel.objects.exists())
+
+    def test_deposit_out_of_range(self):
+        # Free balance would need 13 digits, the UPDATE is guarded instead of overflowing the column
+        with self.assertRaisesMessage(ValidationError, 'Balance after operation out of range.'):
+            post_operation(self.account.pk, 1, Decimal('9999999999.00'), 'test')
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.Free_balance, Decimal('150.00'))
+        self.assertFalse(OperationModel.objects.exists())
+
+    def test_interleaved_withdrawals(self):
+        # Both tellers read free balance 150.00 before either posts, the second withdrawal is rejected by the guard of the UPDATE
+        free_balances = [AccountModel.objects.get(pk=self.account.pk).Free_balance for teller in range(2)]
+        self.assertTrue(all(free_balance >= Decimal('100.00') for free_balance in free_balances))
+        post_operation(self.account.pk, 2, Decimal('100.00'), 'first')
+        with self.assertRaises(ValidationError):
+            post_operation(self.account.pk, 2, Decimal('100.00'), 'second')
+        self.account.refresh_from_db()
+        self.assertEqual((self.account.Balance, self.account.Free_balance), (Decimal('0.00'), Decimal('50.00')))
+        self.assertEqual(list(OperationModel.objects.values_list('Operation_employee', 'Balance_after_operation')), [('first', Decimal('0.00'))])
+
+
+class BatchPostingTest(TestCase):
+
+    def setUp(self):
+        self.account = create_account(balance=100, debit=50)
+        self.large_account = create_account(balance='9999999990.00')
+
+    def test_mixed_lines(self):
+        # Header after an empty line, lines of both accounts in one chunk
+        lines = [
+                '',
+                'account;type;value',
+                f'{self.account.pk};1;10.00',
+                f'{self.large_account.pk};1;20.00',
+                f'{self.account.pk};2;200.00',
+                '999999;1;5.00',
+                'x;1;1.00',
+                f'{self.large_account.pk};2;10.00']
+        results = BatchPostingClass(employee='test').run(lines)
+        statuses = [(line_number, status) for line_number, account, status, message in results]
+        self.assertEqual(statuses, [(3, 'Accepted'), (4, 'Rejected'), (5, 'Rejected'), (6, 'Rejected'), (7, 'Rejected'), (8, 'Accepted')])
+        self.assertEqual(results[1][3], 'Balance after operation out of range.')
+        self.assertEqual(AccountModel.objects.get(pk=self.account.pk).Balance, Decimal('110.00'))
+        self.assertEqual(AccountModel.objects.get(pk=self.large_account.pk).Balance, Decimal('9999999980.00'))
+        self.assertEqual(OperationModel.objects.count(), 2)
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class PostOperationConcurrencyTest(TransactionTestCase):
+
+    threads = 8
+    operations = 25
+
+    def test_concurrent_deposits(self):
+        account = create_account()
+
+        def deposit():
+            try:
+                for number in range(self.operations):
+                    post_operation(account.pk, 1, Decimal('1.01'), 'test')
+            finally:
+                connections.close_all()
+
+        workers = [Thread(target=deposit) for number in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        account.refresh_from_db()
+        expected = Decimal('1.01') * self.threads * self.operations
+        self.assertEqual(account.Balance, expected)
+        self.assertEqual(account.Free_balance, expected)
+        self.assertEqual(OperationModel.objects.filter(FK_Id_account=account).count(), self.threads * self.operations)
+        balances = set(OperationModel.objects.filter(FK_Id_account=account).values_list('Balance_after_operation', flat=True))
+        self.assertEqual(len(balances), self.threads * self.operations)
+
+
+class AccountListQueriesTest(TestCase):
+
+    accounts = 300
+
+    @classmethod
+    def setUpTestData(cls):
+        account = create_account(balance=100)
+        cls.customer = account.FK_Id_customer_id
+        AccountModel.objects.bulk_create([
+                                        AccountModel(
+                                                    Balance=Decimal(number),
+                                                    Free_balance=Decimal(number),
+                                                    Created_employee='test',
+                                                    FK_Id_account_type_id=account.FK_Id_account_type_id,
+                                                    FK_Id_customer_id=cls.customer)
+                                        for number in range(cls.accounts - 1)])
+        cls.user = get_user_model().objects.create_user(username='teller', password='test')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_list_columns(self):
+        account = AccountModel.objects.of_customer(self.customer).for_list().first()
+        self.assertEqual(account.get_deferred_fields(), {'FK_Id_customer_id'})
+
+    def test_account_pages(self):
+        # Session, user, permissions of the menu (user and groups) and one query for all accounts
+        for route in ['listaccount', 'selectaccount_operation', 'selectaccount_history']:
+            with self.subTest(route=route), self.assertNumQueries(5):
+                response = self.client.get(reverse(f'minibankapp:{route}', args=[self.customer]))
+            self.assertEqual(len(response.context['object_list']), self.accounts)
+
+    def test_account_api(self):
+        # Session, user and one query with account type and customer joined
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('minibankapp:api_accounts', args=[self.customer]), {'limit': 500})
+        results = response.json()['results']
+        self.assertEqual(len(results), self.accounts)
+        self.assertEqual(results[0]['Account_type']['Id_account_type'], 'T-01')
+        self.assertEqual(results[0]['Customer']['Last_name'], 'Kowalski')
+
+
+class HistoryOperationViewTest(TestCase):
+
+    def setUp(self):
+        self.account = create_account()
+        self.client.force_login(get_user_model().objects.create_user(username='teller', password='test'))
+        self.url = reverse('minibankapp:historyoperation', args=[self.account.FK_Id_customer_id, self.account.pk])
+
+    def test_history_page(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['object_list']), [])
+        for value in ['100.00', '50.00']:
+            post_operation(self.account.pk, 1, Decimal(value), 'test')
+        response = self.client.get(self.url)
+        self.assertEqual([operation.Value_operation for operation in response.context['object_list']], [Decimal('50.00'), Decimal('100.00')])
+
+
+class HistoryExportTest(TestCase):
+
+    def setUp(self):
+        self.account = create_account(debit=50)
+        for type_operation, value in [(1, '100.00'), (2, '30.00'), (1, '5.50')]:
+            post_operation(self.account.pk, type_operation, Decimal(value), 'test')
+        self.client.force_login(get_user_model().objects.create_user(username='teller', password='test'))
+        self.url = reverse('minibankapp:historyexport', args=[self.account.pk])
+
+    def test_csv(self):
+        response = self.client.get(self.url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        rows = [line.split(';') for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual(rows[0], HistoryExportClass.headers)
+        # Newest first, operation type as label
+        self.assertEqual([row[1:4] for row in rows[1:]], [
+                                                        ['Deposit', '5.50', '75.50'],
+                                                        ['Withdrawal', '-30.00', '70.00'],
+                                                        ['Deposit', '100.00', '100.00']])
+
+    def test_xlsx(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="History_operations.xlsx"')
+        worksheet = load_workbook(BytesIO(b''.join(response.streaming_content)))['Operations']
+        rows = list(worksheet.values)
+        self.assertEqual(list(rows[0]), HistoryExportClass.headers)
+        self.assertEqual([row[1:4] for row in rows[1:]], [('Deposit', 5.5, 75.5), ('Withdrawal', -30, 70), ('Deposit', 100, 100)])
+        self.assertTrue(worksheet['A1'].font.bold)
+        self.assertEqual(worksheet['C2'].number_format, '#,##0.00')
+
+
+class ArchiveHistoryTest(TestCase):
+
+    def setUp(self):
+        self.account = create_account()
+        for value in ['100.00', '50.00', '25.00', '10.00']:
+            post_operation(self.account.pk, 1, Decimal(value), 'test')
+        # Two operations of January 2024 and two of today
+        self.operation_ids = list(OperationModel.objects.order_by('pk').values_list('pk', flat=True))
+        for number, operation_id in enumerate(self.operation_ids[:2]):
+            OperationModel.objects.filter(pk=operation_id).update(Operation_date=day_start(datetime.date(2024, 1, 10 + number)))
+        BalanceSnapshotModel.objects.all().delete()
+        compact_snapshots(datetime.date(2024, 1, 1), datetime.date.today())
+        self.client.force_login(get_user_model().objects.create_user(username='teller', password='test'))
+
+    def test_archival(self):
+        url = reverse('minibankapp:api_operations', args=[self.account.pk])
+        etag = self.client.get(url)['ETag']
+        ArchivalClass(days=90, log_days=90).run()
+        self.assertEqual(list(OperationArchiveModel.objects.values_list('pk', flat=True).order_by('pk')), self.operation_ids[:2])
+        self.assertEqual(OperationModel.objects.count(), 2)
+        self.assertEqual(LedgerCheckClass().run(), [])
+        # Live rows only by default, the archive continues them for an older period
+        self.assertEqual(operation_history(self.account.pk).count(), 2)
+        history = operation_history(self.account.pk, date_from=datetime.date(2024, 1, 1)).order_by('-Operation_date', '-pk')
+        self.assertEqual([operation.Id_operation for operation in history], self.operation_ids[::-1])
+        self.assertEqual(period_summary(self.account.pk, datetime.date(2024, 1, 1), datetime.date(2024, 1, 31))['closing'], Decimal('150.00'))
+        # Same list for the API, its ETag does not change
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(len(self.client.get(url).json()['results']), 4)
+
+    def test_archival_by_other_process(self):
+        # Reference data and a history read of this process come before the archival, nothing cached hides the moved rows
+        reference_data.get_data()
+        self.assertEqual(operation_history(self.account.pk, date_from=datetime.date(2024, 1, 1)).count(), 4)
+        ArchivalClass(days=90, log_days=90).run()
+        self.assertEqual(operation_history(self.account.pk, date_from=datetime.date(2024, 1, 1)).count(), 4)
+
+    def test_month_being_archived(self):
+        # First chunk of January 2024 moved, the second one not yet
+        archival = ArchivalClass(days=90, log_days=90, chunk_size=1)
+        ArchivePartitionModel.objects.create(Table_name='operation', Period='2024-01')
+        archival.move_chunk(OperationModel, OperationArchiveModel, self.operation_ids[:1])
+        history = operation_history(self.account.pk, date_from=datetime.date(2024, 1, 1), date_to=datetime.date(2024, 1, 31))
+        self.assertEqual([operation.Id_operation for operation in history.order_by('-Operation_date', '-pk')], self.operation_ids[1::-1])
+
+
+@skipIf(pyarrow is None, 'pyarrow is not installed')
+class AnalyticsExportTest(TestCase):
+
+    def setUp(self):
+        self.account = create_account()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def export(self):
+        analytics_export = AnalyticsExportClass(directory=self.directory.name, batch_size=2)
+        analytics_export.lag = 0
+        analytics_export.run()
+        return analytics_export
+
+    def test_incremental_export(self):
+        for value in ['100.00', '50.00', '25.00']:
+            post_operation(self.account.pk, 1, Decimal(value), 'test')
+        self.assertEqual(self.export().exported, 3)
+        post_operation(self.account.pk, 2, Decimal('5.00'), 'test')
+        analytics_export = self.export()
+        # Second run writes the new operation only, into a file of its own
+        self.assertEqual(analytics_export.exported, 1)
+        self.assertEqual(analytics_export.read_state()['last_id_operation'], OperationModel.objects.order_by('pk').last().pk)
+        table = pyarrow.parquet.read_table(analytics_export.files[0])
+        self.assertEqual(table.column('Value_operation').to_pylist(), [Decimal('-5.00')])
+        self.assertEqual(table.column('Id_account_type').to_pylist(), ['T-01'])
+        self.assertEqual(table.column('Id_customer').to_pylist(), [self.account.FK_Id_customer_id])
+        self.assertEqual(self.export().exported, 0)
+
+    def test_job_already_exported(self):
+        operation = post_operation(self.account.pk, 1, Decimal('100.00'), 'test')
+        self.export()
+        # Bound of the job covered by the state of the directory, the job fails instead of finishing with an empty zip
+        export_job = ExportJobClass()
+        export_job.directory = Path(self.directory.name) / 'exports'
+        job = ExportJobModel.objects.create(Format_job='parquet', Last_id_operation=operation.pk, Created_employee='test')
+        with self.settings(MINIBANK_ANALYTICS_DIR=self.directory.name):
+            export_job.run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.Status_job, 'Failed')
+        self.assertTrue(job.Error_job.startswith(f'Operations up to {operation.pk} already exported'))
+        self.assertFalse(any(export_job.directory.iterdir()))
+
+
+class InterestCountingTest(TestCase):
+
+    def setUp(self):
+        self.account = create_account(balance='333.33', debit=50)
+        AccountModel.objects.filter(pk=self.account.pk).update(Percent=Decimal('1.50'))
+
+    def count_interest(self, period='2026-01', workers=1, **kwargs):
+        run, created = InterestRunModel.objects.get_or_create(Period=period, defaults={'Created_employee': 'test'})
+        return InterestCountingClass(employee='test', **kwargs).run(run, workers=workers)
+
+    def test_interest(self):
+        self.count_interest()
+        self.account.refresh_from_db()
+        # 333.33 * 1.5 % = 4.99995, rounded to cents
+        self.assertEqual(self.account.Balance, Decimal('338.33'))
+        self.assertEqual(self.account.Free_balance, Decimal('388.33'))
+        operation = OperationModel.objects.get(FK_Id_account=self.account)
+        self.assertEqual(operation.Type_operation, 3)
+        self.assertEqual(operation.Value_operation, Decimal('5.00'))
+        self.assertEqual(operation.Balance_after_operation, Decimal('338.33'))
+        self.assertEqual(balance_as_of(self.account.pk, snapshot_date(operation.Operation_date)), Decimal('338.33'))
+
+    def test_interest_after_posting(self):
+        # Balance of the account is read when its batch is counted, an earlier posting is part of it
+        post_operation(self.account.pk, 1, Decimal('666.67'), 'test')
+        self.count_interest()
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.Balance, Decimal('1015.00'))
+        self.assertEqual(self.account.Free_balance, Decimal('1065.00'))
+
+    def test_repeated_run(self):
+        # Finished period is not counted again
+        self.count_interest()
+        run = self.count_interest()
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.Balance, Decimal('338.33'))
+        self.assertEqual(run.Counter, 1)
+        self.assertEqual(OperationModel.objects.filter(FK_Id_account=self.account).count(), 1)
+
+    def test_resumed_run(self):
+        accounts = [self.account] + [create_account(balance='100.00') for number in range(4)]
+        AccountModel.objects.update(Percent=Decimal('1.50'))
+        run = InterestRunModel.objects.create(Period='2026-01', Created_employee='test')
+        # Run stopped after its first chunk of two accounts
+        interest_counting = InterestCountingClass(employee='test', batch_size=2)
+        partition = interest_counting.create_partitions(run, workers=1)[0]
+        self.assertEqual(interest_counting.count_chunk(partition.pk), 2)
+        partition.refresh_from_db()
+        self.assertEqual((partition.Last_id_account, partition.Status_partition), (accounts[1].pk, 'Running'))
+        # Next run continues after the last account of the checkpoint, every account gets its interest once
+        run = self.count_interest(batch_size=2)
+        self.assertEqual(run.Counter, 5)
+        self.assertEqual(list(OperationModel.objects.order_by('FK_Id_account').values_list('FK_Id_account', flat=True)), [account.pk for account in accounts])
+        self.assertEqual(AccountModel.objects.get(pk=accounts[-1].pk).Balance, Decimal('101.50'))
+
+    def test_workers(self):
+        for balance in ['0.01', '99.99', '1000.00', '0.00', '12345.67']:
+            create_account(balance=balance)
+        AccountModel.objects.update(Percent=Decimal('2.25'))
+        results = []
+        for workers in [1, 3]:
+            # Each run from the same balances, rolled back afterwards
+            with transaction.atomic():
+                run = self.count_interest(workers=workers)
+                results.append((
+                                run.Counter,
+                                list(AccountModel.objects.order_by('pk').values_list('Balance', 'Free_balance')),
+                                list(OperationModel.objects.order_by('FK_Id_account').values_list('FK_Id_account', 'Value_operation')),
+                                InterestPartitionModel.objects.filter(FK_Id_run=run).count()))
+                transaction.set_rollback(True)
+        self.assertEqual(results[0][:3], results[1][:3])
+        self.assertEqual((results[0][0], results[0][3], results[1][3]), (5, 1, 3))
+
+
+class LedgerCheckTest(TestCase):
+
+    def setUp(self):
+        self.clean = create_account(debit=50)
+        self.drifted = create_account(debit=50)
+        for account in [self.clean, self.drifted]:
+            post_operation(account.pk, 1, Decimal('100.00'), 'test')
+        AccountModel.objects.filter(pk=self.drifted.pk).update(Balance=Decimal('90.00'))
+
+    def test_drift(self):
+        self.assertEqual(LedgerCheckClass().run(), [(self.drifted.pk, 'Balance', Decimal('90.00'), Decimal('100.00'))])
+        # Repair sets the balance back to the sum of operations, the clean account is untouched
+        check = LedgerCheckClass(apply=True)
+        check.run()
+        self.assertEqual(check.repaired, 1)
+        self.assertEqual(AccountModel.objects.get(pk=self.drifted.pk).Balance, Decimal('100.00'))
+        self.assertEqual(LedgerCheckClass().run(), [])
+
+    def test_posting_during_check(self):
+        # Posting between the read of balances and the read of sums looks like drift until the account is read again under lock
+        class PostingLedgerCheckClass(LedgerCheckClass):
+            def operation_sums(check, account_filter):
+                if not check.checked:
+                    post_operation(self.clean.pk, 1, Decimal('10.00'), 'test')
+                return super().operation_sums(account_filter)
+        check = PostingLedgerCheckClass(apply=True)
+        self.assertEqual(check.run(), [(self.drifted.pk, 'Balance', Decimal('90.00'), Decimal('100.00'))])
+        self.assertEqual(check.repaired, 1)
+        self.assertEqual(AccountModel.objects.get(pk=self.clean.pk).Balance, Decimal('110.00'))
+
+
+class ExportJobTest(TestCase):
+
+    def setUp(self):
+        self.account = create_account()
+        post_operation(self.account.pk, 1, Decimal('100.00'), 'test')
+        self.directory = tempfile.TemporaryDirectory()
+        self.export_job = ExportJobClass()
+        self.export_job.directory = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_claim_and_reuse(self):
+        job = self.export_job.request_export(self.account.pk, 'csv', 'test')
+        self.assertEqual(self.export_job.request_export(self.account.pk, 'csv', 'test'), job)
+        claimed = self.export_job.claim_job()
+        self.assertEqual((claimed, claimed.Status_job), (job, 'Running'))
+        self.assertIsNone(self.export_job.claim_job())
+        self.export_job.run_job(claimed)
+        self.assertEqual(self.export_job.get_path(claimed).read_text(encoding='utf-8').splitlines()[1].split(';')[2], '100.00')
+        # Finished file is reused until the next posting
+        self.assertEqual(self.export_job.request_export(self.account.pk, 'csv', 'test'), job)
+        post_operation(self.account.pk, 1, Decimal('10.00'), 'test')
+        self.assertNotEqual(self.export_job.request_export(self.account.pk, 'csv', 'test'), job)
+
+    def test_stale_job(self):
+        job = self.export_job.request_export(self.account.pk, 'csv', 'test')
+        self.export_job.claim_job()
+        # Worker stopped, the job is failed after the timeout and a new request queues another one
+        ExportJobModel.objects.filter(pk=job.pk).update(Started_date=timezone.now() - datetime.timedelta(seconds=self.export_job.timeout + 1))
+        new_job = self.export_job.request_export(self.account.pk, 'csv', 'test')
+        self.assertNotEqual(new_job, job)
+        self.assertEqual(self.export_job.claim_job(), new_job)
+        self.assertEqual(ExportJobModel.objects.get(pk=job.pk).Status_job, 'Failed')
+
+    def test_evict(self):
+        jobs = []
+        for value in ['10.00', '20.00']:
+            post_operation(self.account.pk, 1, Decimal(value), 'test')
+            jobs.append(self.export_job.run_job(self.export_job.request_export(self.account.pk, 'csv', 'test')))
+        ExportJobModel.objects.filter(pk=jobs[0].pk).update(Finished_date=timezone.now() - datetime.timedelta(seconds=self.export_job.max_age + 1))
+        self.assertEqual(self.export_job.evict(), 1)
+        self.assertFalse(self.export_job.get_path(jobs[0]).exists())
+        self.assertEqual(list(ExportJobModel.objects.values_list('pk', flat=True)), [jobs[1].pk])
+        # Directory over max size, the oldest file goes first
+        self.export_job.max_size = 0
+        self.assertEqual(self.export_job.evict(), 1)
+        self.assertFalse(ExportJobModel.objects.exists())
+
+
+class ReferenceDataTest(TestCase):
+
+    def test_account_type_added(self):
+        reference_data.invalidate()
+        self.assertEqual(reference_data.account_types(), {})
+        # Invalidation of the saving process runs on commit, the cached version does not know the type yet
+        AccountTypeModel.objects.create(Id_account_type='T-02', Description='Test', Subaccount='000002')
+        self.assertEqual(reference_data.account_type('T-02')['Subaccount'], '000002')
+        with self.assertRaises(AccountTypeModel.DoesNotExist):
+            reference_data.account_type('T-03')
+
+
+class CustomerSearchTest(TestCase):
+
+    def test_statistics(self):
+        customers = [create_account().FK_Id_customer for number in range(2)]
+        self.assertEqual(TrigramStatModel.objects.get(pk='__k').Count_trigram, 2)
+        # Row of a trigram inserted by another index between the UPDATE and the INSERT
+        TrigramStatModel.objects.create(Trigram='zzz', Count_trigram=1)
+        change_statistics({'zzz': 2}, 1)
+        self.assertEqual(TrigramStatModel.objects.get(pk='zzz').Count_trigram, 3)
+        TrigramStatModel.objects.filter(pk='zzz').delete()
+        # Statistics kept by the signals match a full rebuild
+        statistics = dict(TrigramStatModel.objects.values_list('Trigram', 'Count_trigram'))
+        rebuild_index()
+        self.assertEqual(dict(TrigramStatModel.objects.values_list('Trigram', 'Count_trigram')), statistics)
+        customers[0].Last_name = 'Nowak'
+        customers[0].save()
+        self.assertEqual(TrigramStatModel.objects.get(pk='__k').Count_trigram, 1)
+        self.assertEqual(search_customers('Kowalski'), [customers[1].pk])
+
+    def test_short_name(self):
+        # Names of up to three letters are not taken for an identification prefix
+        customer = create_customer(pesel='80010112345', identification='KOT123456')
+        customer.Last_name = 'Kot'
+        customer.save()
+        view = SelectCustomerListView()
+        view.request = RequestFactory().get('/', {'criteria': 'Kot'})
+        self.assertEqual(view.get_queryset_customer('criteria'), [customer])
+
+
+""" Paused log buffer """
+class PausedLogBufferClass(LogBufferClass):
+
+    def run(self):
+        # Consumer waits until the buffer stops, the queue fills up
+        self.stop_event.wait()
+
+
+class LogBufferTest(TestCase):
+
+    def write_logs(self, overflow, counter=3):
+        log_buffer = PausedLogBufferClass(queue_size=2, overflow=overflow)
+        for number in range(counter):
+            log_buffer.write(LogModel(Action_log=f'post {number}', Function_log='test', Duration_log=0, User_log='test', Status_log='Success'))
+        return log_buffer
+
+    def test_drop(self):
+        log_buffer = self.write_logs('drop')
+        self.assertEqual(log_buffer.dropped, 1)
+        # Queued records are saved when the buffer stops, the dropped one is reported once
+        with self.assertLogs('minibankapp.logsink', 'WARNING') as logs:
+            log_buffer.stop()
+            log_buffer.flush()
+        self.assertEqual(logs.output, ['WARNING:minibankapp.logsink:1 activity log record(s) dropped, the queue of 2 records was full.'])
+        self.assertEqual(list(LogModel.objects.order_by('pk').values_list('Action_log', flat=True)), ['post 0', 'post 1'])
+
+    def test_sync(self):
+        log_buffer = self.write_logs('sync')
+        self.assertEqual(list(LogModel.objects.values_list('Action_log', flat=True)), ['post 2'])
+        log_buffer.stop()
+        self.assertEqual((LogModel.objects.count(), log_buffer.dropped), (3, 0))
+
+    def test_block(self):
+        log_buffer = self.write_logs('block', counter=2)
+        self.assertFalse(LogModel.objects.exists())
+        log_buffer.stop()
+        self.assertEqual(LogModel.objects.count(), 2)
+        with self.assertRaises(ValueError):
+            LogBufferClass(overflow='wait')
+
+
+class LatencyHistogramTest(TestCase):
+
+    def test_buckets(self):
+        # Value of a bucket within 3 % of every value recorded in it
+        for value in [1, 63, 64, 65, 1000, 12345, 987654, 10 ** 9 + 7]:
+            bucket_value = LatencyHistogramClass.bucket_value(LatencyHistogramClass.bucket_index(value))
+            self.assertLessEqual(abs(bucket_value - value), value * 0.03)
+
+    def test_percentiles(self):
+        first, second = LatencyHistogramClass(), LatencyHistogramClass()
+        self.assertEqual(first.percentile(50), 0)
+        for value in range(1, 1001):
+            (first if value % 2 else second).record(value * 100)
+        # Histograms of two minutes merged after a round trip through the rollup format
+        histogram = LatencyHistogramClass.loads(first.dumps(), first.count, first.total, first.maximum)
+        histogram.merge(second)
+        self.assertEqual((histogram.count, histogram.maximum), (1000, 100000))
+        for percent, expected in [(50, 50000), (90, 90000), (99, 99000), (100, 100000)]:
+            self.assertLessEqual(abs(histogram.percentile(percent) - expected), expected * 0.03)
+
+    def test_statistics(self):
+        recorder = LatencyRecorderClass()
+        for duration_ms in [1, 2, 3, 100]:
+            recorder.record('customer', duration_ms * 10 ** 6)
+        recorder.persist()
+        statistics = latency_statistics(5, recorder)
+        self.assertEqual([(row['action'], row['count'], row['max']) for row in statistics], [('customer', 4, 0.1)])
+        self.assertAlmostEqual(statistics[0]['p50'], 0.002, delta=0.0001)
+        # Request of a quiet action not persisted yet is counted from memory
+        recorder.record('customer', 10 ** 6)
+        self.assertEqual([row['count'] for row in latency_statistics(5, recorder)], [5])
+
+    def test_persist(self):
+        recorder = LatencyRecorderClass()
+        with self.assertNumQueries(0):
+            recorder.persist()
+        # Rollups which cannot be saved are logged, persist at exit does not raise
+        recorder.histograms[('customer', None)] = LatencyHistogramClass()
+        with self.assertLogs('minibankapp.histogram', 'ERROR'):
+            recorder.persist()
+        self.assertEqual(recorder.histograms, {})
+
+
+class QueryCounterTest(TestCase):
+
+    def setUp(self):
+        self.account = create_account()
+        self.client.force_login(get_user_model().objects.create_user(username='teller', password='test'))
+        self.url = reverse('minibankapp:newoperation', args=[self.account.FK_Id_customer_id, self.account.pk])
+
+    def test_counter(self):
+        query_counter = QueryCounterClass()
+        with connection.execute_wrapper(query_counter), CaptureQueriesContext(connection) as context:
+            AccountModel.objects.count()
+            list(OperationModel.objects.filter(FK_Id_account=self.account))
+        self.assertEqual(query_counter.count, len(context.captured_queries))
+        self.assertGreater(query_counter.duration, 0)
+        # Statement without parameters
+        self.assertTrue(query_counter.slowest_sql.startswith('SELECT'))
+
+    def test_monitored_posting(self):
+        response = self.client.post(self.url, {'Type_operation': 1, 'Value_operation': '10.00'})
+        self.assertEqual(response.status_code, 302)
+        log = LogModel.objects.get()
+        # Statements of the posting are counted, the log record itself is not
+        self.assertGreaterEqual(log.Queries_log, 4)
+        self.assertIn('minibankapp_', log.Slowest_query_log)
+        self.assertFalse(log.Alert_log)
+        with self.settings(MINIBANK_QUERY_THRESHOLD=1):
+            self.client.post(self.url, {'Type_operation': 1, 'Value_operation': '10.00'})
+        self.assertTrue(LogModel.objects.order_by('pk').last().Alert_log)
+
+
+class CustomerCriteriaTest(TestCase):
+
+    def setUp(self):
+        self.first = create_customer(pesel='90010112345', identification='ABC123456')
+        self.second = create_customer(pesel='85020254321', identification='900XYZ')
+        self.third = create_customer(pesel='70030312345', identification='777XYZ')
+
+    def search(self, criteria):
+        view = SelectCustomerListView()
+        view.request = RequestFactory().get('/', {'criteria': criteria})
+        # PESEL or identification decided inside the query of the page
+        with self.assertNumQueries(1):
+            return list(view.get_queryset_customer('criteria'))
+
+    def test_criteria(self):
+        # PESEL match wins over identification match
+        self.assertEqual(self.search('900'), [self.first])
+        self.assertEqual(self.search(' 850 '), [self.second])
+        # Identification match when no PESEL starts with the digits, compared upper-cased
+        self.assertEqual(self.search('777'), [self.third])
+        self.assertEqual(self.search('abc1'), [self.first])
+        self.assertEqual(self.search('123'), [])
+
+
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        self.customers = [create_customer(pesel=f'900101{number:05d}').pk for number in range(25)][::-1]
+        self.client.force_login(get_user_model().objects.create_user(username='teller', password='test'))
+        self.url = reverse('minibankapp:listcustomer')
+
+    def get_page(self, cursor=None):
+        response = self.client.get(self.url, {'cursor': cursor} if cursor else {})
+        page = response.context['page_obj']
+        return [customer.pk for customer in page.object_list], page
+
+    def test_pages(self):
+        rows, page = self.get_page()
+        self.assertEqual((rows, page.number, page.paginator.num_pages, page.has_previous()), (self.customers[:10], 1, 3, False))
+        second_rows, second_page = self.get_page(page.next_cursor)
+        self.assertEqual((second_rows, second_page.number), (self.customers[10:20], 2))
+        rows, page = self.get_page(second_page.next_cursor)
+        self.assertEqual((rows, page.number, page.has_next()), (self.customers[20:], 3, False))
+        # Back from the last page gives the same rows
+        self.assertEqual(self.get_page(page.previous_cursor)[0], second_rows)
+        rows, page = self.get_page(second_page.previous_cursor)
+        self.assertEqual((rows, page.has_previous()), (self.customers[:10], False))
+
+    def test_count_limit(self):
+        with self.settings(MINIBANK_PAGINATION_COUNT_LIMIT=12):
+            self.assertEqual(self.get_page()[1].paginator.num_pages, '2+')
+        with self.settings(MINIBANK_PAGINATION_COUNT_LIMIT=0):
+            self.assertIsNone(self.get_page()[1].paginator.num_pages)
+
+    def test_invalid_cursor(self):
+        # Not base64 JSON, primary key which is not a number
+        for cursor in ['abc', base64.urlsafe_b64encode(b'{"v": ["x"], "n": 2, "d": "n"}').decode()]:
+            self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 404)
+
+
+class QueryPlanTest(TestCase):
+
+    def test_access_paths(self):
+        BankSeederClass(customers=50, operations=2000, logs=200, end_date=datetime.date(2024, 12, 31)).run(search_index=False)
+        command = CheckQueryPlansCommand()
+        command.analyze()
+        # Every hot access path is served by an index, none reads a whole table or sorts it
+        for name, queryset in command.access_paths():
+            plan = command.explain(queryset)
+            for pattern in command.full_scan_patterns[connection.vendor]:
+                self.assertIsNone(re.search(pattern, plan, re.MULTILINE), f'{name}: {plan}')
+
+
+class IbanGeneratorTest(TestCase):
+
+    def setUp(self):
+        ParameterModel.objects.create(Country_code='PL', Bank_number='10101010')
+        self.accounts = [create_account() for number in range(3)]
+        AccountModel.objects.filter(pk=self.accounts[0].pk).update(Number_IBAN='PL00000000000000000000000001')
+        # Subaccount too short for a 28 character IBAN
+        account_type = AccountTypeModel.objects.create(Id_account_type='T-02', Description='Test', Subaccount='0001')
+        AccountModel.objects.filter(pk=self.accounts[2].pk).update(FK_Id_account_type=account_type)
+        reference_data.invalidate()
+
+    def test_command(self):
+        output = StringIO()
+        call_command('generate_iban', chunk_size=1, stdout=output, stderr=StringIO())
+        self.assertIn('1 IBAN(s) generated, 1 rejected', output.getvalue())
+        account = self.accounts[1]
+        ibans = dict(AccountModel.objects.values_list('pk', 'Number_IBAN'))
+        self.assertEqual(ibans[account.pk], f'PL10101010000001{account.pk}{account.FK_Id_customer_id:0>{12 - len(str(account.pk))}}')
+        self.assertEqual(len(ibans[account.pk]), 28)
+        self.assertEqual((ibans[self.accounts[0].pk], ibans[self.accounts[2].pk]), ('PL00000000000000000000000001', ''))
+        # Accounts with IBAN are skipped by the next run
+        self.assertEqual(IbanGeneratorClass().run(), 0)
+
+
+class SeedBankTest(TestCase):
+
+    def seed(self):
+        call_command('seed_bank', customers=20, operations=300, logs=10, seed=7, end_date='2024-12-31', stdout=StringIO())
+        return (
+                list(CustomerModel.objects.order_by('pk').values_list('Pesel', 'Identification', 'Last_name')),
+                list(AccountModel.objects.order_by('pk').values_list('Number_IBAN', 'Balance', 'Free_balance')),
+                list(OperationModel.objects.order_by('pk').values_list('Value_operation', 'Operation_date')))
+
+    def test_seed(self):
+        # Same seed and end date give the same bank
+        with transaction.atomic():
+            first = self.seed()
+            transaction.set_rollback(True)
+        second = self.seed()
+        self.assertEqual(first, second)
+        self.assertEqual((len(second[0]), len(second[1]), len(second[2]), LogModel.objects.count()), (20, 40, 300, 10))
+        # Balances, operations and daily snapshots agree
+        self.assertEqual(LedgerCheckClass().run(), [])
+        account = AccountModel.objects.order_by('pk').last()
+        self.assertEqual(balance_as_of(account.pk, datetime.date(2024, 12, 31)), account.Balance)
+        # Search index built for the bulk created customers
+        self.assertIn(CustomerModel.objects.order_by('pk').first().pk, search_customers(second[0][0][2]))
+        with self.assertRaises(CommandError):
+            call_command('seed_bank', customers=1, stdout=StringIO())
+
+
+class TellerBenchmarkTest(TestCase):
+
+    def test_benchmark(self):
+        BankSeederClass(customers=20, operations=400, end_date=datetime.date(2024, 12, 31)).run()
+        teller_benchmark = TellerBenchmarkClass(iterations=2, warmup=1, interest_iterations=1)
+        teller_benchmark.run()
+        results = teller_benchmark.report()
+        self.assertEqual(list(results['workflows']), [name for name, workflow, iterations in teller_benchmark.workflows()])
+        self.assertTrue(all(result['queries'] > 0 for result in results['workflows'].values()))
+        # Same results are no regression, more queries or slower pages are
+        self.assertEqual(compare_results(results, results), [])
+        baseline = {'workflows': {'History page': dict(results['workflows']['History page'], queries=1, p50_ms=results['workflows']['History page']['p50_ms'] / 2)}}
+        self.assertEqual(sorted(metric for name, metric, base, current in compare_results(results, baseline)), ['p50_ms', 'queries'])
+
+
+class AsyncViewsTest(TestCase):
+
+    def setUp(self):
+        self.account = create_account()
+        for value in ['100.00', '50.00']:
+            post_operation(self.account.pk, 1, Decimal(value), 'test')
+        LogModel.objects.create(Action_log='post', Function_log='test', Duration_log=0, User_log='test', Status_log='Success')
+        customer = self.account.FK_Id_customer_id
+        self.routes = [
+                        ('listcustomer', [], {}),
+                        ('listcustomer', [], {'criteria': '9001'}),
+                        ('listaccount', [customer], {}),
+                        ('selectaccount_history', [customer], {}),
+                        ('historyoperation', [customer, self.account.pk], {}),
+                        ('monitoring', [], {})]
+
+    def get_pages(self, enabled):
+        pages = []
+        with async_views(enabled):
+            for route, args, data in self.routes:
+                response = self.client.get(reverse(f'minibankapp:{route}', args=args), data)
+                self.assertEqual(response.resolver_match.func.view_class.__name__.endswith('AsyncView'), enabled)
+                pages.append((response.status_code, [row.pk for row in response.context['object_list']]))
+        return pages
+
+    def test_same_pages(self):
+        self.client.force_login(get_user_model().objects.create_superuser(username='boss', password='test'))
+        pages = self.get_pages(False)
+        self.assertTrue(all(status_code == 200 and rows for status_code, rows in pages))
+        self.assertEqual(self.get_pages(True), pages)
+
+    def test_login_required(self):
+        with async_views(True):
+            response = self.client.get(reverse('minibankapp:historyoperation', args=[self.account.FK_Id_customer_id, self.account.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('login', response['Location'])
+
+    def test_permission_required(self):
+        user = get_user_model().objects.create_user(username='teller', password='test')
+        self.client.force_login(user)
+        url = reverse('minibankapp:monitoring')
+        # Monitoring needs the extended role in both modes
+        for enabled in [False, True]:
+            with async_views(enabled):
+                self.assertEqual(self.client.get(url).status_code, 403)
+        user.user_permissions.add(Permission.objects.get(codename='extended_role', content_type__app_label='minibankapp'))
+        for enabled in [False, True]:
+            with async_views(enabled):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class ApiTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.account = create_account(debit=50)
+        for value in ['100.00', '50.00', '25.00']:
+            post_operation(self.account.pk, 1, Decimal(value), 'test')
+        self.user = get_user_model().objects.create_user(username='system', password='secret')
+        self.url = reverse('minibankapp:api_operations', args=[self.account.pk])
+
+    def basic(self, username='system', password='secret'):
+        return {'HTTP_AUTHORIZATION': 'Basic ' + base64.b64encode(f'{username}:{password}'.encode()).decode()}
+
+    def test_auth(self):
+        response = self.client.get(self.url)
+        self.assertEqual((response.status_code, response['WWW-Authenticate']), (401, 'Basic realm="minibank"'))
+        self.assertEqual(self.client.get(self.url, **self.basic(password='wrong')).status_code, 401)
+        self.assertEqual(self.client.get(self.url, **self.basic()).status_code, 200)
+        # Checked credentials are cached, a deactivated user is refused anyway
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url, **self.basic()).status_code, 401)
+
+    def test_session_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        self.assertEqual(client.get(self.url).status_code, 200)
+        self.assertEqual(client.post(self.url, '{}', content_type='application/json').status_code, 403)
+
+    def test_post(self):
+        def post(data):
+            return self.client.post(self.url, json.dumps(data), content_type='application/json', **self.basic())
+        response = post({'Type_operation': 2, 'Value_operation': '75.00'})
+        self.assertEqual((response.status_code, response.json()['Balance_after_operation']), (201, '100.00'))
+        self.assertEqual(post({'Type_operation': 2, 'Value_operation': '150.01'}).status_code, 409)
+        self.assertEqual(post({'Type_operation': 5, 'Value_operation': '1.00'}).status_code, 400)
+        self.assertEqual(self.client.post(self.url, 'x', content_type='application/json', **self.basic()).status_code, 400)
+
+    def test_etag(self):
+        response = self.client.get(self.url, **self.basic())
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'], **self.basic()).status_code, 304)
+        # New posting changes the ETag
+        post_operation(self.account.pk, 1, Decimal('1.00'), 'test')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'], **self.basic()).status_code, 200)
+        # ETag from the body of a list without a known version
+        url = reverse('minibankapp:api_customers')
+        response = self.client.get(url, **self.basic())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **self.basic()).status_code, 304)
+
+    def test_pagination(self):
+        response = self.client.get(self.url, {'limit': 2}, **self.basic()).json()
+        self.assertEqual([row['Value_operation'] for row in response['results']], ['25.00', '50.00'])
+        self.assertIsNone(response['previous'])
+        response = self.client.get(response['next'], **self.basic()).json()
+        self.assertEqual(([row['Value_operation'] for row in response['results']], response['next']), (['100.00'], None))
+        response = self.client.get(self.url, {'cursor': 'abc'}, **self.basic())
+        self.assertEqual((response.status_code, response.json()['error']), (404, 'Invalid cursor.'))
+        self.assertEqual(self.client.get(reverse('minibankapp:api_operations', args=[999999]), **self.basic()).status_code, 404)
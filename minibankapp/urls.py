@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from django.urls import reverse_lazy
@@ -7,8 +8,26 @@ from .views import (MainDasboard, ParameterUpdateView, MonitoringListView,
                     CustomerCreateView, CustomerListView, CustomerUpdateView, CustomerDeleteView, SelectCustomerAccountListView, CustomerCreateDoneView,
                     AccountTypeCreateView, AccountTypeListView, AccountTypeDeleteView, AccountTypeUpdateView,
                     AccountListView, AccountCreateView, AccountUpdateView, AccountGenerateUpdateView, AccountInterestUpdateView,
-                    OperationCreateView, SelectCustomerOperationListView, SelectAcountOperationListView,
-                    SelectCustomerHistoryListView, SelectAcountHistoryListView, HistoryOperationListView, HistoryExportListView)
+                    OperationCreateView, OperationBatchView, SelectCustomerOperationListView, SelectAcountOperationListView,
+                    SelectCustomerHistoryListView, SelectAcountHistoryListView, HistoryOperationListView, HistoryExportListView,
+                    HistoryExportJobView, AnalyticsExportJobView, ExportJobDetailView, ExportJobDownloadView,
+                    CustomerListAsyncView, SelectCustomerAccountAsyncView, AccountListAsyncView,
+                    SelectCustomerOperationAsyncView, SelectAcountOperationAsyncView,
+                    SelectCustomerHistoryAsyncView, SelectAcountHistoryAsyncView, HistoryOperationAsyncView, MonitoringAsyncView)
+
+from .api import (CustomerApiView, AccountApiView, OperationApiView)
+
+# Read views run natively under ASGI, under WSGI their sync versions avoid the async_to_sync bridge
+if getattr(settings, 'MINIBANK_ASYNC_VIEWS', False):
+    MonitoringListView = MonitoringAsyncView
+    CustomerListView = CustomerListAsyncView
+    SelectCustomerAccountListView = SelectCustomerAccountAsyncView
+    AccountListView = AccountListAsyncView
+    SelectCustomerOperationListView = SelectCustomerOperationAsyncView
+    SelectAcountOperationListView = SelectAcountOperationAsyncView
+    SelectCustomerHistoryListView = SelectCustomerHistoryAsyncView
+    SelectAcountHistoryListView = SelectAcountHistoryAsyncView
+    HistoryOperationListView = HistoryOperationAsyncView
 
 
 app_name = "minibankapp"
@@ -40,12 +59,22 @@ urlpatterns = [
      path(route="selectcustomer-operation/", view=SelectCustomerOperationListView.as_view(), name="selectcustomer_operation"),
      path(route="selectaccount-operation/<int:customer>/", view=SelectAcountOperationListView.as_view(), name="selectaccount_operation"),
      path(route="newoperation/<int:customer>/<int:account>/", view=OperationCreateView.as_view(), name="newoperation"),
+     path(route="batchoperation/", view=OperationBatchView.as_view(), name="batchoperation"),
 
      # History
      path(route="selectcustomer-history/", view=SelectCustomerHistoryListView.as_view(), name="selectcustomer_history"),
      path(route="selectaccount-history/<int:customer>/", view=SelectAcountHistoryListView.as_view(), name="selectaccount_history"),
      path(route="historyoperation/<int:customer>/<int:account>/", view=HistoryOperationListView.as_view(), name="historyoperation"),
      path(route="historyexport/<int:account>/", view=HistoryExportListView.as_view(), name="historyexport"),
+     path(route="historyexport-job/<int:account>/", view=HistoryExportJobView.as_view(), name="historyexport_job"),
+     path(route="analyticsexport-job/", view=AnalyticsExportJobView.as_view(), name="analyticsexport_job"),
+     path(route="exportjob/<int:job>/", view=ExportJobDetailView.as_view(), name="exportjob"),
+     path(route="exportjob/<int:job>/download/", view=ExportJobDownloadView.as_view(), name="exportjob_download"),
+
+     # JSON API
+     path(route="api/v1/customers/", view=CustomerApiView.as_view(), name="api_customers"),
+     path(route="api/v1/customers/<int:customer>/accounts/", view=AccountApiView.as_view(), name="api_accounts"),
+     path(route="api/v1/accounts/<int:account>/operations/", view=OperationApiView.as_view(), name="api_operations"),
 
      # AccountType
      path(route="newaccounttype/", view=AccountTypeCreateView.as_view(), name="newaccounttype"),
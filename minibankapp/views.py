@@ -1,11 +1,10 @@
 # -*- coding: utf-8 -*-
 
 import json
-import datetime
-import decimal
-from openpyxl import Workbook
-from openpyxl.styles import (Border, Side, PatternFill, Font)
-from django.http.response import HttpResponse
+from functools import cached_property
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
+from django.http.response import (StreamingHttpResponse, FileResponse)
 from django.shortcuts import render, redirect
 from django.utils.decorators import method_decorator
 from django.contrib.auth.mixins import (LoginRequiredMixin, PermissionRequiredMixin)
@@ -13,19 +12,26 @@ from django.contrib.auth.models import Permission
 from django.views.generic import (View, CreateView, ListView, UpdateView, DeleteView, FormView)
 from django.core.exceptions import ValidationError
 from django.db.utils import DataError
-from django.db import transaction
 from django.urls import (reverse, reverse_lazy)
-from django.db.models import ProtectedError
+from django.db.models import (ProtectedError, Sum)
 from .forms import (
                     CustomerForm,
                     NewAccountTypeForm, UpdateAccountTypeForm,
                     NewAccountForm, UpdateAccountForm,
                     UpdateParameterForm,
-                    CreateOperationForm)
+                    CreateOperationForm, BatchOperationForm, HistoryPeriodForm)
 
-from .models import (CustomerModel, AccountModel, OperationModel, AccountTypeModel, ParameterModel, LogModel)
-from .functions import SelectCustomerListView
+from .models import (CustomerModel, AccountModel, AccountTypeModel, ParameterModel, LogModel, InterestRunModel, InterestPartitionModel, ExportJobModel)
+from .functions import (SelectCustomerListView, KeysetPaginationMixin, AsyncListView, AsyncKeysetPaginationMixin, AsyncSelectCustomerListView)
 from .decorators import ActivityMonitoringClass
+from .interest import current_period
+from .posting import (post_operation, BatchPostingClass)
+from .exports import (HistoryExportClass, ExportJobClass)
+from .histogram import latency_statistics
+from .reference import reference_data
+from .iban import build_iban
+from .snapshots import period_summary
+from .archive import (operation_history, archive_boundary)
 
 
 """ Custom Permission """
@@ -84,7 +90,7 @@ class CustomerCreateDoneView(LoginRequiredMixin, View):
         return render(request, 'minibankapp/newcustomer_done.html', {'pk': self.kwargs['customer']})
 
 
-class CustomerListView(LoginRequiredMixin, SelectCustomerListView):
+class CustomerListView(LoginRequiredMixin, KeysetPaginationMixin, SelectCustomerListView):
     template_name = 'minibankapp/viewcustomer.html'
     paginate_by = 10
 
@@ -95,6 +101,11 @@ class CustomerListView(LoginRequiredMixin, SelectCustomerListView):
             return CustomerModel.objects.filter().order_by('-pk')
 
 
+class CustomerListAsyncView(AsyncKeysetPaginationMixin, AsyncSelectCustomerListView):
+    template_name = 'minibankapp/viewcustomer.html'
+    paginate_by = 10
+
+
 class CustomerUpdateView(LoginRequiredMixin, UpdateView):
     form_class = CustomerForm
     template_name = 'minibankapp/updatecustomer.html'
@@ -135,16 +146,17 @@ class SelectCustomerAccountListView(LoginRequiredMixin, SelectCustomerListView):
             return CustomerModel.objects.filter().order_by('-pk')
 
 
+class SelectCustomerAccountAsyncView(AsyncSelectCustomerListView):
+    template_name = 'minibankapp/selectcustomer_account.html'
+    paginate_by = 10
+
+
 """ Account """
 class AccountListView(LoginRequiredMixin, ListView):
     template_name = 'minibankapp/viewaccount.html'
 
     def get_queryset(self):
-        results = AccountModel.objects.filter(FK_Id_customer=self.kwargs['customer']).order_by('-pk')
-        if results.exists():
-            return results
-        else:
-            return AccountModel.objects.none()
+        return AccountModel.objects.of_customer(self.kwargs['customer']).for_list()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -152,6 +164,16 @@ class AccountListView(LoginRequiredMixin, ListView):
         return context
 
 
+class AccountListAsyncView(AsyncListView):
+    template_name = 'minibankapp/viewaccount.html'
+
+    def get_queryset(self):
+        return AccountModel.objects.of_customer(self.kwargs['customer']).for_list()
+
+    async def get_context_data(self, **kwargs):
+        return await super().get_context_data(pk_customer=self.kwargs['customer'], **kwargs)
+
+
 class AccountCreateView(LoginRequiredMixin, CreateView):
     form_class = NewAccountForm
     template_name = 'minibankapp/newaccount.html'
@@ -174,9 +196,8 @@ class AccountCreateView(LoginRequiredMixin, CreateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         dt = {}
-        instance = AccountTypeModel.objects.all().values_list('Id_account_type', 'Percent')
-        for i in instance:
-            dt[i[0]] = str(i[1])
+        for id_account_type, account_type in reference_data.account_types().items():
+            dt[id_account_type] = str(account_type['Percent'])
         context['pk_customer'] = self.kwargs['customer']
         context['dataJSON'] = json.dumps(dt)
         return context
@@ -220,18 +241,14 @@ class AccountGenerateUpdateView(LoginRequiredMixin, PermissionRequiredMixin, Upd
 
     def get(self, request, *args, **kwargs):
         self.object = self.get_object()
-        country_code = ParameterModel.objects.get().Country_code
-        bank_number = ParameterModel.objects.get().Bank_number
-        subaccount = AccountTypeModel.objects.get(Id_account_type=self.object.FK_Id_account_type.property_get_pk).Subaccount
-        customer = str(self.kwargs['customer'])
-        account = str(self.kwargs['account'])
-        prefix_zero = ''
-        while len(customer) + len(account) + len(prefix_zero) < 12:
-            prefix_zero = prefix_zero + '0'
         # Creating IBAN and save
-        self.object.Number_IBAN = country_code + bank_number + subaccount + account + prefix_zero + customer
+        self.object.Number_IBAN = build_iban(
+                                            self.kwargs['account'],
+                                            self.kwargs['customer'],
+                                            reference_data.account_type(self.object.FK_Id_account_type_id)['Subaccount'])
         try:
-            self.object.full_clean()
+            # Only IBAN changes, relations of the stored account need no check
+            self.object.full_clean(exclude=['FK_Id_account_type', 'FK_Id_customer'])
             self.object.save()
             return redirect(reverse('minibankapp:listaccount', args=[self.kwargs['customer']]))
         except (DataError, ProtectedError) as error_description:
@@ -244,31 +261,21 @@ class AccountInterestUpdateView(LoginRequiredMixin, PermissionRequiredMixin, For
     permission_required = 'minibankapp.extended_role'
 
     def get(self, request):
-        return render(request, 'minibankapp/interest_confirm.html')
+        run = InterestRunModel.objects.filter(Period=current_period()).first()
+        return render(request, 'minibankapp/interest_confirm.html', {'run': run})
 
     def post(self, request):
-        counter = 0
-        data = AccountModel.objects.filter(Balance__gt = 0, Percent__gt = 0)
-        if data.exists():
-            try:
-                with transaction.atomic():
-                    for instance in data:
-                        interest = round(instance.Balance * (instance.Percent / 100), 2)
-                        new_balance = instance.Balance + interest
-                        new_free_balance = new_balance + instance.Debit
-                        # Updating balance & free balance
-                        AccountModel.objects.filter(Id_account=instance.Id_account).update(Balance=new_balance, Free_balance=new_free_balance)
-                        # New object in OperationModel
-                        OperationModel.objects.create(
-                                                        Type_operation = 3,
-                                                        Value_operation = interest,
-                                                        Balance_after_operation = new_balance,
-                                                        Operation_employee = self.request.user,
-                                                        FK_Id_account = instance)
-                        counter += 1
-            except Exception as error_description:
-                return render(request,'minibankapp/error.html', {'error_message': error_description})
-        msg = 'Interest for ' + str(counter) + ' account(s) has been recounted.'
+        # Interest is counted by "manage.py run_interest", the view only queues and reports the run
+        run, created = InterestRunModel.objects.get_or_create(
+                                                            Period=current_period(),
+                                                            defaults={'Created_employee': self.request.user})
+        if created:
+            msg = 'Interest counting for period ' + run.Period + ' has been queued.'
+        elif run.Status_run == 'Done':
+            msg = 'Interest for ' + str(run.Counter) + ' account(s) has been recounted.'
+        else:
+            counter = InterestPartitionModel.objects.filter(FK_Id_run=run).aggregate(counter=Sum('Counter'))['counter'] or 0
+            msg = 'Interest counting for period ' + run.Period + ' is ' + run.Status_run.lower() + ': ' + str(counter) + ' account(s) so far.'
         return render(request, 'minibankapp/interest_done.html', {'msg': msg})
 
 
@@ -328,56 +335,58 @@ class OperationCreateView(LoginRequiredMixin, CreateView):
 
     def setup(self, request, *args, **kwargs):
         super().setup(request, *args, **kwargs)
-        self.var_free_balance = AccountModel.objects.get(pk=self.kwargs['account']).Free_balance
-        self.var_balance = AccountModel.objects.get(pk=self.kwargs['account']).Balance
-        self.var_debit = AccountModel.objects.get(pk=self.kwargs['account']).Debit
-        self.var_iban = AccountModel.objects.get(pk=self.kwargs['account']).Number_IBAN
-        
+        self.account = AccountModel.objects.only('Free_balance', 'Balance', 'Debit', 'Number_IBAN').get(pk=self.kwargs['account'])
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['free_balance'] = self.var_free_balance
-        context['balance'] = self.var_balance
-        context['debit'] = self.var_debit
-        context['nr_iban'] = self.var_iban
+        context['free_balance'] = self.account.Free_balance
+        context['balance'] = self.account.Balance
+        context['debit'] = self.account.Debit
+        context['nr_iban'] = self.account.Number_IBAN
         context['pk_customer'] = self.kwargs['customer']
         return context
 
-    def form_valid(self, form):     
-        try:            
-            with transaction.atomic():
-                instance = form.save(commit=False)
-                # Operation type
-                if instance.Type_operation == 2:
-                    instance.Value_operation = instance.Value_operation * (-1)
-                # Set up balance after transaction
-                var_balance_after_operation = AccountModel.objects.get(pk=self.kwargs['account']).Balance + instance.Value_operation
-                instance.Balance_after_operation = var_balance_after_operation
-                # Other data
-                instance.Operation_employee = self.request.user
-                instance.FK_Id_account_id = self.kwargs['account']
-                # Updating balance & free balance for AccountModel
-                var_free_balance_after_operation = var_balance_after_operation + self.var_debit
-                record = AccountModel.objects.get(pk=self.kwargs['account'])
-                record.Balance = var_balance_after_operation
-                record.Free_balance = var_free_balance_after_operation
-                record.full_clean()
-                record.save()
-                instance.full_clean()
-                instance.save()
-                return redirect(reverse('minibankapp:selectaccount_operation', args=[self.kwargs['customer']]))
+    def form_valid(self, form):
+        instance = form.save(commit=False)
+        try:
+            post_operation(
+                            account_id=self.kwargs['account'],
+                            type_operation=instance.Type_operation,
+                            value_operation=instance.Value_operation,
+                            employee=self.request.user)
+            return redirect(reverse('minibankapp:selectaccount_operation', args=[self.kwargs['customer']]))
         except ValidationError as error_message:
-            self.var_free_balance = AccountModel.objects.get(pk=self.kwargs['account']).Free_balance
-            for content in error_message:
-                item = content[1]
-                error_message = item[0]
+            self.account.refresh_from_db(fields=['Free_balance', 'Balance', 'Debit'])
             return render(self.request, self.template_name, {
                                                                 'form': form,
-                                                                'nr_iban': self.var_iban,
+                                                                'nr_iban': self.account.Number_IBAN,
                                                                 'pk_customer': self.kwargs['customer'],
-                                                                'balance': self.var_balance,
-                                                                'debit': self.var_debit,
-                                                                'free_balance': self.var_free_balance,
-                                                                'error_message': error_message})
+                                                                'balance': self.account.Balance,
+                                                                'debit': self.account.Debit,
+                                                                'free_balance': self.account.Free_balance,
+                                                                'error_message': error_message.messages[0]})
+
+    def form_invalid(self, form):
+        for field in form.errors:
+            form[field].field.widget.attrs['class'] += ' errorfield'
+        return super().form_invalid(form)
+
+
+@method_decorator(ActivityMonitoringClass(), name='post')
+class OperationBatchView(LoginRequiredMixin, FormView):
+    form_class = BatchOperationForm
+    template_name = 'minibankapp/batchoperation.html'
+
+    def form_valid(self, form):
+        batch_posting = BatchPostingClass(employee=self.request.user)
+        results = batch_posting.run(form.cleaned_data['File_operation'], form.cleaned_data['Format_file'])
+        return render(self.request, self.template_name, {
+                                                        'form': self.form_class(),
+                                                        'accepted': batch_posting.accepted,
+                                                        'rejected': batch_posting.rejected,
+                                                        'throughput': batch_posting.throughput,
+                                                        'rejected_lines': [line for line in results if line[2] == 'Rejected'],
+                                                        'done': True})
 
     def form_invalid(self, form):
         for field in form.errors:
@@ -396,15 +405,16 @@ class SelectCustomerOperationListView(LoginRequiredMixin, SelectCustomerListView
             return CustomerModel.objects.filter().order_by('-pk')
 
 
+class SelectCustomerOperationAsyncView(AsyncSelectCustomerListView):
+    template_name = 'minibankapp/selectcustomer_operation.html'
+    paginate_by = 10
+
+
 class SelectAcountOperationListView(LoginRequiredMixin, ListView):
     template_name = 'minibankapp/viewaccount_operation.html'
 
     def get_queryset(self):
-        results = AccountModel.objects.filter(FK_Id_customer=self.kwargs['customer']).order_by('-pk')
-        if results.exists():
-            return results
-        else:
-            return AccountModel.objects.none()
+        return AccountModel.objects.of_customer(self.kwargs['customer']).for_list()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -412,6 +422,10 @@ class SelectAcountOperationListView(LoginRequiredMixin, ListView):
         return context
 
 
+class SelectAcountOperationAsyncView(AccountListAsyncView):
+    template_name = 'minibankapp/viewaccount_operation.html'
+
+
 """ History """
 class SelectCustomerHistoryListView(LoginRequiredMixin, SelectCustomerListView):
     template_name = 'minibankapp/selectcustomer_history.html'
@@ -424,15 +438,16 @@ class SelectCustomerHistoryListView(LoginRequiredMixin, SelectCustomerListView):
             return CustomerModel.objects.filter().order_by('-pk')
 
 
+class SelectCustomerHistoryAsyncView(AsyncSelectCustomerListView):
+    template_name = 'minibankapp/selectcustomer_history.html'
+    paginate_by = 10
+
+
 class SelectAcountHistoryListView(LoginRequiredMixin, ListView):
     template_name = 'minibankapp/viewaccount_history.html'
 
     def get_queryset(self):
-        results = AccountModel.objects.filter(FK_Id_customer=self.kwargs['customer']).order_by('-pk')
-        if results.exists():
-            return results
-        else:
-            return AccountModel.objects.none()
+        return AccountModel.objects.of_customer(self.kwargs['customer']).for_list()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -440,88 +455,183 @@ class SelectAcountHistoryListView(LoginRequiredMixin, ListView):
         return context
 
 
-class HistoryOperationListView(LoginRequiredMixin, ListView):
+class SelectAcountHistoryAsyncView(AccountListAsyncView):
+    template_name = 'minibankapp/viewaccount_history.html'
+
+
+class HistoryPeriodMixin:
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.period_form = HistoryPeriodForm(request.GET)
+        self.date_from = self.date_to = None
+        if self.period_form.is_valid():
+            self.date_from = self.period_form.cleaned_data['Date_from']
+            self.date_to = self.period_form.cleaned_data['Date_to']
+
+    @cached_property
+    def boundary(self):
+        # Read once per request, by the queryset and the context
+        return archive_boundary()
+
+    def get_period_queryset(self):
+        # Archived operations are read for periods starting before the archive boundary
+        return operation_history(self.kwargs['account'], self.date_from, self.date_to, boundary=self.boundary).order_by('-Operation_date')
+
+    def get_period_context(self):
+        # Hint about archived operations while the period does not reach them
+        boundary = self.boundary
+        return {
+                'archived_before': boundary if boundary and not (self.date_from and self.date_from < boundary) else None,
+                'pk_customer': self.kwargs['customer'],
+                'id_account': self.kwargs['account'],
+                'period_form': self.period_form,
+                'period_query': urlencode({key: value for key, value in self.request.GET.items() if key in ['Date_from', 'Date_to']})}
+
+
+class HistoryOperationListView(LoginRequiredMixin, HistoryPeriodMixin, KeysetPaginationMixin, ListView):
     template_name = 'minibankapp/historyoperation.html'
     paginate_by = 10
+    keyset_ordering = ['-Operation_date', '-pk']
 
     def get_queryset(self):
-        results = OperationModel.objects.filter(FK_Id_account=self.kwargs['account']).order_by('-Operation_date')
-        if results.exists():
-            return results
-        else:
-            return OperationModel.objects.none()
+        # Empty period renders an empty page, no separate EXISTS query
+        return self.get_period_queryset()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['pk_customer'] = self.kwargs['customer']
-        context['id_account'] = self.kwargs['account']
+        context.update(self.get_period_context())
         context['nr_iban'] = AccountModel.objects.get(pk=self.kwargs['account']).Number_IBAN
+        # Opening and closing balance with totals of the period from daily snapshots
+        if self.date_from and self.date_to:
+            context['summary'] = period_summary(self.kwargs['account'], self.date_from, self.date_to)
+        return context
+
+
+class HistoryOperationAsyncView(HistoryPeriodMixin, AsyncKeysetPaginationMixin, AsyncListView):
+    template_name = 'minibankapp/historyoperation.html'
+    paginate_by = 10
+    keyset_ordering = ['-Operation_date', '-pk']
+
+    def get_queryset(self):
+        return self.get_period_queryset()
+
+    async def aget_queryset(self):
+        # Archive boundary comes with the reference data, which may be read from the database
+        return await sync_to_async(self.get_queryset)()
+
+    async def get_context_data(self, **kwargs):
+        context = await super().get_context_data(**await sync_to_async(self.get_period_context)(), **kwargs)
+        account = await AccountModel.objects.only('Number_IBAN').aget(pk=self.kwargs['account'])
+        context['nr_iban'] = account.Number_IBAN
+        if self.date_from and self.date_to:
+            context['summary'] = await sync_to_async(period_summary)(self.kwargs['account'], self.date_from, self.date_to)
         return context
 
 
 class HistoryExportListView(LoginRequiredMixin, ListView):
 
     def get(self, request, *args, **kwargs):
-        side = Side(style='dashed', color='FF000000')
-        border_around = Border(left=side, right=side, top=side, bottom=side)
-        file_name = 'History_operations.xlsx'
-        fields = [
-                    'Id_operation',
-                    'Type_operation',
-                    'Value_operation',
-                    'Balance_after_operation',
-                    'Operation_date']
-        data = OperationModel.objects.filter(FK_Id_account=self.kwargs['account']).order_by('-Operation_date').values_list(*fields)
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = f'attachment; filename={file_name}'
-        workbook = Workbook()
-        workbook.iso_dates = True
-        worksheet = workbook.active
-        worksheet.title = 'Operations'
-        # Column headers
-        headers = [
-                    'Id operation',
-                    'Typ of operation',
-                    'Value operation',
-                    'Balance after operation',
-                    'Operation date']
-        for column_number, column_title in enumerate(headers, 1):
-            cell = worksheet.cell(row=1, column=column_number)
-            cell.value = column_title
-            cell.font = Font(bold=True, italic=True)
-            cell.fill = PatternFill(fgColor='0000FFFF', fill_type='solid')
-            cell.border = border_around
-        # Cell data
-        for row_number, row in enumerate(data, 1):
-            for column_number, cell_value in enumerate(row, 1):
-                if type(cell_value) is datetime.datetime:
-                    cell_value = cell_value.replace(tzinfo=None)
-                    cell_value = cell_value.strftime('%d.%m.%Y %H:%M:%S')
-                if column_number == 2:
-                    match cell_value:
-                        case 1:
-                            cell_value = 'Deposit'
-                        case 2:
-                            cell_value = 'Withdrawal'
-                        case 3:
-                            cell_value = 'Interest'
-                cell = worksheet.cell(row=row_number+1, column=column_number)
-                cell.value = cell_value
-                cell.border = border_around
-                if type(cell_value) is decimal.Decimal:
-                    cell.number_format = '#,##0.00'
-        # AutoFit column width
-        for column in worksheet.columns:
-            max_length = max(len(str(cell.value)) for cell in column)
-            adjusted_width = (max_length + 2) * 1.1
-            worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
-        workbook.save(response)
-        return response
+        period_form = HistoryPeriodForm(request.GET)
+        period = period_form.cleaned_data if period_form.is_valid() else {}
+        history_export = HistoryExportClass(
+                                            account=self.kwargs['account'],
+                                            date_from=period.get('Date_from'),
+                                            date_to=period.get('Date_to'))
+        if request.GET.get('format') == 'csv':
+            response = StreamingHttpResponse(history_export.csv_stream(), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename=History_operations.csv'
+            return response
+        return FileResponse(
+                            history_export.xlsx_file(),
+                            as_attachment=True,
+                            filename='History_operations.xlsx',
+                            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+class HistoryExportJobView(LoginRequiredMixin, View):
+
+    def get(self, request, *args, **kwargs):
+        file_format = 'csv' if request.GET.get('format') == 'csv' else 'xlsx'
+        job = ExportJobClass().request_export(self.kwargs['account'], file_format, self.request.user)
+        return redirect(reverse('minibankapp:exportjob', args=[job.pk]))
+
+
+class AnalyticsExportJobView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    permission_required = 'minibankapp.extended_role'
+
+    def get(self, request, *args, **kwargs):
+        job = ExportJobClass().request_analytics_export(self.request.user)
+        return redirect(reverse('minibankapp:exportjob', args=[job.pk]))
+
+
+class ExportJobDetailView(LoginRequiredMixin, View):
+
+    def get(self, request, *args, **kwargs):
+        job = ExportJobModel.objects.filter(pk=self.kwargs['job']).first()
+        # Analytics export holds operations of all accounts
+        if job is not None and job.FK_Id_account_id is None and not request.user.has_perm('minibankapp.extended_role'):
+            job = None
+        if job is None:
+            return render(request,'minibankapp/error.html', {'error_message': 'Export file is no longer available.'})
+        return render(request, 'minibankapp/exportjob.html', {'job': job})
+
+
+class ExportJobDownloadView(LoginRequiredMixin, View):
+
+    def get(self, request, *args, **kwargs):
+        job = ExportJobModel.objects.filter(pk=self.kwargs['job'], Status_job='Done').first()
+        if job is not None and job.FK_Id_account_id is None and not request.user.has_perm('minibankapp.extended_role'):
+            job = None
+        export_job = ExportJobClass()
+        if job is None or not export_job.get_path(job).exists():
+            return render(request,'minibankapp/error.html', {'error_message': 'Export file is no longer available.'})
+        return FileResponse(
+                            open(export_job.get_path(job), 'rb'),
+                            as_attachment=True,
+                            filename=export_job.download_name(job))
 
 
 """ Monitoring """
-class MonitoringListView(LoginRequiredMixin, ListView):
+class MonitoringWindowMixin:
+    window_choice = [
+                    (15, '15 minutes'),
+                    (60, '1 hour'),
+                    (1440, '24 hours')]
+
+    def get_window(self):
+        window = self.request.GET.get('window', '60')
+        return int(window) if window in [str(minutes) for minutes, label in self.window_choice] else 60
+
+
+class MonitoringListView(LoginRequiredMixin, PermissionRequiredMixin, MonitoringWindowMixin, KeysetPaginationMixin, ListView):
     permission_required = 'minibankapp.extended_role'
     queryset = LogModel.objects.all().order_by('-Date_log')
     template_name = 'minibankapp/monitoring.html'
     paginate_by = 10
+    keyset_ordering = ['-Date_log', '-pk']
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['window'] = self.get_window()
+        context['window_choice'] = self.window_choice
+        context['statistics'] = latency_statistics(context['window'])
+        return context
+
+
+class MonitoringAsyncView(MonitoringWindowMixin, AsyncKeysetPaginationMixin, AsyncListView):
+    permission_required = 'minibankapp.extended_role'
+    template_name = 'minibankapp/monitoring.html'
+    paginate_by = 10
+    keyset_ordering = ['-Date_log', '-pk']
+
+    def get_queryset(self):
+        return LogModel.objects.all().order_by('-Date_log')
+
+    async def get_context_data(self, **kwargs):
+        window = self.get_window()
+        return await super().get_context_data(
+                                            window=window,
+                                            window_choice=self.window_choice,
+                                            statistics=await sync_to_async(latency_statistics)(window),
+                                            **kwargs)